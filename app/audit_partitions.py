@@ -0,0 +1,77 @@
+import argparse
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from core.config import AUDIT_ARCHIVE_DIR, AUDIT_RETENTION_MONTHS
+from core.database import engine
+from models.models import AuditLog
+from services import audit_partitions
+
+LEGACY = f"{audit_partitions.PARENT}_legacy"
+
+def ensure():
+    with engine.begin() as conn:
+        created = audit_partitions.ensure_partitions(conn)
+    print(f"{created} partição(ões) criada(s).")
+    print("Operação concluída com sucesso!")
+
+def retain(keep_months: int, archive_dir: str, detach_only: bool):
+    """Desanexa as partições mensais anteriores à janela de retenção e, salvo --detach-only, as arquiva em .csv.gz."""
+    cutoff = audit_partitions.add_months(audit_partitions.month_start(datetime.now(timezone.utc)), -keep_months)
+    with engine.connect() as conn:
+        expired = [t for t in audit_partitions.monthly_tables(conn) if t[1] < cutoff]
+    for name, month, attached in expired:
+        if attached:
+            with engine.begin() as conn:
+                conn.execute(text("SET LOCAL statement_timeout = 0"))
+                audit_partitions.detach(conn, name)
+            print(f"{name} desanexada.")
+        if not detach_only:
+            print(f"{name} arquivada em {audit_partitions.archive(engine, name, archive_dir)}.")
+    print("Operação concluída com sucesso!")
+
+def migrate_legacy():
+    """Converte uma tabela audit_logs não particionada (versões anteriores) para o formato particionado."""
+    with engine.begin() as conn:
+        if audit_partitions.is_partitioned(conn):
+            print("audit_logs já é particionada.")
+            return
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        # Nomes globais (índice da PK e sequência) precisam ser liberados para a nova tabela.
+        conn.execute(text(f"ALTER TABLE {audit_partitions.PARENT} RENAME TO {LEGACY}"))
+        conn.execute(text(f"ALTER INDEX IF EXISTS audit_logs_pkey RENAME TO {LEGACY}_pkey"))
+        conn.execute(text(f"ALTER SEQUENCE IF EXISTS audit_logs_id_seq RENAME TO {LEGACY}_id_seq"))
+        AuditLog.__table__.create(conn, checkfirst=True)
+
+        oldest = conn.execute(text(f"SELECT min(timestamp) FROM {LEGACY}")).scalar()
+        audit_partitions.ensure_partitions(conn, start=audit_partitions.month_start(oldest) if oldest else None)
+        copied = conn.execute(text(
+            f"INSERT INTO {audit_partitions.PARENT} (id, timestamp, user_id, action, details) "
+            f"SELECT id, coalesce(timestamp, now()), user_id, action, details::jsonb FROM {LEGACY}"
+        )).rowcount
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{audit_partitions.PARENT}', 'id'), "
+            f"coalesce((SELECT max(id) FROM {audit_partitions.PARENT}), 0) + 1, false)"
+        ))
+        conn.execute(text(f"DROP TABLE {LEGACY}"))
+    print(f"{copied} registro(s) de auditoria migrado(s).")
+    print("Operação concluída com sucesso!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção das partições mensais de audit_logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ensure", help="cria as partições do mês atual e dos próximos meses")
+    retain_parser = commands.add_parser("retain", help="desanexa e arquiva partições fora da janela de retenção")
+    retain_parser.add_argument("--keep-months", type=int, default=AUDIT_RETENTION_MONTHS)
+    retain_parser.add_argument("--archive-dir", default=AUDIT_ARCHIVE_DIR)
+    retain_parser.add_argument("--detach-only", action="store_true", help="apenas desanexa, mantendo as tabelas no banco")
+    commands.add_parser("migrate-legacy", help="converte a tabela audit_logs antiga para o formato particionado")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        ensure()
+    elif args.command == "retain":
+        retain(args.keep_months, args.archive_dir, args.detach_only)
+    else:
+        migrate_legacy()
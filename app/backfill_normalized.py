@@ -0,0 +1,42 @@
+import sys
+from core.database import SessionLocal
+from models.models import Contract, ContractStatus
+from services.contract_normalizer import build_rows, delete_statements
+
+def backfill_normalized(db, batch_size: int = 500):
+    """Gera partes, valores e prazos normalizados para os contratos já analisados, em lotes por id."""
+    last_id, total = 0, 0
+    while True:
+        rows = (
+            db.query(Contract.id, Contract.extracted_data)
+            .filter(
+                Contract.id > last_id,
+                Contract.status == ContractStatus.SUCCESS,
+                Contract.is_deleted == False
+            )
+            .order_by(Contract.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        # Reexecutável: cada lote substitui as linhas normalizadas existentes dos seus contratos.
+        for statement in delete_statements(row.id for row in rows):
+            db.execute(statement)
+        for row in rows:
+            db.add_all(build_rows(row.id, row.extracted_data))
+        db.commit()
+        db.expunge_all()
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f"{total} contrato(s) normalizado(s)...")
+    print("Operação concluída com sucesso!")
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    db = SessionLocal()
+    try:
+        backfill_normalized(db, batch_size)
+    finally:
+        db.close()
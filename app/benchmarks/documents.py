@@ -0,0 +1,83 @@
+# app/benchmarks/documents.py
+"""Geração de contratos sintéticos (PDF e DOCX) para benchmarks e testes de carga."""
+import io
+import random
+import uuid
+from typing import List
+
+import docx
+
+_CLAUSES = (
+    "CLAUSULA {n} - DO OBJETO. O presente contrato tem por objeto a prestacao de servicos de {service}.",
+    "CLAUSULA {n} - DO VALOR. A CONTRATANTE pagara a CONTRATADA o valor de R$ {value},00 mensais.",
+    "CLAUSULA {n} - DA VIGENCIA. O prazo de vigencia e de {months} meses a partir de 01/0{month}/2025.",
+    "CLAUSULA {n} - DO REAJUSTE. Os valores serao reajustados anualmente pelo IPCA.",
+    "CLAUSULA {n} - DA RESCISAO. Qualquer das partes podera rescindir mediante aviso previo de 30 dias.",
+    "CLAUSULA {n} - DO FORO. Fica eleito o foro da comarca de Sao Paulo para dirimir quaisquer duvidas.",
+)
+_SERVICES = ("consultoria", "manutencao predial", "desenvolvimento de software", "transporte", "limpeza")
+
+
+def contract_lines(paragraphs: int, seed: int = None) -> List[str]:
+    """Texto de contrato com partes, valores e cláusulas; um identificador único evita acertos no cache de resultados."""
+    rng = random.Random(seed)
+    lines = [
+        f"CONTRATO DE PRESTACAO DE SERVICOS - REF {uuid.UUID(int=rng.getrandbits(128))}",
+        f"CONTRATANTE: Empresa {rng.randint(1, 999)} LTDA, CNPJ {rng.randint(10, 99)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}/0001-{rng.randint(10, 99)}",
+        f"CONTRATADA: Fornecedor {rng.randint(1, 999)} S.A., CNPJ {rng.randint(10, 99)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}/0001-{rng.randint(10, 99)}",
+    ]
+    for n in range(1, paragraphs + 1):
+        lines.append(_CLAUSES[n % len(_CLAUSES)].format(
+            n=n,
+            service=rng.choice(_SERVICES),
+            value=f"{rng.randint(1, 500)}.{rng.randint(100, 999)}",
+            months=rng.choice((6, 12, 24, 36)),
+            month=rng.randint(1, 9),
+        ))
+    return lines
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = None) -> bytes:
+    """Monta um PDF mínimo (fonte Helvetica, uma stream de texto por página) sem dependências externas."""
+    lines = contract_lines(pages * lines_per_page, seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # /Pages, preenchido depois de conhecer os ids das páginas
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        text = " T* ".join(f"({_pdf_escape(line[:110])}) Tj" for line in lines[page * lines_per_page:(page + 1) * lines_per_page])
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {text} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
+
+def make_docx(paragraphs: int, seed: int = None) -> bytes:
+    document = docx.Document()
+    for line in contract_lines(paragraphs, seed):
+        document.add_paragraph(line)
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
@@ -0,0 +1,52 @@
+# app/benchmarks/extraction.py
+"""Micro-benchmark de extração de texto (file_processor.extract_text) com documentos sintéticos.
+
+Uso (a partir de app/):
+    python -m benchmarks.extraction --pdf-pages 1 10 100 --docx-paragraphs 50 500 --repeat 5 --output extraction.json
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.documents import make_docx, make_pdf
+from benchmarks.report import summarize, write_results
+from services import file_processor
+
+
+async def _measure(path: str, filename: str, repeat: int) -> Dict[str, Any]:
+    await file_processor.extract_text(path, filename)  # aquecimento do pool de processos
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await file_processor.extract_text(path, filename)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+async def run(pdf_pages: List[int], docx_paragraphs: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        cases = [(f"pdf pages={pages}", f"bench-{pages}.pdf", make_pdf(pages, seed=pages)) for pages in pdf_pages]
+        cases += [
+            (f"docx paragraphs={paragraphs}", f"bench-{paragraphs}.docx", make_docx(paragraphs, seed=paragraphs))
+            for paragraphs in docx_paragraphs
+        ]
+        for label, filename, content in cases:
+            path = os.path.join(directory, filename)
+            with open(path, "wb") as f:
+                f.write(content)
+            results.append({"document": label, "bytes": len(content), "seconds": await _measure(path, filename, repeat)})
+    file_processor.shutdown_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de extração de texto por tipo e tamanho de documento.")
+    parser.add_argument("--pdf-pages", type=int, nargs="*", default=[1, 10, 100])
+    parser.add_argument("--docx-paragraphs", type=int, nargs="*", default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="arquivo JSON de resultados")
+    args = parser.parse_args()
+    write_results("extraction", vars(args), asyncio.run(run(args.pdf_pages, args.docx_paragraphs, args.repeat)), args.output)
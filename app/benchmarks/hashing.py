@@ -0,0 +1,56 @@
+# app/benchmarks/hashing.py
+"""Micro-benchmark de hashing de senhas.
+
+Uso (a partir de app/):
+    python -m benchmarks.hashing --bcrypt-rounds 10 12 --argon2-memory 19456 65536 --duration 3 --output hashing.json
+"""
+import argparse
+import time
+from typing import Dict, Any
+
+from benchmarks.report import write_results
+from core.security import build_context
+
+PASSWORD = "senha-de-benchmark-123"
+
+
+def _rate(func, duration: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        func()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+def measure(label: str, context, duration: float) -> Dict[str, Any]:
+    hashed = context.hash(PASSWORD)
+    return {
+        "setting": label,
+        "hashes_per_second": round(_rate(lambda: context.hash(PASSWORD), duration), 2),
+        "verifies_per_second": round(_rate(lambda: context.verify(PASSWORD, hashed), duration), 2),
+    }
+
+def run(bcrypt_rounds, argon2_memory, argon2_time_cost, duration: float):
+    results = []
+    for rounds in bcrypt_rounds:
+        results.append(measure(f"bcrypt rounds={rounds}", build_context(["bcrypt"], bcrypt_rounds=rounds), duration))
+    for memory in argon2_memory:
+        context = build_context(["argon2"], argon2_memory_cost=memory, argon2_time_cost=argon2_time_cost)
+        results.append(measure(f"argon2id memory={memory}KiB time={argon2_time_cost}", context, duration))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede hashes/segundo para cada configuração de custo.")
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 12])
+    parser.add_argument("--argon2-memory", type=int, nargs="*", default=[19456, 65536])
+    parser.add_argument("--argon2-time-cost", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=2.0, help="segundos por medição")
+    parser.add_argument("--output", help="arquivo JSON de resultados")
+    args = parser.parse_args()
+    write_results(
+        "hashing",
+        vars(args),
+        run(args.bcrypt_rounds, args.argon2_memory, args.argon2_time_cost, args.duration),
+        args.output,
+    )
@@ -0,0 +1,189 @@
+# app/benchmarks/load.py
+"""Teste de carga com carga mista contra uma instância em execução da API.
+
+Suba o ambiente local (Postgres, Redis, API e worker) e use o provedor simulado "groq" para não depender da
+API do Gemini; a latência da IA é controlada por GROQ_SIMULATED_LATENCY/GROQ_SIMULATED_JITTER. Aumente
+GROQ_RPM/GROQ_TPM para que o limitador local não domine o resultado.
+
+Uso (a partir de app/):
+    python -m benchmarks.load --base-url http://localhost:8000 --users 20 --duration 60 \\
+        --mix login=1,upload=1,list=4,stats=3,details=4,search=1 --output load.json
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.documents import make_docx, make_pdf
+from benchmarks.report import summarize, write_results
+
+PASSWORD = "senha-de-benchmark-123"
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, elapsed: float, ok: bool):
+        if ok:
+            self.samples[endpoint].append(elapsed)
+        else:
+            self.errors[endpoint] += 1
+
+    def results(self, duration: float):
+        endpoints = sorted(set(self.samples) | set(self.errors))
+        return {
+            endpoint: summarize(self.samples[endpoint], duration, self.errors[endpoint])
+            for endpoint in endpoints
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, email: str, args):
+        self.client = client
+        self.recorder = recorder
+        self.email = email
+        self.args = args
+        self.token = None
+        self.contract_ids: List[int] = []
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def _timed(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(endpoint, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.record(endpoint, time.perf_counter() - started, ok=response.status_code < 400)
+        return response
+
+    async def register(self):
+        await self.client.post("/api/register", json={"email": self.email, "password": PASSWORD, "first_name": "Bench"})
+        await self.login()
+
+    async def login(self):
+        response = await self._timed(
+            "POST /api/login", "POST", "/api/login", data={"username": self.email, "password": PASSWORD}
+        )
+        if response is not None and response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+    async def upload(self):
+        if random.random() < self.args.docx_ratio:
+            filename, content = "bench.docx", await asyncio.to_thread(make_docx, random.choice(self.args.docx_paragraphs))
+            content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        else:
+            filename, content = "bench.pdf", await asyncio.to_thread(make_pdf, random.choice(self.args.pdf_pages))
+            content_type = "application/pdf"
+
+        started = time.perf_counter()
+        try:
+            async with self.client.stream(
+                "POST", "/api/contracts/upload", headers=self.headers,
+                files={"file": (filename, content, content_type)}, data={"ai_provider": self.args.provider},
+            ) as response:
+                # A resposta é um stream SSE: o envio dos cabeçalhos marca o aceite do upload.
+                ok = response.status_code < 400
+                self.recorder.record("POST /api/contracts/upload", time.perf_counter() - started, ok)
+                if not ok or not self.args.follow_uploads:
+                    return
+                first_field = True
+                async for line in response.aiter_lines():
+                    if line == "event: field" and first_field:
+                        first_field = False
+                        self.recorder.record("pipeline (upload -> primeiro campo)", time.perf_counter() - started, ok=True)
+                    message = line[len("data: "):] if line.startswith("data: ") else ""
+                    if message.startswith("Finalizado!") or message.startswith("ERRO"):
+                        self.recorder.record("pipeline (upload -> resultado)", time.perf_counter() - started, message.startswith("Finalizado!"))
+                        return
+                self.recorder.record("pipeline (upload -> resultado)", time.perf_counter() - started, ok=False)
+        except httpx.HTTPError:
+            self.recorder.record("POST /api/contracts/upload", time.perf_counter() - started, ok=False)
+
+    async def list_contracts(self):
+        response = await self._timed("GET /api/contracts/", "GET", "/api/contracts/", headers=self.headers, params={"limit": 50})
+        if response is not None and response.status_code == 200:
+            self.contract_ids = [item["id"] for item in response.json()["items"]]
+
+    async def stats(self):
+        await self._timed("GET /api/contracts/stats", "GET", "/api/contracts/stats", headers=self.headers)
+
+    async def details(self):
+        if not self.contract_ids:
+            await self.list_contracts()
+            return
+        await self._timed(
+            "GET /api/contracts/{contract_id}", "GET", f"/api/contracts/{random.choice(self.contract_ids)}", headers=self.headers
+        )
+
+    async def search(self):
+        await self._timed(
+            "GET /api/contracts/search", "GET", "/api/contracts/search", headers=self.headers, params={"q": "prestacao servicos"}
+        )
+
+    async def run(self, deadline: float, operations: List[str], weights: List[float]):
+        actions = {
+            "login": self.login, "upload": self.upload, "list": self.list_contracts,
+            "stats": self.stats, "details": self.details, "search": self.search,
+        }
+        while time.monotonic() < deadline:
+            if self.token is None:
+                await self.login()
+                continue
+            await actions[random.choices(operations, weights)[0]]()
+
+
+def _parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+async def run(args) -> dict:
+    mix = _parse_mix(args.mix)
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        users = [VirtualUser(client, recorder, f"bench-{run_id}-{i}@example.com", args) for i in range(args.users)]
+        await asyncio.gather(*(user.register() for user in users))
+        # As métricas do cadastro/login inicial não entram no resultado.
+        recorder.samples.clear()
+        recorder.errors.clear()
+
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(user.run(deadline, list(mix), list(mix.values())) for user in users))
+        elapsed = time.monotonic() - started
+
+    results = recorder.results(elapsed)
+    total = sum(r["count"] for r in results.values())
+    return {"duration_seconds": round(elapsed, 2), "requests_per_second": round(total / elapsed, 2), "endpoints": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga mista (login, upload, listagem, estatísticas, detalhes, busca).")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10, help="usuários virtuais concorrentes")
+    parser.add_argument("--duration", type=float, default=60.0, help="segundos de carga")
+    parser.add_argument("--mix", default="login=1,upload=1,list=4,stats=3,details=4,search=1")
+    parser.add_argument("--provider", default="groq", help="provedor de IA usado nos uploads")
+    parser.add_argument("--pdf-pages", type=int, nargs="*", default=[1, 5, 20])
+    parser.add_argument("--docx-paragraphs", type=int, nargs="*", default=[50, 200])
+    parser.add_argument("--docx-ratio", type=float, default=0.3, help="fração dos uploads em DOCX")
+    parser.add_argument("--follow-uploads", action="store_true", help="acompanhar o SSE até o resultado da análise")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="arquivo JSON de resultados")
+    args = parser.parse_args()
+    write_results("load", vars(args), asyncio.run(run(args)), args.output)
@@ -0,0 +1,56 @@
+# app/benchmarks/report.py
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Percentil pelo método nearest-rank sobre amostras já ordenadas."""
+    if not sorted_samples:
+        return 0.0
+    index = max(0, min(len(sorted_samples) - 1, int(round(fraction * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+def summarize(samples: List[float], duration: Optional[float] = None, errors: int = 0) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    summary = {
+        "count": len(ordered),
+        "errors": errors,
+        "mean": round(sum(ordered) / len(ordered), 6) if ordered else 0.0,
+        "p50": round(percentile(ordered, 0.50), 6),
+        "p95": round(percentile(ordered, 0.95), 6),
+        "p99": round(percentile(ordered, 0.99), 6),
+        "max": round(ordered[-1], 6) if ordered else 0.0,
+    }
+    if duration:
+        summary["throughput_per_second"] = round(len(ordered) / duration, 2)
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(benchmark: str, config: Dict[str, Any], results: Any, output: Optional[str] = None):
+    """Grava os resultados em JSON com o commit e o ambiente, para comparação entre versões."""
+    document = {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "machine": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
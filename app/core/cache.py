@@ -2,5 +2,14 @@
 
 import redis.asyncio as redis
 from core.config import REDIS_URL
+from core import telemetry
 
-cache = redis.from_url(REDIS_URL, decode_responses=True)
\ No newline at end of file
+
+class _InstrumentedRedis(redis.Redis):
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        with telemetry.span(f"redis.{command}", telemetry.REDIS_COMMAND_SECONDS.labels(command=command)):
+            return await super().execute_command(*args, **options)
+
+
+cache = _InstrumentedRedis.from_url(REDIS_URL, decode_responses=True)
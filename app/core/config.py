@@ -12,4 +12,89 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
\ No newline at end of file
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/data/uploads")
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", 300))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", 5))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 4))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 15000))
+
+AI_RESULT_CACHE_TTL = int(os.getenv("AI_RESULT_CACHE_TTL", 60 * 60 * 24 * 30))
+
+AI_CHUNK_MAX_CHARS = int(os.getenv("AI_CHUNK_MAX_CHARS", 60000))
+AI_CHUNK_CONCURRENCY = int(os.getenv("AI_CHUNK_CONCURRENCY", 4))
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", os.cpu_count() or 2))
+EXTRACTION_PAGES_PER_TASK = int(os.getenv("EXTRACTION_PAGES_PER_TASK", 20))
+EXTRACTION_CPU_SECONDS = float(os.getenv("EXTRACTION_CPU_SECONDS", 120))
+EXTRACTION_MAX_MEMORY_MB = int(os.getenv("EXTRACTION_MAX_MEMORY_MB", 1024))
+
+MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", 50))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 5000))
+MAX_BATCH_UPLOAD_SIZE_MB = int(os.getenv("MAX_BATCH_UPLOAD_SIZE_MB", 2048))
+# Total gravado em disco por lote, contando o conteúdo descompactado dos .zip.
+MAX_BATCH_EXTRACTED_SIZE_MB = int(os.getenv("MAX_BATCH_EXTRACTED_SIZE_MB", 4096))
+
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", 120))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", 2))
+AI_FALLBACK_PROVIDERS = [p.strip() for p in os.getenv("AI_FALLBACK_PROVIDERS", "").split(",") if p.strip()]
+AI_HEDGE_DELAY = float(os.getenv("AI_HEDGE_DELAY", 0))
+AI_MAX_QUEUE_WAIT = float(os.getenv("AI_MAX_QUEUE_WAIT", 30))
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", 5))
+AI_BREAKER_RESET = float(os.getenv("AI_BREAKER_RESET", 60))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", 60))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", 1000000))
+GROQ_RPM = int(os.getenv("GROQ_RPM", 30))
+GROQ_TPM = int(os.getenv("GROQ_TPM", 60000))
+GROQ_SIMULATED_LATENCY = float(os.getenv("GROQ_SIMULATED_LATENCY", 1))
+GROQ_SIMULATED_JITTER = float(os.getenv("GROQ_SIMULATED_JITTER", 0))
+
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", 600))
+
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 60))
+
+PASSWORD_SCHEMES = [s.strip() for s in os.getenv("PASSWORD_SCHEMES", "bcrypt").split(",") if s.strip()]
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 2))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", 4))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", 64))
+
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", 500))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", 2))
+AUDIT_MAX_PENDING = int(os.getenv("AUDIT_MAX_PENDING", 10000))
+AUDIT_SPOOL_DIR = os.getenv("AUDIT_SPOOL_DIR", "/data/audit-spool")
+
+CONTRACT_CACHE_TTL = int(os.getenv("CONTRACT_CACHE_TTL", 3600))
+CONTRACT_CACHE_LOCAL_SIZE = int(os.getenv("CONTRACT_CACHE_LOCAL_SIZE", 1000))
+CONTRACT_CACHE_LOCAL_TTL = float(os.getenv("CONTRACT_CACHE_LOCAL_TTL", 30))
+
+SEARCH_TEXT_MAX_CHARS = int(os.getenv("SEARCH_TEXT_MAX_CHARS", 200000))
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9100))
+
+OFFBOARD_BATCH_SIZE = int(os.getenv("OFFBOARD_BATCH_SIZE", 500))
+OFFBOARD_MAX_BATCHES = int(os.getenv("OFFBOARD_MAX_BATCHES", 20))
+
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", 3))
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", 24))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "/data/audit-archive")
+AUDIT_QUERY_DEFAULT_DAYS = int(os.getenv("AUDIT_QUERY_DEFAULT_DAYS", 30))
+
+COMPACTION_SAMPLE_PAGES = int(os.getenv("COMPACTION_SAMPLE_PAGES", 5))
+COMPACTION_DEDUP_MIN_CHARS = int(os.getenv("COMPACTION_DEDUP_MIN_CHARS", 80))
+GEMINI_MAX_DOCUMENT_TOKENS = int(os.getenv("GEMINI_MAX_DOCUMENT_TOKENS", 500000))
+GROQ_MAX_DOCUMENT_TOKENS = int(os.getenv("GROQ_MAX_DOCUMENT_TOKENS", 200000))
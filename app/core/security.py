@@ -1,14 +1,40 @@
 # app/core/security.py
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from pydantic import BaseModel
 
-from core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from core.config import (SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, PASSWORD_SCHEMES,
+                         BCRYPT_ROUNDS, ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM,
+                         HASH_WORKERS, HASH_MAX_PENDING)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_context(schemes=PASSWORD_SCHEMES, bcrypt_rounds=BCRYPT_ROUNDS, argon2_time_cost=ARGON2_TIME_COST,
+                  argon2_memory_cost=ARGON2_MEMORY_COST, argon2_parallelism=ARGON2_PARALLELISM) -> CryptContext:
+    # Hashes com custo menor que o configurado (ou de um esquema que não é o primeiro) são marcados
+    # como desatualizados e refeitos de forma transparente no próximo login.
+    options = {}
+    if "bcrypt" in schemes:
+        options.update(bcrypt__default_rounds=bcrypt_rounds, bcrypt__min_rounds=bcrypt_rounds)
+    if "argon2" in schemes:
+        options.update(
+            argon2__time_cost=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost,
+            argon2__parallelism=argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+pwd_context = build_context()
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_pending_hashes = 0
+
+
+class HashingOverloaded(Exception):
+    pass
 
 class TokenPayload(BaseModel):
     sub: str
@@ -20,6 +46,24 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_hashing(func, *args):
+    """Executa o hash fora do event loop, rejeitando novas tarefas quando a fila do executor está cheia."""
+    global _pending_hashes
+    if _pending_hashes >= HASH_MAX_PENDING:
+        raise HashingOverloaded()
+    _pending_hashes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _pending_hashes -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Retorna (senha válida, novo hash) — o novo hash vem preenchido quando o atual usa parâmetros desatualizados."""
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
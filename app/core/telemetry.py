@@ -0,0 +1,92 @@
+# app/core/telemetry.py
+
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover - spans só são exportados quando o OpenTelemetry está instalado
+    trace = None
+
+_tracer = trace.get_tracer("contratoia") if trace else None
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "contract_stage_seconds", "Duração de cada etapa do upload e do processamento de contratos", ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+UPLOAD_BYTES = Histogram(
+    "contract_upload_bytes", "Tamanho dos arquivos recebidos",
+    buckets=(10_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000, 100_000_000),
+)
+DOCUMENT_PAGES = Histogram(
+    "contract_document_pages", "Páginas por documento extraído",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "job_queue_wait_seconds", "Tempo entre o enfileiramento e a primeira reserva de um job",
+    buckets=_LATENCY_BUCKETS,
+)
+AI_CALL_SECONDS = Histogram(
+    "ai_provider_call_seconds", "Duração das chamadas aos provedores de IA", ["provider", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+AI_TOKENS = Counter(
+    "ai_provider_tokens_total", "Tokens estimados (caracteres/4) enviados e recebidos dos provedores de IA",
+    ["provider", "direction"],
+)
+DB_SESSION_SECONDS = Histogram(
+    "db_session_seconds", "Tempo de vida das sessões de banco abertas por requisição",
+    buckets=_LATENCY_BUCKETS,
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_seconds", "Duração dos comandos Redis", ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "Duração das requisições HTTP", ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def trace_span(name: str, detached: bool = False, **attributes):
+    """Abre um span do OpenTelemetry, quando disponível; caso contrário, não faz nada.
+
+    `detached` não torna o span o contexto atual: necessário quando ele atravessa um `yield` de dependência do
+    FastAPI, cuja abertura e fechamento rodam em contextos diferentes.
+    """
+    if _tracer is None:
+        yield None
+        return
+    if detached:
+        current = _tracer.start_span(name, attributes=attributes)
+        try:
+            yield current
+        finally:
+            current.end()
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+@contextmanager
+def span(name: str, histogram=None, detached: bool = False, **attributes):
+    """Abre um span e registra a duração no histograma informado (por padrão, STAGE_SECONDS com o nome do span)."""
+    histogram = histogram if histogram is not None else STAGE_SECONDS.labels(stage=name)
+    started = time.perf_counter()
+    with trace_span(name, detached=detached, **attributes) as current:
+        try:
+            yield current
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+def set_attribute(current, key: str, value):
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
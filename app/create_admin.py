@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from core.database import SessionLocal
 from models.models import User, UserRole
 from core.security import get_password_hash
+from services import user_cache
 import sys
 
 def create_admin_user(db: Session, email: str, password: str):
@@ -10,6 +11,7 @@ def create_admin_user(db: Session, email: str, password: str):
     if user:
         print(f"Usuário com email {email} já existe. Alterando para ADMIN.")
         user.role = UserRole.ADMIN
+        promoted = True
     else:
         print(f"Criando novo usuário ADMIN com email {email}.")
         hashed_password = get_password_hash(password)
@@ -21,8 +23,12 @@ def create_admin_user(db: Session, email: str, password: str):
             last_name="System"
         )
         db.add(user)
+        promoted = False
     
     db.commit()
+    if promoted:
+        # Sem isso a API continuaria vendo o papel antigo até o snapshot expirar (AUTH_CACHE_TTL).
+        asyncio.run(user_cache.invalidate(email))
     print("Operação concluída com sucesso!")
 
 if __name__ == "__main__":
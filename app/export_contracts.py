@@ -0,0 +1,56 @@
+import argparse
+import sys
+from datetime import datetime
+
+from core.config import EXPORT_BATCH_SIZE
+from core.database import SessionLocal
+from models.models import ContractStatus
+from services import contract_export
+
+def export_contracts(db, output, export_format: str, gzip: bool, status=None, user_id=None, created_from=None, created_to=None):
+    """Exporta os contratos ativos em lotes via cursor do servidor, sem carregar o resultado inteiro em memória."""
+    encoder = contract_export.encoder_for(export_format, gzip)
+    query = contract_export.build_query(status, user_id, created_from, created_to)
+    db.execute(contract_export.DISABLE_STATEMENT_TIMEOUT)
+    result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+    total = 0
+    output.write(encoder.header())
+    for rows in result.partitions():
+        output.write(encoder.encode(rows))
+        total += len(rows)
+        print(f"{total} contrato(s) exportado(s)...", file=sys.stderr)
+    output.write(encoder.close())
+    print("Operação concluída com sucesso!", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta contratos em NDJSON, CSV ou Parquet.")
+    parser.add_argument("--format", choices=contract_export.FORMATS, default="ndjson")
+    parser.add_argument("--no-gzip", action="store_true", help="não comprimir a saída")
+    parser.add_argument("--status", choices=[s.value for s in ContractStatus])
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--created-from", type=datetime.fromisoformat)
+    parser.add_argument("--created-to", type=datetime.fromisoformat)
+    parser.add_argument("--output", help="arquivo de destino (padrão: nome gerado no diretório atual; '-' para stdout)")
+    args = parser.parse_args()
+
+    gzip = not args.no_gzip
+    output_path = args.output or contract_export.filename_for(args.format, gzip)
+    output = sys.stdout.buffer if output_path == "-" else open(output_path, "wb")
+
+    db = SessionLocal()
+    try:
+        export_contracts(
+            db, output, args.format, gzip,
+            status=ContractStatus(args.status) if args.status else None,
+            user_id=args.user_id,
+            created_from=args.created_from,
+            created_to=args.created_to,
+        )
+    except contract_export.ExportUnavailable as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+        if output is not sys.stdout.buffer:
+            output.close()
@@ -1,13 +1,34 @@
 # app/main.py
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import text
+from starlette.datastructures import Headers
 
-from core.database import Base, engine
+from core.config import MAX_UPLOAD_SIZE_MB, MAX_BATCH_UPLOAD_SIZE_MB
+from core import security, telemetry
+from core.database import Base, engine, async_engine
 from models import models
 from routers import auth, contracts, pages, users, admin
+from services import audit_partitions, contract_cache, schema_upgrade
+from services.audit_service import audit_buffer
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
+# Os índices de trigrama da busca de usuários dependem da extensão pg_trgm.
+with engine.begin() as connection:
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
 models.Base.metadata.create_all(bind=engine)
+# create_all não altera tabelas existentes: colunas e índices novos de versões anteriores vêm daqui.
+with engine.begin() as connection:
+    schema_upgrade.upgrade(connection)
+with engine.begin() as connection:
+    audit_partitions.ensure_partitions(connection)
 
 app = FastAPI(
     title="Contract Analysis API",
@@ -19,9 +40,94 @@ app = FastAPI(
 templates = Jinja2Templates(directory="templates")
 
 
+UPLOAD_LIMITS_MB = {
+    "/api/contracts/upload": MAX_UPLOAD_SIZE_MB,
+    "/api/contracts/upload/batch": MAX_BATCH_UPLOAD_SIZE_MB,
+}
+
+@app.exception_handler(security.HashingOverloaded)
+async def hashing_overloaded_handler(request: Request, exc: security.HashingOverloaded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Serviço temporariamente sobrecarregado. Tente novamente em instantes."},
+        headers={"Retry-After": "2"}
+    )
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Rótulo pelo template da rota (/api/contracts/{contract_id}), não pela URL, para manter a cardinalidade baixa.
+    route = request.scope.get("route")
+    telemetry.HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=route.path if route else "unmatched",
+        status=response.status_code
+    ).observe(time.perf_counter() - started)
+    return response
+
+
+class UploadSizeLimit:
+    """Limita o corpo dos uploads. Rejeita de imediato pelo Content-Length e, como requisições chunked
+    não o informam, conta também os bytes recebidos durante o parsing do multipart."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit_mb = UPLOAD_LIMITS_MB.get(scope["path"].rstrip("/")) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if not limit_mb:
+            return await self.app(scope, receive, send)
+
+        limit = (limit_mb + 1) * 1024 * 1024
+        detail = f"Upload excede o tamanho máximo de {limit_mb} MB."
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": detail})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Lançada dentro do request.form() da rota; o handler de HTTPException responde 413.
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+            return message
+
+        await self.app(scope, counting_receive, send)
+
+app.add_middleware(UploadSizeLimit)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    content, content_type = telemetry.render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 app.include_router(auth.router, prefix="/api")
 app.include_router(contracts.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(admin.router, prefix="/api")
 
-app.include_router(pages.router)
\ No newline at end of file
+app.include_router(pages.router)
+
+
+@app.on_event("startup")
+async def start_audit_buffer():
+    await audit_buffer.start()
+
+@app.on_event("startup")
+async def start_contract_cache_listener():
+    app.state.contract_cache_listener = asyncio.create_task(contract_cache.listen_for_invalidations())
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    app.state.contract_cache_listener.cancel()
+    await audit_buffer.stop()
+    await async_engine.dispose()
@@ -1,11 +1,11 @@
 # app/models/models.py
 import uuid
 import enum
-from sqlalchemy import (Column, Integer, String, DateTime, ForeignKey, 
-                        JSON, Enum as SQLAlchemyEnum, Boolean)
+from sqlalchemy import (Column, Integer, BigInteger, String, Date, DateTime, ForeignKey, PrimaryKeyConstraint,
+                        JSON, Enum as SQLAlchemyEnum, Boolean, Index, Numeric, text)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB, TSVECTOR
 from core.database import Base
 
 class UserRole(str, enum.Enum):
@@ -18,17 +18,38 @@ class User(Base):
     uuid = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, nullable=False, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
-    first_name = Column(String, index=True, nullable=True)
-    last_name = Column(String, index=True, nullable=True)
+    first_name = Column(String, nullable=True)
+    last_name = Column(String, nullable=True)
     role = Column(SQLAlchemyEnum(UserRole), default=UserRole.USER, nullable=False)
 
     contracts = relationship("Contract", foreign_keys="[Contract.user_id]", back_populates="owner")
 
+    # Busca do diretório de usuários (admin): prefixo via lower() + text_pattern_ops, trecho/similaridade via pg_trgm.
+    __table_args__ = (
+        Index("ix_users_lower_email_prefix", text("lower(email) text_pattern_ops")),
+        Index("ix_users_lower_first_name_prefix", text("lower(first_name) text_pattern_ops")),
+        Index("ix_users_lower_last_name_prefix", text("lower(last_name) text_pattern_ops")),
+        Index("ix_users_lower_email_trgm", text("lower(email) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_users_lower_first_name_trgm", text("lower(first_name) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_users_lower_last_name_trgm", text("lower(last_name) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_users_role_id", "role", "id"),
+    )
+
 class ContractStatus(str, enum.Enum):
     PENDING = "PENDING"
     SUCCESS = "SUCCESS"
     ERROR = "ERROR"
 
+class ContractBatch(Base):
+    __tablename__ = "contract_batches"
+    id = Column(Integer, primary_key=True, index=True)
+    uuid = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
+    total_files = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    contracts = relationship("Contract", back_populates="batch")
+
 class Contract(Base):
     __tablename__ = "contracts"
     id = Column(Integer, primary_key=True, index=True)
@@ -36,15 +57,86 @@ class Contract(Base):
     status = Column(SQLAlchemyEnum(ContractStatus), default=ContractStatus.PENDING)
     extracted_data = Column(JSON, nullable=True)
     analysis_summary = Column(String, nullable=True)
+    partial_data = Column(JSON, nullable=True) # campos já recebidos da IA enquanto a análise está em andamento
+    ai_provider = Column(String, nullable=True)
+    file_path = Column(String, nullable=True)
+    file_hash = Column(String(64), index=True, nullable=True)
+    text_hash = Column(String(64), index=True, nullable=True)
+    batch_id = Column(Integer, ForeignKey("contract_batches.id"), index=True, nullable=True)
+    search_vector = Column(TSVECTOR, nullable=True)
+    party_documents = Column(ARRAY(String), nullable=True) # CNPJ/CPF das partes, somente dígitos
+    max_monetary_value = Column(Numeric(18, 2), nullable=True)
+    text_tokens_raw = Column(Integer, nullable=True) # estimativa local, antes da compactação do texto
+    text_tokens_compacted = Column(Integer, nullable=True) # estimativa do texto efetivamente enviado à IA
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
-    deleted_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    deleted_by_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
 
     owner = relationship("User", foreign_keys=[user_id], back_populates="contracts")
     deleter = relationship("User", foreign_keys=[deleted_by_id])
+    batch = relationship("ContractBatch", back_populates="contracts")
+    parties = relationship("ContractParty", back_populates="contract", cascade="all, delete-orphan")
+    values = relationship("ContractValue", back_populates="contract", cascade="all, delete-orphan")
+    terms = relationship("ContractTerms", back_populates="contract", uselist=False, cascade="all, delete-orphan")
+
+    # Índices parciais (apenas contratos ativos) que atendem à listagem paginada por (created_at, id).
+    __table_args__ = (
+        Index("ix_contracts_active_created", "created_at", "id", postgresql_where=text("NOT is_deleted")),
+        Index("ix_contracts_active_status_created", "status", "created_at", "id", postgresql_where=text("NOT is_deleted")),
+        Index("ix_contracts_active_user_created", "user_id", "created_at", "id", postgresql_where=text("NOT is_deleted")),
+        Index("ix_contracts_active_user_status_created", "user_id", "status", "created_at", "id", postgresql_where=text("NOT is_deleted")),
+        # Busca: texto completo, documentos das partes e maior valor monetário extraído.
+        Index("ix_contracts_active_search_vector", "search_vector", postgresql_using="gin", postgresql_where=text("NOT is_deleted")),
+        Index("ix_contracts_active_party_documents", "party_documents", postgresql_using="gin", postgresql_where=text("NOT is_deleted")),
+        Index("ix_contracts_active_max_value", "max_monetary_value", postgresql_where=text("NOT is_deleted")),
+    )
+
+# Resultado normalizado da extração (services/contract_normalizer.py), usado pelos relatórios de carteira.
+class Recurrence(str, enum.Enum):
+    ONE_TIME = "ONE_TIME"
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+    QUARTERLY = "QUARTERLY"
+    SEMIANNUAL = "SEMIANNUAL"
+    YEARLY = "YEARLY"
+
+class ContractParty(Base):
+    __tablename__ = "contract_parties"
+    id = Column(Integer, primary_key=True, index=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    role = Column(String, nullable=True)
+    document = Column(String(14), nullable=True, index=True) # CNPJ/CPF, somente dígitos
+    document_type = Column(String(4), nullable=True)
+
+    contract = relationship("Contract", back_populates="parties")
+
+class ContractValue(Base):
+    __tablename__ = "contract_values"
+    id = Column(Integer, primary_key=True, index=True)
+    contract_id = Column(Integer, ForeignKey("contracts.id", ondelete="CASCADE"), nullable=False, index=True)
+    amount = Column(Numeric(18, 2), nullable=False)
+    currency = Column(String(3), nullable=False, default="BRL")
+    recurrence = Column(SQLAlchemyEnum(Recurrence), nullable=True)
+    description = Column(String, nullable=True)
+
+    contract = relationship("Contract", back_populates="values")
+
+class ContractTerms(Base):
+    __tablename__ = "contract_terms"
+    contract_id = Column(Integer, ForeignKey("contracts.id", ondelete="CASCADE"), primary_key=True)
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True, index=True)
+    is_indefinite = Column(Boolean, nullable=False, default=False)
+    auto_renewal = Column(Boolean, nullable=True)
+    adjustment_index = Column(String(10), nullable=True, index=True)
+    adjustment_recurrence = Column(SQLAlchemyEnum(Recurrence), nullable=True)
+
+    contract = relationship("Contract", back_populates="terms")
 
 class AuditLogAction(str, enum.Enum):
     USER_CREATED = "USER_CREATED"
@@ -53,13 +145,24 @@ class AuditLogAction(str, enum.Enum):
     USER_ROLE_CHANGED = "USER_ROLE_CHANGED"
     USER_PASSWORD_CHANGED = "USER_PASSWORD_CHANGED"
     CONTRACT_DELETED = "CONTRACT_DELETED"
+    CONTRACT_UPLOADED = "CONTRACT_UPLOADED"
 
+# Particionada por mês em `timestamp` (services/audit_partitions.py cria as partições e aplica a retenção).
+# A chave primária precisa conter a chave de partição; na ordem (timestamp, id) ela também atende a paginação.
 class AuditLog(Base):
     __tablename__ = "audit_logs"
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    id = Column(BigInteger, autoincrement=True, nullable=False)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Quem fez a ação
     action = Column(SQLAlchemyEnum(AuditLogAction), nullable=False)
-    details = Column(JSON, nullable=True)
+    details = Column(JSONB, nullable=True)
+
+    actor = relationship("User")
 
-    actor = relationship("User")
\ No newline at end of file
+    __table_args__ = (
+        PrimaryKeyConstraint("timestamp", "id", name="audit_logs_pkey"),
+        Index("ix_audit_logs_user_timestamp", "user_id", "timestamp", "id"),
+        Index("ix_audit_logs_action_timestamp", "action", "timestamp", "id"),
+        Index("ix_audit_logs_details", "details", postgresql_using="gin", postgresql_ops={"details": "jsonb_path_ops"}),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
\ No newline at end of file
@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import select
+
+from core.config import OFFBOARD_BATCH_SIZE
+from core.database import AsyncSessionLocal
+from models.models import User, UserRole
+from services import user_offboarding
+
+async def offboard_users(admin_email: str, user_uuids=None, email_domain=None, role=None, reassign_to=None,
+                         batch_size: int = OFFBOARD_BATCH_SIZE):
+    """Desliga usuários em lotes até esgotar a seleção; pode ser interrompido e executado de novo com os mesmos argumentos."""
+    async with AsyncSessionLocal() as db:
+        admin = (await db.execute(select(User).where(User.email == admin_email))).scalars().first()
+        if not admin or admin.role != UserRole.ADMIN:
+            print(f"Administrador {admin_email} não encontrado.")
+            sys.exit(1)
+        target = None
+        if reassign_to:
+            target = (await db.execute(select(User).where(User.uuid == reassign_to))).scalars().first()
+            if not target:
+                print(f"Usuário de destino {reassign_to} não encontrado.")
+                sys.exit(1)
+
+        selection = user_offboarding.selection_query(
+            admin.id, user_uuids, email_domain, role, exclude_id=target.id if target else None
+        )
+        users, contracts = 0, 0
+        while True:
+            result, done = await user_offboarding.offboard(db, admin, selection, target, max_batches=1, batch_size=batch_size)
+            users += result.users_deleted
+            contracts += result.contracts_moved
+            if done:
+                break
+            print(f"{users} usuário(s) removido(s), {contracts} contrato(s) {'reatribuído(s)' if target else 'liberado(s)'}...")
+    print("Operação concluída com sucesso!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove usuários em lote, reatribuindo ou liberando seus contratos.")
+    parser.add_argument("admin_email", help="administrador registrado como autor na auditoria")
+    parser.add_argument("--uuid", dest="user_uuids", type=uuid.UUID, action="append", help="usuário a remover (repetível)")
+    parser.add_argument("--email-domain", help="remove todos os usuários deste domínio de email")
+    parser.add_argument("--role", choices=[r.value for r in UserRole])
+    parser.add_argument("--reassign-to", type=uuid.UUID, help="UUID do novo dono dos contratos (padrão: ficam sem dono)")
+    parser.add_argument("--batch-size", type=int, default=OFFBOARD_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if not args.user_uuids and not args.email_domain:
+        parser.error("informe --uuid ou --email-domain")
+    asyncio.run(offboard_users(
+        args.admin_email,
+        user_uuids=args.user_uuids,
+        email_domain=args.email_domain,
+        role=UserRole(args.role) if args.role else None,
+        reassign_to=args.reassign_to,
+        batch_size=args.batch_size,
+    ))
@@ -0,0 +1,35 @@
+import sys
+from core.database import SessionLocal
+from models.models import Contract
+from services.contract_search import index_contract
+
+def reindex_contracts(db, batch_size: int = 500):
+    """Recalcula as colunas de busca dos contratos ativos (o texto original não é mantido, apenas os dados extraídos)."""
+    last_id, total = 0, 0
+    while True:
+        contracts = (
+            db.query(Contract)
+            .filter(Contract.id > last_id, Contract.is_deleted == False)
+            .order_by(Contract.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not contracts:
+            break
+        for contract in contracts:
+            index_contract(contract)
+        db.commit()
+        db.expunge_all()
+        last_id = contracts[-1].id
+        total += len(contracts)
+        print(f"{total} contrato(s) reindexado(s)...")
+    print("Operação concluída com sucesso!")
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    db = SessionLocal()
+    try:
+        reindex_contracts(db, batch_size)
+    finally:
+        db.close()
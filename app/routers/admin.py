@@ -1,18 +1,24 @@
+import json
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from sqlalchemy import and_, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from core.database import get_db
 from models import models
 from schemas import schemas
 from routers.auth import get_current_user, get_user
 from core import security
+from core.config import AUDIT_QUERY_DEFAULT_DAYS, OFFBOARD_MAX_BATCHES
+from core.pagination import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from services.audit_service import log_action, AuditLogAction
+from services import result_cache, ai_providers, user_cache, user_offboarding
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-def get_admin_user(current_user: models.User = Depends(get_current_user)):
+def get_admin_user(current_user: schemas.CurrentUser = Depends(get_current_user)):
     if current_user.role != models.UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -22,17 +28,68 @@ def get_admin_user(current_user: models.User = Depends(get_current_user)):
 
 router.dependencies.append(Depends(get_admin_user))
 
-@router.get("/users", response_model=List[schemas.User])
-def list_all_users(db: Session = Depends(get_db)):
-    return db.query(models.User).order_by(models.User.id).all()
+async def _get_user_by_uuid(db: AsyncSession, user_uuid: uuid.UUID):
+    result = await db.execute(select(models.User).where(models.User.uuid == user_uuid))
+    return result.scalars().first()
+
+# Abaixo de 3 caracteres o pg_trgm não gera trigramas úteis: a busca fica restrita ao prefixo.
+TRIGRAM_MIN_LENGTH = 3
+
+def _user_search_filter(q: str):
+    term = q.strip().lower()
+    columns = [func.lower(models.User.email), func.lower(models.User.first_name), func.lower(models.User.last_name)]
+    if len(term) < TRIGRAM_MIN_LENGTH:
+        return or_(*(column.startswith(term, autoescape=True) for column in columns))
+    # Trecho em qualquer campo ou nome parecido (similaridade de trigramas, tolera erros de digitação).
+    return or_(
+        *(column.contains(term, autoescape=True) for column in columns),
+        columns[1].op("%")(term),
+        columns[2].op("%")(term),
+    )
+
+@router.get("/users", response_model=schemas.AdminUserPage)
+async def list_all_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    q: Optional[str] = Query(None, max_length=100),
+    role: Optional[models.UserRole] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    page = select(models.User)
+    if q and q.strip():
+        page = page.where(_user_search_filter(q))
+    if role:
+        page = page.where(models.User.role == role)
+    if cursor:
+        (user_id,) = decode_cursor(cursor, int)
+        page = page.where(models.User.id > user_id)
+    page = page.order_by(models.User.id).limit(limit + 1).subquery()
+
+    # Contagem de contratos ativos só para a página já recortada, num único join agrupado.
+    result = await db.execute(
+        select(
+            page.c.id, page.c.uuid, page.c.email, page.c.first_name, page.c.last_name, page.c.role,
+            func.count(models.Contract.id).label("contract_count"),
+        )
+        .outerjoin(models.Contract, and_(models.Contract.user_id == page.c.id, models.Contract.is_deleted == False))
+        .group_by(page.c.id, page.c.uuid, page.c.email, page.c.first_name, page.c.last_name, page.c.role)
+        .order_by(page.c.id)
+    )
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
 
 @router.post("/users", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user_by_admin(user: schemas.UserCreate, db: Session = Depends(get_db), admin_user: models.User = Depends(get_admin_user)):
-    db_user = get_user(db, email=user.email)
+async def create_user_by_admin(user: schemas.UserCreate, db: AsyncSession = Depends(get_db), admin_user: schemas.CurrentUser = Depends(get_admin_user)):
+    db_user = await get_user(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email já registrado")
 
-    hashed_password = security.get_password_hash(user.password)
+    hashed_password = await security.get_password_hash_async(user.password)
     new_user = models.User(
         email=user.email,
         hashed_password=hashed_password,
@@ -41,43 +98,127 @@ def create_user_by_admin(user: schemas.UserCreate, db: Session = Depends(get_db)
         role=models.UserRole.USER
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
     log_action(db, action=AuditLogAction.USER_CREATED, actor=admin_user, details={"created_user_email": new_user.email})
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
+@router.post("/users/offboard", response_model=schemas.UserOffboardResult)
+async def offboard_users(request: schemas.UserOffboardRequest, db: AsyncSession = Depends(get_db), admin_user: schemas.CurrentUser = Depends(get_admin_user)):
+    """Remove usuários em lotes, reatribuindo ou liberando seus contratos.
+
+    Processa até OFFBOARD_MAX_BATCHES lotes por chamada; enquanto `done` for falso, repita a mesma requisição.
+    """
+    if not request.user_uuids and not request.email_domain:
+        raise HTTPException(status_code=400, detail="Informe user_uuids ou email_domain.")
+    if request.user_uuids and admin_user.uuid in request.user_uuids:
+        raise HTTPException(status_code=400, detail="Administrador não pode excluir a si mesmo.")
+
+    target = None
+    if request.reassign_to:
+        if request.user_uuids and request.reassign_to in request.user_uuids:
+            raise HTTPException(status_code=400, detail="O novo dono não pode estar entre os usuários removidos.")
+        target = await _get_user_by_uuid(db, request.reassign_to)
+        if not target:
+            raise HTTPException(status_code=404, detail="Usuário de destino não encontrado")
+
+    selection = user_offboarding.selection_query(
+        admin_user.id, request.user_uuids, request.email_domain, request.role, exclude_id=target.id if target else None
+    )
+    result, done = await user_offboarding.offboard(db, admin_user, selection, target, max_batches=OFFBOARD_MAX_BATCHES)
+    return {"users_deleted": result.users_deleted, "contracts_moved": result.contracts_moved, "done": done}
+
 @router.get("/users/{user_uuid}", response_model=schemas.User)
-def get_user_details(user_uuid: uuid.UUID, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.uuid == user_uuid).first()
+async def get_user_details(user_uuid: uuid.UUID, db: AsyncSession = Depends(get_db)):
+    user = await _get_user_by_uuid(db, user_uuid)
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return user
 
 @router.put("/users/{user_uuid}/role", response_model=schemas.User)
-def change_user_role(user_uuid: uuid.UUID, role: models.UserRole, db: Session = Depends(get_db), admin_user: models.User = Depends(get_admin_user)):
-    user = db.query(models.User).filter(models.User.uuid == user_uuid).first()
+async def change_user_role(user_uuid: uuid.UUID, role: models.UserRole, db: AsyncSession = Depends(get_db), admin_user: schemas.CurrentUser = Depends(get_admin_user)):
+    user = await _get_user_by_uuid(db, user_uuid)
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
     user.role = role
-    db.commit()
-    db.refresh(user)
     log_action(db, action=AuditLogAction.USER_ROLE_CHANGED, actor=admin_user, details={"target_user": user.email, "new_role": role})
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.email)
     return user
 
 @router.delete("/users/{user_uuid}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_uuid: uuid.UUID, db: Session = Depends(get_db), admin_user: models.User = Depends(get_admin_user)):
-    user = db.query(models.User).filter(models.User.uuid == user_uuid).first()
+async def delete_user(user_uuid: uuid.UUID, db: AsyncSession = Depends(get_db), admin_user: schemas.CurrentUser = Depends(get_admin_user)):
+    user = await _get_user_by_uuid(db, user_uuid)
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     if user.id == admin_user.id:
         raise HTTPException(status_code=400, detail="Administrador não pode excluir a si mesmo.")
 
-    log_action(db, action=AuditLogAction.USER_DELETED, actor=admin_user, details={"deleted_user_email": user.email})
+    await user_offboarding.offboard_batch(db, admin_user, [user])
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+def _parse_detail_filters(filters: List[str]) -> dict:
+    """Converte filtros `chave=valor` em um documento de contenção JSONB; o valor é lido como JSON quando possível."""
+    criteria = {}
+    for item in filters:
+        key, separator, raw = item.partition("=")
+        if not separator or not key:
+            raise HTTPException(status_code=400, detail=f"Filtro de detalhe inválido: {item!r} (use chave=valor).")
+        try:
+            criteria[key] = json.loads(raw)
+        except ValueError:
+            criteria[key] = raw
+    return criteria
+
+@router.get("/audit-logs", response_model=schemas.AuditLogPage)
+async def list_audit_logs(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    action: Optional[AuditLogAction] = None,
+    detail: List[str] = Query([], description="filtro por chave de `details`, no formato chave=valor (repetível)"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """Consulta a auditoria do mais recente para o mais antigo, sempre dentro de um intervalo de tempo.
+
+    O intervalo (padrão: últimos AUDIT_QUERY_DEFAULT_DAYS dias) restringe a busca às partições mensais envolvidas.
+    """
+    # Datas sem fuso são interpretadas como UTC, o mesmo fuso das bordas das partições.
+    end = end.replace(tzinfo=end.tzinfo or timezone.utc) if end else datetime.now(timezone.utc)
+    start = start.replace(tzinfo=start.tzinfo or timezone.utc) if start else end - timedelta(days=AUDIT_QUERY_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="O início do intervalo deve ser anterior ao fim.")
+
+    query = select(models.AuditLog).where(models.AuditLog.timestamp >= start, models.AuditLog.timestamp < end)
+    if user_id is not None:
+        query = query.where(models.AuditLog.user_id == user_id)
+    if action:
+        query = query.where(models.AuditLog.action == action)
+    if detail:
+        query = query.where(models.AuditLog.details.contains(_parse_detail_filters(detail)))
+    if cursor:
+        timestamp, log_id = decode_cursor(cursor, datetime, int)
+        query = query.where(tuple_(models.AuditLog.timestamp, models.AuditLog.id) < tuple_(timestamp, log_id))
+
+    result = await db.execute(
+        query.order_by(models.AuditLog.timestamp.desc(), models.AuditLog.id.desc()).limit(limit + 1)
+    )
+    rows = result.scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
 
-    db.query(models.Contract).filter(models.Contract.user_id == user.id).update({"user_id": None})
-    db.query(models.Contract).filter(models.Contract.deleted_by_id == user.id).update({"deleted_by_id": None})
+@router.get("/ai-cache/stats")
+async def get_ai_cache_stats():
+    return await result_cache.hit_rates()
 
-    db.delete(user)
-    db.commit()
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+@router.get("/ai-providers/stats")
+async def get_ai_provider_stats():
+    return await ai_providers.collect_stats()
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Response
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Body, Response
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import EmailStr
 from typing import Optional
 
@@ -11,44 +13,55 @@ from models import models
 from schemas import schemas
 from models.models import UserRole
 from services.audit_service import log_action, AuditLogAction
+from services import user_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
-def get_user(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+async def get_user(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
 
-def get_current_user_from_token(token: str, db: Session):
-    try:
-        payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
+async def get_current_user_from_token(token: str, db: AsyncSession) -> Optional[schemas.CurrentUser]:
+    email = user_cache.decode_token_subject(token)
+    if email is None:
         return None
 
-    user = get_user(db, email=email)
+    user = await user_cache.get(email)
+    if user is None:
+        db_user = await get_user(db, email=email)
+        if db_user is None:
+            return None
+        user = await user_cache.store(db_user)
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def resolve_principal(request: Request, token: str, db: AsyncSession) -> Optional[schemas.CurrentUser]:
+    """Resolve o usuário do token uma única vez por requisição, mesmo que várias dependências o peçam."""
+    if not hasattr(request.state, "current_user"):
+        request.state.current_user = await get_current_user_from_token(token, db)
+    return request.state.current_user
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> schemas.CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas, por favor, faça o login novamente.",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    user = get_current_user_from_token(token, db)
+    user = await resolve_principal(request, token, db)
     if user is None:
         raise credentials_exception
     return user
 
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await get_user(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email já registrado")
 
-    hashed_password = security.get_password_hash(user.password)
+    hashed_password = await security.get_password_hash_async(user.password)
     db_user = models.User(
         email=user.email,
         hashed_password=hashed_password,
@@ -57,26 +70,32 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         role=UserRole.USER
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-
+    await db.flush()
     log_action(db, action=AuditLogAction.USER_CREATED, actor=db_user, details={"email": db_user.email})
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = get_user(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await get_user(db, email=form_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await security.verify_password_async(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     access_token = security.create_access_token(data={"sub": user.email})
 
     response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True, samesite="lax")
@@ -84,32 +103,32 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/forgot-password")
-def forgot_password(email: EmailStr = Body(..., embed=True), db: Session = Depends(get_db)):
-    user = get_user(db, email)
+async def forgot_password(email: EmailStr = Body(..., embed=True), db: AsyncSession = Depends(get_db)):
+    user = await get_user(db, email)
     if not user:
         return {"message": "Se um usuário com esse email existir, um link de recuperação será enviado."}
 
     reset_token = security.create_reset_token(email=email)
     reset_link = f"http://localhost:8000/reset-password-page?token={reset_token}"
 
-    print("--- LINK DE RESET DE SENHA (PARA FINS DE DEMONSTRAÇÃO) ---")
-    print(reset_link)
-    print("---------------------------------------------------------")
+    # Sem envio de email configurado: o link fica disponível no log da aplicação (fins de demonstração).
+    logger.info("Link de reset de senha gerado: %s", reset_link)
 
     return {"message": "Se um usuário com esse email existir, um link de recuperação será enviado."}
 
 @router.post("/reset-password")
-def reset_password(token: str, new_password: str = Body(..., embed=True), db: Session = Depends(get_db)):
+async def reset_password(token: str, new_password: str = Body(..., embed=True), db: AsyncSession = Depends(get_db)):
     email = security.verify_reset_token(token)
     if not email:
         raise HTTPException(status_code=400, detail="Token inválido ou expirado")
 
-    user = get_user(db, email)
+    user = await get_user(db, email)
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
-    user.hashed_password = security.get_password_hash(new_password)
+    user.hashed_password = await security.get_password_hash_async(new_password)
     db.add(user)
-    db.commit()
     log_action(db, action=AuditLogAction.USER_PASSWORD_CHANGED, actor=user)
+    await db.commit()
+    await user_cache.invalidate(user.email)
     return {"message": "Senha alterada com sucesso"}
\ No newline at end of file
@@ -1,19 +1,23 @@
-import asyncio
 import json
-from typing import List, AsyncGenerator
-from datetime import datetime
+import re
+import uuid
+from typing import List, AsyncGenerator, Literal, Optional
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, Form, status, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, Form, Query, Request, status, Response
+from sqlalchemy import select, insert, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
 
-from core.database import get_db
-from core.cache import cache
+from core import telemetry
+from core.config import EXPORT_BATCH_SIZE, MAX_BATCH_FILES
+from core.database import get_db, AsyncSessionLocal
+from core.pagination import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from models import models
 from schemas import schemas
 from routers.auth import get_current_user
-from services import file_processor, ai_service, audit_service
+from services import audit_service, contract_cache, contract_export, contract_search, contract_stats, job_queue, upload_storage
 from models.models import UserRole, AuditLogAction
 
 router = APIRouter(
@@ -22,92 +26,378 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+async def _get_active_contract(db: AsyncSession, contract_id: int, for_update: bool = False):
+    query = select(models.Contract).where(
+        models.Contract.id == contract_id,
+        models.Contract.is_deleted == False
+    )
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
+    return result.scalars().first()
+
 @router.get("/stats")
-def get_contract_stats(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    query = db.query(models.Contract).filter(models.Contract.is_deleted == False)
-    if current_user.role != UserRole.ADMIN:
-        query = query.filter(models.Contract.user_id == current_user.id)
-    
-    success_count = query.filter(models.Contract.status == models.ContractStatus.SUCCESS).count()
-    error_count = query.filter(models.Contract.status == models.ContractStatus.ERROR).count()
-    pending_count = query.filter(models.Contract.status == models.ContractStatus.PENDING).count()
+async def get_contract_stats(db: AsyncSession = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    user_id = None if current_user.role == UserRole.ADMIN else current_user.id
+    counts = await contract_stats.get_counts(db, user_id)
 
-    return {"analyzed": success_count, "pending": pending_count, "error": error_count }
+    return {
+        "analyzed": counts[models.ContractStatus.SUCCESS.value],
+        "pending": counts[models.ContractStatus.PENDING.value],
+        "error": counts[models.ContractStatus.ERROR.value]
+    }
 
 @router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_contract(
     file: UploadFile,
     ai_provider: str = Form(...),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    file_content = await file.read()
     filename = file.filename
+    with telemetry.span("upload.save") as current:
+        file_path, file_hash, size = await upload_storage.save_upload(file)
+        telemetry.UPLOAD_BYTES.observe(size)
+        telemetry.set_attribute(current, "upload.bytes", size)
+
+    with telemetry.span("upload.persist"):
+        new_contract = models.Contract(
+            filename=filename,
+            user_id=current_user.id,
+            status=models.ContractStatus.PENDING,
+            ai_provider=ai_provider,
+            file_path=file_path,
+            file_hash=file_hash
+        )
+        db.add(new_contract)
+        await db.commit()
+        await db.refresh(new_contract)
+    await contract_stats.record_created(current_user.id)
+    await audit_service.audit_buffer.log(
+        AuditLogAction.CONTRACT_UPLOADED,
+        actor_id=current_user.id,
+        details={"contract_id": new_contract.id, "filename": filename, "file_hash": file_hash}
+    )
+
+    with telemetry.span("upload.enqueue"):
+        await job_queue.enqueue(new_contract.id, {"provider": ai_provider})
+
+    return StreamingResponse(_progress_stream(new_contract.id), media_type="text/event-stream")
+
+async def _progress_stream(contract_id: int) -> AsyncGenerator[str, None]:
+    async for event in job_queue.subscribe(contract_id):
+        # Campos da análise chegam como evento nomeado, para não se misturar às mensagens de progresso.
+        if event["type"] == "field":
+            yield f"event: field\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+        else:
+            yield f"data: {event['message']}\n\n"
+
+@router.post("/upload/batch", status_code=status.HTTP_202_ACCEPTED)
+async def upload_contract_batch(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    # Campos "files" (vários) e "ai_provider". O formulário é lido aqui porque o parsing do FastAPI usa o
+    # limite padrão do Starlette (1000 arquivos), abaixo de MAX_BATCH_FILES.
+    async with request.form(max_files=MAX_BATCH_FILES) as form:
+        files = [item for item in form.getlist("files") if not isinstance(item, str)]
+        ai_provider = form.get("ai_provider")
+        if not files or not isinstance(ai_provider, str) or not ai_provider:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Informe os arquivos em 'files' e o provedor em 'ai_provider'."
+            )
+        with telemetry.span("upload.save_batch"):
+            saved = await upload_storage.save_batch(files)
+    for _, _, _, size in saved:
+        telemetry.UPLOAD_BYTES.observe(size)
+
+    try:
+        batch = models.ContractBatch(user_id=current_user.id, total_files=len(saved))
+        db.add(batch)
+        await db.flush()
+
+        result = await db.execute(
+            insert(models.Contract).returning(models.Contract.id, sort_by_parameter_order=True),
+            [
+                {
+                    "filename": name,
+                    "user_id": current_user.id,
+                    "status": models.ContractStatus.PENDING,
+                    "ai_provider": ai_provider,
+                    "file_path": path,
+                    "file_hash": file_hash,
+                    "batch_id": batch.id,
+                }
+                for name, path, file_hash, _ in saved
+            ]
+        )
+        contract_ids = result.scalars().all()
+        await db.commit()
+    except BaseException:
+        upload_storage.discard([path for _, path, _, _ in saved])
+        raise
+    await contract_stats.record_created(current_user.id, len(contract_ids))
+    await audit_service.audit_buffer.log(
+        AuditLogAction.CONTRACT_UPLOADED,
+        actor_id=current_user.id,
+        details={"batch_id": batch.id, "contract_ids": contract_ids}
+    )
+
+    await job_queue.enqueue_many([(contract_id, {"provider": ai_provider}) for contract_id in contract_ids])
+
+    return {"batch_uuid": batch.uuid, "total_files": len(contract_ids), "contract_ids": contract_ids}
+
+async def _get_batch(db: AsyncSession, batch_uuid: uuid.UUID, current_user: schemas.CurrentUser) -> models.ContractBatch:
+    result = await db.execute(select(models.ContractBatch).where(models.ContractBatch.uuid == batch_uuid))
+    batch = result.scalars().first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    if batch.user_id != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Você não tem permissão para ver este lote")
+    return batch
+
+async def _batch_status_counts(db: AsyncSession, batch_id: int) -> dict:
+    result = await db.execute(
+        select(models.Contract.status, func.count())
+        .where(models.Contract.batch_id == batch_id, models.Contract.is_deleted == False)
+        .group_by(models.Contract.status)
+    )
+    counts = {contract_status.value: 0 for contract_status in models.ContractStatus}
+    counts.update({contract_status.value: count for contract_status, count in result.all()})
+    return counts
+
+@router.get("/batches/{batch_uuid}", response_model=schemas.BatchStatus)
+async def get_batch_status(
+    batch_uuid: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    batch = await _get_batch(db, batch_uuid, current_user)
+    result = await db.execute(
+        select(models.Contract)
+        .where(models.Contract.batch_id == batch.id, models.Contract.is_deleted == False)
+        .order_by(models.Contract.id)
+    )
+    return {
+        "uuid": batch.uuid,
+        "total_files": batch.total_files,
+        "created_at": batch.created_at,
+        "counts": await _batch_status_counts(db, batch.id),
+        "contracts": result.scalars().all(),
+    }
+
+@router.get("/batches/{batch_uuid}/events")
+async def batch_progress_events(
+    batch_uuid: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    batch = await _get_batch(db, batch_uuid, current_user)
+
+    async def count_pending() -> int:
+        counts = await _batch_status_counts(db, batch.id)
+        return counts[models.ContractStatus.PENDING.value]
+
+    async def event_stream() -> AsyncGenerator[str, None]:
+        async for event in job_queue.subscribe_batch(batch.id, count_pending):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@router.get("/{contract_id}/events")
+async def contract_progress_events(
+    contract_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    contract = await _get_active_contract(db, contract_id)
+    if not contract:
+        raise HTTPException(status_code=404, detail="Contrato não encontrado")
+    if contract.user_id != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Você não tem permissão para ver este contrato")
+
+    if contract.status == models.ContractStatus.SUCCESS:
+        return StreamingResponse(iter([f"data: Finalizado! Contrato '{contract.filename}' analisado com sucesso.\n\n"]), media_type="text/event-stream")
+    if contract.status == models.ContractStatus.ERROR:
+        return StreamingResponse(iter([f"data: ERRO: {contract.analysis_summary}\n\n"]), media_type="text/event-stream")
 
-    new_contract = models.Contract(filename=filename, user_id=current_user.id, status=models.ContractStatus.PENDING)
-    db.add(new_contract)
-    db.commit()
-    db.refresh(new_contract)
-
-    async def event_generator(contract_id: int, content: bytes, name: str) -> AsyncGenerator[str, None]:
-        contract_to_update = db.query(models.Contract).filter(models.Contract.id == contract_id).first()
-        yield f"data: Iniciando processo para o arquivo: {name}\n\n"
-        await asyncio.sleep(1)
-
-        try:
-            yield "data: Extraindo texto do arquivo...\n\n"
-            texto_extraido = await file_processor.extract_text(content, name)
-            if not texto_extraido:
-                raise ValueError("Não foi possível extrair texto do arquivo.")
-
-            yield f"data: Enviando para análise da IA com {ai_provider}...\n\n"
-            dados_analisados = await ai_service.extract_contract_data(texto_extraido, ai_provider)
-            if dados_analisados.get("error"):
-                raise ValueError(f"Erro da IA: {dados_analisados.get('details')}")
-
-            contract_to_update.extracted_data = dados_analisados
-            contract_to_update.status = models.ContractStatus.SUCCESS
-            yield f"data: Finalizado! Contrato '{name}' analisado com sucesso.\n\n"
-        except Exception as e:
-            contract_to_update.status = models.ContractStatus.ERROR
-            contract_to_update.analysis_summary = str(e)
-            yield f"data: ERRO: {str(e)}\n\n"
-        finally:
-            db.commit()
-
-    return StreamingResponse(event_generator(new_contract.id, file_content, filename), media_type="text/event-stream")
-
-@router.get("/", response_model=List[schemas.ContractDetails])
-def list_user_contracts(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    return StreamingResponse(_progress_stream(contract_id), media_type="text/event-stream")
+
+@router.get("/reports/counterparties", response_model=List[schemas.CounterpartyTotal])
+async def report_counterparty_totals(
+    recurrence: Optional[models.Recurrence] = None,
+    document: Optional[str] = Query(None, description="CNPJ ou CPF da contraparte"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    query = db.query(models.Contract).filter(models.Contract.is_deleted == False)
+    # Partes sem documento são agrupadas pelo nome.
+    party_key = func.coalesce(models.ContractParty.document, func.lower(models.ContractParty.name))
+    total_value = func.sum(models.ContractValue.amount)
+    query = (
+        select(
+            func.max(models.ContractParty.document).label("document"),
+            func.max(models.ContractParty.name).label("name"),
+            models.ContractValue.currency,
+            models.ContractValue.recurrence,
+            func.count(func.distinct(models.ContractValue.contract_id)).label("contracts"),
+            total_value.label("total_value"),
+        )
+        .select_from(models.ContractParty)
+        .join(models.ContractValue, models.ContractValue.contract_id == models.ContractParty.contract_id)
+        .join(models.Contract, models.Contract.id == models.ContractParty.contract_id)
+        .where(models.Contract.is_deleted == False)
+        .group_by(party_key, models.ContractValue.currency, models.ContractValue.recurrence)
+        .order_by(total_value.desc())
+        .limit(limit)
+    )
     if current_user.role != UserRole.ADMIN:
-        query = query.filter(models.Contract.user_id == current_user.id)
-    
-    contracts = query.order_by(models.Contract.created_at.desc()).all()
-    return contracts
+        query = query.where(models.Contract.user_id == current_user.id)
+    if recurrence:
+        query = query.where(models.ContractValue.recurrence == recurrence)
+    if document:
+        query = query.where(models.ContractParty.document == re.sub(r"\D", "", document))
+    return (await db.execute(query)).all()
+
+@router.get("/reports/expiring", response_model=List[schemas.ExpiringContract])
+async def report_expiring_contracts(
+    days: int = Query(90, ge=1, le=366),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    today = date.today()
+    query = (
+        select(
+            models.Contract.id,
+            models.Contract.filename,
+            models.Contract.user_id,
+            models.ContractTerms.end_date,
+            models.ContractTerms.auto_renewal,
+        )
+        .join(models.ContractTerms, models.ContractTerms.contract_id == models.Contract.id)
+        .where(
+            models.Contract.is_deleted == False,
+            models.ContractTerms.end_date.between(today, today + timedelta(days=days))
+        )
+        .order_by(models.ContractTerms.end_date, models.Contract.id)
+        .limit(limit)
+    )
+    if current_user.role != UserRole.ADMIN:
+        query = query.where(models.Contract.user_id == current_user.id)
+    return (await db.execute(query)).all()
+
+@router.get("/export")
+async def export_contracts(
+    export_format: Literal["ndjson", "csv", "parquet"] = Query("ndjson", alias="format"),
+    gzip: bool = True,
+    status_filter: Optional[models.ContractStatus] = Query(None, alias="status"),
+    owner_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        if owner_id is not None and owner_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Você só pode exportar os seus próprios contratos")
+        owner_id = current_user.id
+    try:
+        encoder = contract_export.encoder_for(export_format, gzip)
+    except contract_export.ExportUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    query = contract_export.build_query(status_filter, owner_id, created_from, created_to)
+    filename = contract_export.filename_for(export_format, gzip)
+    media_type = "application/gzip" if filename.endswith(".gz") else contract_export.CONTENT_TYPES[export_format]
+    return StreamingResponse(
+        _export_stream(query, encoder),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def _export_stream(query, encoder) -> AsyncGenerator[bytes, None]:
+    # Sessão própria: a resposta continua sendo transmitida depois que as dependências da requisição encerram.
+    async with AsyncSessionLocal() as db:
+        await db.execute(contract_export.DISABLE_STATEMENT_TIMEOUT)
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        yield encoder.header()
+        async for rows in result.partitions():
+            yield encoder.encode(rows)
+    yield encoder.close()
+
+@router.get("/search", response_model=schemas.ContractSearchPage)
+async def search_contracts(
+    q: Optional[str] = None,
+    party: Optional[str] = None,
+    document: Optional[str] = Query(None, description="CNPJ ou CPF de uma das partes"),
+    foro: Optional[str] = None,
+    min_value: Optional[Decimal] = Query(None, ge=0),
+    max_value: Optional[Decimal] = Query(None, ge=0),
+    status_filter: Optional[models.ContractStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    return await contract_search.search(
+        db,
+        owner_id=None if current_user.role == UserRole.ADMIN else current_user.id,
+        q=q,
+        party=party,
+        document=document,
+        foro=foro,
+        min_value=min_value,
+        max_value=max_value,
+        status=status_filter,
+        cursor=cursor,
+        limit=limit,
+    )
+
+@router.get("/", response_model=schemas.ContractPage)
+async def list_user_contracts(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[models.ContractStatus] = Query(None, alias="status"),
+    filename: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
+):
+    query = select(
+        models.Contract.id,
+        models.Contract.filename,
+        models.Contract.status,
+        models.Contract.created_at,
+        models.Contract.user_id,
+    ).where(models.Contract.is_deleted == False)
+    if current_user.role != UserRole.ADMIN:
+        query = query.where(models.Contract.user_id == current_user.id)
+    if status_filter:
+        query = query.where(models.Contract.status == status_filter)
+    if filename:
+        query = query.where(models.Contract.filename.ilike(f"%{filename}%"))
+    if cursor:
+        created_at, contract_id = decode_cursor(cursor, datetime, int)
+        query = query.where(tuple_(models.Contract.created_at, models.Contract.id) < tuple_(created_at, contract_id))
+
+    result = await db.execute(
+        query.order_by(models.Contract.created_at.desc(), models.Contract.id.desc()).limit(limit + 1)
+    )
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {"items": rows, "next_cursor": next_cursor}
 
 @router.get("/{contract_id}", response_model=schemas.ContractDetails)
 async def get_contract_details(
     contract_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    cache_key = f"contract:{contract_id}:{current_user.uuid}"
-    cached_contract = await cache.get(cache_key)
-    if cached_contract:
-        try:
-            return json.loads(cached_contract)
-        except json.JSONDecodeError:
-            pass
-    
-    query = db.query(models.Contract).filter(
-        models.Contract.id == contract_id,
-        models.Contract.is_deleted == False
-    )
-    contract = query.first()
+    contract = await contract_cache.get(contract_id)
 
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato não encontrado")
@@ -117,21 +407,17 @@ async def get_contract_details(
 
     if not is_owner and not is_admin:
         raise HTTPException(status_code=403, detail="Você não tem permissão para ver este contrato")
-    
-    contract_details = schemas.ContractDetails.from_orm(contract)
-    await cache.set(cache_key, contract_details.model_dump_json(), ex=3600)
+
     return contract
 
 @router.delete("/{contract_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_contract(
+async def delete_contract(
     contract_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
-    contract_to_delete = db.query(models.Contract).filter(
-        models.Contract.id == contract_id,
-        models.Contract.is_deleted == False
-    ).first()
+    # Trava a linha: o worker também trava o contrato antes de gravar o resultado, e só um dos dois encerra a análise.
+    contract_to_delete = await _get_active_contract(db, contract_id, for_update=True)
     if not contract_to_delete:
         raise HTTPException(status_code=404, detail="Contrato não encontrado")
 
@@ -141,9 +427,14 @@ def delete_contract(
     if not is_owner and not is_admin:
         raise HTTPException(status_code=403, detail="Você não tem permissão para excluir este contrato")
 
+    previous_status = contract_to_delete.status
     contract_to_delete.is_deleted = True
     contract_to_delete.deleted_at = datetime.utcnow()
     contract_to_delete.deleted_by_id = current_user.id
+    if previous_status == models.ContractStatus.PENDING:
+        # Sai de PENDING aqui: o worker descarta o upload ao encontrar o contrato excluído.
+        contract_to_delete.status = models.ContractStatus.ERROR
+        contract_to_delete.analysis_summary = "Contrato excluído antes do fim do processamento."
     
     audit_service.log_action(
         db=db,
@@ -151,5 +442,11 @@ def delete_contract(
         actor=current_user,
         details={"contract_id": contract_id, "filename": contract_to_delete.filename}
     )
-    db.commit()
+    await db.commit()
+    if previous_status == models.ContractStatus.PENDING:
+        # Evento terminal: sem ele os streams de progresso do contrato e do lote nunca terminariam.
+        await job_queue.publish(contract_id, "error", "ERRO: Contrato excluído durante o processamento.",
+                                batch_id=contract_to_delete.batch_id)
+    await contract_cache.invalidate(contract_id)
+    await contract_stats.record_removed(contract_to_delete.user_id, previous_status)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
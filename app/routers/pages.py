@@ -2,19 +2,19 @@ from fastapi import APIRouter, Request, Depends, Cookie
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from core.database import get_db
-from routers.auth import get_current_user_from_token
+from routers.auth import resolve_principal
 
 router = APIRouter(tags=["Frontend"])
 templates = Jinja2Templates(directory="templates")
 
-def get_user_from_cookie(request: Request, access_token: Optional[str] = Cookie(None), db: Session = Depends(get_db)):
+async def get_user_from_cookie(request: Request, access_token: Optional[str] = Cookie(None), db: AsyncSession = Depends(get_db)):
     if access_token:
         token = access_token.split("Bearer ")[-1]
-        user = get_current_user_from_token(token, db)
+        user = await resolve_principal(request, token, db)
         return user
     return None
 
@@ -1,31 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db
 from models import models
 from schemas import schemas
 from routers.auth import get_current_user
 from core import security
 from services.audit_service import log_action, AuditLogAction
+from services import user_cache
 
 router = APIRouter(prefix="/users", tags=["Users"], dependencies=[Depends(get_current_user)])
 
 @router.get("/me", response_model=schemas.User)
-def read_users_me(current_user: models.User = Depends(get_current_user)):
+async def read_users_me(current_user: schemas.CurrentUser = Depends(get_current_user)):
     return current_user
 
 @router.put("/me", response_model=schemas.User)
-def update_user_me(
+async def update_user_me(
     user_update: schemas.UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user)
 ):
+    user = await db.get(models.User, current_user.id)
+    if user is None:
+        # Usuário removido cujo snapshot ainda estava no cache de autenticação.
+        await user_cache.invalidate(current_user.email)
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
     if user_update.first_name:
-        current_user.first_name = user_update.first_name
+        user.first_name = user_update.first_name
     if user_update.last_name:
-        current_user.last_name = user_update.last_name
+        user.last_name = user_update.last_name
 
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-    log_action(db, action=AuditLogAction.USER_UPDATED, actor=current_user)
-    return current_user
\ No newline at end of file
+    db.add(user)
+    log_action(db, action=AuditLogAction.USER_UPDATED, actor=user)
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.email)
+    return user
\ No newline at end of file
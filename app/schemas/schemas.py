@@ -1,9 +1,10 @@
 # app/schemas/schemas.py
 import uuid
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 from typing import List, Dict, Any, Optional
-from models.models import ContractStatus, UserRole
+from models.models import AuditLogAction, ContractStatus, Recurrence, UserRole
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -29,6 +30,42 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class AdminUserSummary(User):
+    contract_count: int = 0
+
+class AdminUserPage(BaseModel):
+    items: List[AdminUserSummary]
+    next_cursor: Optional[str] = None
+
+class UserOffboardRequest(BaseModel):
+    user_uuids: Optional[List[uuid.UUID]] = None
+    email_domain: Optional[str] = None
+    role: Optional[UserRole] = None
+    reassign_to: Optional[uuid.UUID] = None # sem dono de destino, os contratos ficam órfãos
+
+class UserOffboardResult(BaseModel):
+    users_deleted: int
+    contracts_moved: int
+    done: bool
+
+class AuditLogEntry(BaseModel):
+    id: int
+    timestamp: datetime
+    user_id: Optional[int] = None
+    action: AuditLogAction
+    details: Optional[Dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogEntry]
+    next_cursor: Optional[str] = None
+
+class CurrentUser(User):
+    """Snapshot do usuário autenticado, mantido em cache entre requisições."""
+    pass
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -45,7 +82,67 @@ class ContractBase(BaseModel):
 class ContractDetails(ContractBase):
     id: int
     created_at: datetime
-    user_id: int
+    # Sem dono quando o usuário foi desligado sem transferência dos contratos.
+    user_id: Optional[int] = None
+    partial_data: Optional[Dict[str, Any]] = None
+    text_tokens_raw: Optional[int] = None
+    text_tokens_compacted: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ContractSummary(BaseModel):
+    id: int
+    filename: str
+    status: ContractStatus
+    created_at: datetime
+    user_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class ContractPage(BaseModel):
+    items: List[ContractSummary]
+    next_cursor: Optional[str] = None
+
+class ContractSearchResult(ContractSummary):
+    max_monetary_value: Optional[Decimal] = None
+    rank: Optional[float] = None
+
+class ContractSearchPage(BaseModel):
+    items: List[ContractSearchResult]
+    next_cursor: Optional[str] = None
+
+class CounterpartyTotal(BaseModel):
+    document: Optional[str] = None
+    name: str
+    currency: str
+    recurrence: Optional[Recurrence] = None
+    contracts: int
+    total_value: Decimal
+
+class ExpiringContract(BaseModel):
+    id: int
+    filename: str
+    user_id: Optional[int] = None
+    end_date: date
+    auto_renewal: Optional[bool] = None
+
+    class Config:
+        from_attributes = True
+
+class BatchContractStatus(BaseModel):
+    id: int
+    filename: str
+    status: ContractStatus
+    analysis_summary: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class BatchStatus(BaseModel):
+    uuid: uuid.UUID
+    total_files: int
+    created_at: datetime
+    counts: Dict[str, int]
+    contracts: List[BatchContractStatus]
@@ -0,0 +1,373 @@
+# app/services/ai_providers.py
+import abc
+import asyncio
+import bisect
+import json
+import logging
+import os
+import random
+import socket
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from core import telemetry
+from core.cache import cache
+from core.config import (GEMINI_API_KEY, AI_REQUEST_TIMEOUT, AI_MAX_RETRIES, AI_FALLBACK_PROVIDERS,
+                         AI_HEDGE_DELAY, AI_MAX_QUEUE_WAIT, AI_BREAKER_FAILURES, AI_BREAKER_RESET,
+                         GEMINI_RPM, GEMINI_TPM, GROQ_RPM, GROQ_TPM, GROQ_SIMULATED_LATENCY,
+                         GROQ_SIMULATED_JITTER, GEMINI_MAX_DOCUMENT_TOKENS, GROQ_MAX_DOCUMENT_TOKENS)
+
+logger = logging.getLogger(__name__)
+
+genai.configure(api_key=GEMINI_API_KEY)
+
+STATS_TTL = 120
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class StreamAttempt:
+    """Consumidor do texto gerado por uma tentativa (retry, hedge ou fallback) de uma chamada ao roteador."""
+
+    async def feed(self, piece: str):
+        pass
+
+    def fail(self):
+        """A tentativa terminou sem resposta (erro ou cancelamento, como o hedge perdedor)."""
+
+    async def won(self):
+        """A resposta desta tentativa foi a devolvida pelo roteador."""
+
+# Fábrica chamada uma vez por tentativa, para que respostas parciais de tentativas diferentes não se misturem.
+StreamListener = Callable[[], StreamAttempt]
+
+
+class ProviderError(Exception):
+    pass
+
+class RateLimitedError(ProviderError):
+    pass
+
+class ProviderUnavailable(ProviderError):
+    pass
+
+
+# Estimativa local (sem tokenizador do provedor): ~4 caracteres por token em texto em português.
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class TokenBucket:
+    """Token bucket reabastecido continuamente com `rate` unidades por minuto, com rajada de até `rate`."""
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.tokens = float(rate_per_minute)
+        self.refill_per_second = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.refill_per_second)
+
+    async def acquire(self, amount: float, max_wait: float):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            wait = self.wait_time(amount)
+            if wait > max_wait:
+                raise RateLimitedError(f"limite local excedido (espera estimada de {wait:.1f}s)")
+            if wait:
+                await asyncio.sleep(wait)
+                self._refill()
+            self.tokens -= amount
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # Em half-open, apenas uma chamada de teste passa até terminar; as demais vão para o fallback.
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+
+    def acquire(self) -> bool:
+        """Reserva a passagem para uma chamada; retorna True se ela é a chamada de teste do half-open."""
+        if not self.allow():
+            raise ProviderUnavailable("circuito aberto")
+        if self.state == "half_open":
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+        return {"buckets": dict(zip(labels, self.counts)), "count": sum(self.counts), "sum": round(self.total, 3)}
+
+
+class Provider(abc.ABC):
+    name: str
+    model: str
+
+    def __init__(self, rpm: int, tpm: int, max_document_tokens: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.breaker = CircuitBreaker(AI_BREAKER_FAILURES, AI_BREAKER_RESET)
+        self.latency = LatencyHistogram()
+        self.outcomes: Dict[str, int] = {}
+        # Orçamento por documento (texto já compactado), aplicado pelo pipeline antes de concluir a análise.
+        self.max_document_tokens = max_document_tokens
+
+    @abc.abstractmethod
+    async def generate(self, prompt: str, on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """Gera a resposta completa, repassando cada trecho a `on_text` à medida que chega."""
+
+    def queue_wait(self, prompt: str) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(estimate_tokens(prompt)))
+
+    async def call(self, prompt: str, on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        with telemetry.trace_span(f"ai.{self.name}", model=self.model) as current:
+            return await self._call(prompt, current, on_text)
+
+    async def _call(self, prompt: str, current, on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        prompt_tokens = estimate_tokens(prompt)
+        await self.requests.acquire(1, AI_MAX_QUEUE_WAIT)
+        await self.tokens.acquire(prompt_tokens, AI_MAX_QUEUE_WAIT)
+        trial = self.breaker.acquire()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            telemetry.AI_TOKENS.labels(provider=self.name, direction="input").inc(prompt_tokens)
+            result = await asyncio.wait_for(self.generate(prompt, on_text), timeout=AI_REQUEST_TIMEOUT)
+            outcome = "success"
+            self.breaker.record_success()
+            telemetry.AI_TOKENS.labels(provider=self.name, direction="output").inc(estimate_tokens(result))
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            self.breaker.record_failure()
+            raise ProviderError(f"{self.name}: tempo limite de {AI_REQUEST_TIMEOUT}s excedido")
+        except RateLimitedError:
+            outcome = "rate_limited"
+            self.breaker.record_failure()
+            raise
+        except ProviderError:
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            # Sem registro de sucesso/falha (ex.: hedge perdedor cancelado), a vaga de teste precisa ser liberada.
+            if trial:
+                self.breaker.release_trial()
+            elapsed = time.perf_counter() - started
+            self.latency.observe(elapsed)
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            telemetry.AI_CALL_SECONDS.labels(provider=self.name, outcome=outcome).observe(elapsed)
+            telemetry.set_attribute(current, "ai.outcome", outcome)
+            telemetry.set_attribute(current, "ai.prompt_tokens", prompt_tokens)
+
+    def snapshot(self) -> dict:
+        return {
+            "model": self.model,
+            "breaker": self.breaker.state,
+            "outcomes": dict(self.outcomes),
+            "latency": self.latency.snapshot(),
+        }
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+    model = "gemini-2.0-flash"
+
+    def __init__(self):
+        super().__init__(GEMINI_RPM, GEMINI_TPM, GEMINI_MAX_DOCUMENT_TOKENS)
+        self.client = genai.GenerativeModel(self.model)
+
+    async def generate(self, prompt: str, on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        try:
+            response = await self.client.generate_content_async(prompt, stream=True)
+            parts = []
+            async for chunk in response:
+                parts.append(chunk.text)
+                if on_text:
+                    await on_text(chunk.text)
+            return "".join(parts)
+        except google_exceptions.ResourceExhausted as e:
+            raise RateLimitedError(f"gemini: {e}")
+        except Exception as e:
+            raise ProviderError(f"gemini: {e}")
+
+
+class GroqProvider(Provider):
+    """Provedor simulado, usado como substituto local (testes, benchmarks e fallback de desenvolvimento)."""
+    name = "groq"
+    model = "simulated"
+
+    def __init__(self):
+        super().__init__(GROQ_RPM, GROQ_TPM, GROQ_MAX_DOCUMENT_TOKENS)
+
+    async def generate(self, prompt: str, on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        logger.info("SIMULANDO CHAMADA PARA A API GROQ")
+        latency = max(0.0, GROQ_SIMULATED_LATENCY + random.uniform(-GROQ_SIMULATED_JITTER, GROQ_SIMULATED_JITTER))
+        response = self._simulated_response()
+        # Entrega a resposta em trechos ao longo da latência simulada, como um provedor com streaming.
+        pieces = [response[i:i + 40] for i in range(0, len(response), 40)]
+        for piece in pieces:
+            await asyncio.sleep(latency / len(pieces))
+            if on_text:
+                await on_text(piece)
+        return response
+
+    @staticmethod
+    def _simulated_response() -> str:
+        return json.dumps({
+            "partes_envolvidas": ["Simulado via Groq: Empresa X (CNPJ: 12.345.678/0001-99)", "Simulado via Groq: Fornecedor Y"],
+            "valores_monetarios": ["R$ 5.000,00 (simulado)"],
+            "obrigações_principais": "Fornecedor Y deve entregar o produto X até a data Z (simulado).",
+            "objeto_contrato": "Compra e venda de produto X (simulado).",
+            "vigencia": "12 meses a partir de 01/01/2025 (simulado).",
+            "clausula_rescisao": "Multa de 20% sobre o valor do contrato (simulado)."
+        }, ensure_ascii=False)
+
+
+class ProviderRouter:
+    def __init__(self, providers: List[Provider], fallbacks: List[str]):
+        self.providers = {p.name: p for p in providers}
+        self.fallbacks = fallbacks
+
+    def get(self, name: str) -> Provider:
+        if name not in self.providers:
+            raise ValueError(f"Provedor de IA desconhecido: {name}")
+        return self.providers[name]
+
+    def _candidates(self, preferred: str) -> List[Provider]:
+        names = [preferred] + [name for name in self.fallbacks if name != preferred]
+        candidates = [self.get(name) for name in names if self.get(name).breaker.allow()]
+        if not candidates:
+            raise ProviderUnavailable("Todos os provedores de IA estão temporariamente indisponíveis.")
+        # Entre os fallbacks, prefere quem tem menor espera estimada no limitador local.
+        return candidates[:1] + sorted(candidates[1:], key=lambda p: p.queue_wait(""))
+
+    async def _call_with_retries(self, provider: Provider, prompt: str,
+                                 listener: Optional[StreamListener] = None) -> Tuple[str, Optional[StreamAttempt]]:
+        for retry in range(AI_MAX_RETRIES + 1):
+            attempt = listener() if listener else None
+            try:
+                return await provider.call(prompt, attempt.feed if attempt else None), attempt
+            except BaseException as e:
+                if attempt:
+                    attempt.fail()
+                if not isinstance(e, RateLimitedError) or retry == AI_MAX_RETRIES or not provider.breaker.allow():
+                    raise
+            await asyncio.sleep(2 ** retry)
+
+    async def _hedged(self, primary: Provider, secondary: Provider, prompt: str,
+                      listener: Optional[StreamListener] = None) -> Tuple[str, Optional[StreamAttempt]]:
+        """Dispara o secundário se o primário não responder em AI_HEDGE_DELAY; vence a primeira resposta bem-sucedida."""
+        tasks = [asyncio.create_task(self._call_with_retries(primary, prompt, listener))]
+        done, _ = await asyncio.wait(tasks, timeout=AI_HEDGE_DELAY)
+        if not done or tasks[0].exception() is not None:
+            tasks.append(asyncio.create_task(self._call_with_retries(secondary, prompt, listener)))
+        try:
+            errors = []
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+            raise errors[-1]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def generate(self, prompt: str, preferred: str, listener: Optional[StreamListener] = None) -> str:
+        candidates = self._candidates(preferred)
+        last_error: Exception = ProviderUnavailable("Nenhum provedor disponível")
+        index = 0
+        while index < len(candidates):
+            provider = candidates[index]
+            try:
+                if AI_HEDGE_DELAY > 0 and index + 1 < len(candidates):
+                    result, attempt = await self._hedged(provider, candidates[index + 1], prompt, listener)
+                else:
+                    result, attempt = await self._call_with_retries(provider, prompt, listener)
+                if attempt:
+                    await attempt.won()
+                return result
+            except ProviderError as e:
+                logger.warning("Provedor %s falhou: %s", provider.name, e)
+                last_error = e
+            index += 2 if AI_HEDGE_DELAY > 0 and index + 1 < len(candidates) else 1
+        raise last_error
+
+    def snapshot(self) -> dict:
+        return {name: provider.snapshot() for name, provider in self.providers.items()}
+
+
+router = ProviderRouter([GeminiProvider(), GroqProvider()], AI_FALLBACK_PROVIDERS)
+
+
+async def publish_stats():
+    """Publica as métricas deste processo no Redis, onde a API consegue agregá-las."""
+    key = f"ai_providers:stats:{socket.gethostname()}:{os.getpid()}"
+    await cache.set(key, json.dumps(router.snapshot()), ex=STATS_TTL)
+
+async def collect_stats() -> dict:
+    stats = {}
+    async for key in cache.scan_iter(match="ai_providers:stats:*"):
+        raw = await cache.get(key)
+        if raw:
+            stats[key.split(":", 2)[2]] = json.loads(raw)
+    return stats
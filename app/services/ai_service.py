@@ -1,10 +1,18 @@
 # app/services/ai_service.py
 import asyncio
-import json
-import google.generativeai as genai
-from core.config import GEMINI_API_KEY, GROQ_API_KEY
+from typing import Any, Awaitable, Callable, List, Optional
 
-genai.configure(api_key=GEMINI_API_KEY)
+from core.config import AI_CHUNK_MAX_CHARS, AI_CHUNK_CONCURRENCY
+from services import ai_providers, json_stream
+from services.chunking import split_into_chunks, merge_results
+
+# (bloco, campo, valor, parte, tentativa): chamado assim que um campo da resposta termina de chegar. `parte` é o
+# número do trecho em análises divididas, ou None quando o contrato é analisado de uma vez; `tentativa` numera as
+# tentativas da chamada (retries, hedge, fallback), e campos de uma tentativa nova substituem os da anterior.
+FieldCallback = Callable[[Optional[str], str, Any, Optional[int], int], Awaitable[None]]
+
+# Incrementar sempre que o PROMPT_TEMPLATE mudar, invalidando resultados em cache.
+PROMPT_VERSION = "3"
 
 PROMPT_TEMPLATE = """
 Aja como um analista jurídico sênior, com mais de 20 anos de experiência em leitura, interpretação e extração de dados de contratos empresariais celebrados no Brasil. Você é especialista em identificar e organizar informações relevantes mesmo em documentos mal formatados, com uso excessivo de jargões legais, ambiguidade ou omissões.
@@ -50,32 +58,149 @@ Texto do contrato a ser analisado:
 """
 
 
-async def _call_gemini(text: str, prompt: str) -> dict:
-    model = genai.GenerativeModel('gemini-2.0-flash')
+CHUNK_PROMPT_HEADER = """
+ATENÇÃO: o contrato é extenso e foi dividido em partes. O texto abaixo é a parte {index}.
+Extraia somente as informações presentes neste trecho; os resultados de todas as partes serão consolidados depois.
+"""
+
+
+class _AttemptFields(ai_providers.StreamAttempt):
+    def __init__(self, stream: "_FieldStream", number: int):
+        self.stream = stream
+        self.number = number
+        self.parser = json_stream.FieldParser()
+        self.pending: List[json_stream.Field] = []
+
+    async def feed(self, piece: str):
+        self.pending.extend(self.parser.feed(piece))
+        await self.stream.forward(self)
+
+    def fail(self):
+        self.stream.release(self)
+
+    async def won(self):
+        await self.stream.forward(self, won=True)
+
+
+class _FieldStream:
+    """Repassa os campos de uma tentativa por vez. A primeira a produzir campos lidera e as concorrentes (hedge)
+    acumulam os seus; se a líder falha, a próxima que avançar assume, e se outra tentativa vence, os campos dela
+    são repassados ao final. Assim os campos publicados terminam iguais aos da resposta escolhida."""
+
+    def __init__(self, on_field: FieldCallback, part: Optional[int]):
+        self.on_field = on_field
+        self.part = part
+        self.attempts = 0
+        self.leader: Optional[_AttemptFields] = None
+        self.settled = False
+
+    def __call__(self) -> _AttemptFields:
+        self.attempts += 1
+        return _AttemptFields(self, self.attempts)
+
+    def release(self, attempt: _AttemptFields):
+        if self.leader is attempt and not self.settled:
+            self.leader = None
+
+    async def forward(self, attempt: _AttemptFields, won: bool = False):
+        if won:
+            self.leader, self.settled = attempt, True
+        elif self.leader is None and not self.settled:
+            self.leader = attempt
+        while attempt.pending and self.leader is attempt:
+            block, field, value = attempt.pending.pop(0)
+            await self.on_field(block, field, value, self.part, attempt.number)
+
+async def _call_provider(text: str, prompt: str, provider: str, on_field: Optional[FieldCallback] = None, part: Optional[int] = None) -> dict:
+    ai_providers.router.get(provider)
     try:
         full_prompt = prompt.format(text=text)
-        response = await model.generate_content_async(full_prompt)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "").strip()
-        return json.loads(cleaned_response)
+        listener = _FieldStream(on_field, part) if on_field else None
+        response_text = await ai_providers.router.generate(full_prompt, provider, listener)
+        return json_stream.parse(response_text)
     except Exception as e:
         return {"error": "Falha ao analisar a resposta da IA", "details": str(e)}
 
-async def _call_groq(text: str, prompt: str) -> dict:
-    print("SIMULANDO CHAMADA PARA A API GROQ")
-    await asyncio.sleep(1) # Demora reduzida para 1 segundo
-    return {
-        "partes_envolvidas": ["Simulado via Groq: Empresa X (CNPJ: 12.345.678/0001-99)", "Simulado via Groq: Fornecedor Y"],
-        "valores_monetarios": ["R$ 5.000,00 (simulado)"],
-        "obrigações_principais": "Fornecedor Y deve entregar o produto X até a data Z (simulado).",
-        "objeto_contrato": "Compra e venda de produto X (simulado).",
-        "vigencia": "12 meses a partir de 01/01/2025 (simulado).",
-        "clausula_rescisao": "Multa de 20% sobre o valor do contrato (simulado)."
-    }
+def model_for(provider: str) -> str:
+    return ai_providers.router.get(provider).model
+
+class ChunkedExtraction:
+    """Análise incremental: trechos completos são enviados à IA enquanto o texto ainda está sendo extraído.
+
+    Com `prefetch=False` os trechos ficam retidos até `start_prefetch()` ou `finish()`, para que o chamador só
+    gaste chamadas ao provedor quando souber que o documento será de fato analisado.
+    """
+
+    def __init__(self, provider: str, on_field: Optional[FieldCallback] = None, prefetch: bool = True):
+        self.provider = provider
+        self.on_field = on_field
+        self.prefetch = prefetch
+        self._parts = []
+        self._size = 0
+        self._ready = []
+        self._tasks = []
+        self._semaphore = asyncio.Semaphore(AI_CHUNK_CONCURRENCY)
+
+    def _start(self, chunk: str):
+        part = len(self._tasks) + 1
+        header = CHUNK_PROMPT_HEADER.format(index=part)
+
+        async def analyse() -> dict:
+            async with self._semaphore:
+                return await _call_provider(chunk, header + PROMPT_TEMPLATE, self.provider, self.on_field, part)
+
+        self._tasks.append(asyncio.create_task(analyse()))
+
+    def feed(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        # Mantém texto suficiente no buffer para que o último trecho possa ser cortado num limite de cláusula.
+        if self._size < 2 * AI_CHUNK_MAX_CHARS:
+            return
+        chunks = split_into_chunks("".join(self._parts), AI_CHUNK_MAX_CHARS)
+        self._ready.extend(chunks[:-1])
+        self._parts = [chunks[-1]]
+        self._size = len(chunks[-1])
+        if self.prefetch:
+            self.start_prefetch()
+
+    def start_prefetch(self):
+        self.prefetch = True
+        for chunk in self._ready:
+            self._start(chunk)
+        self._ready = []
+
+    @property
+    def started_chunks(self) -> int:
+        return len(self._tasks)
+
+    async def finish(self) -> dict:
+        remainder = "".join(self._parts)
+        chunks, self._ready = self._ready, []
+        if not self._tasks and not chunks:
+            chunks = split_into_chunks(remainder, AI_CHUNK_MAX_CHARS)
+            if len(chunks) == 1:
+                return await _call_provider(remainder, PROMPT_TEMPLATE, self.provider, self.on_field)
+        elif remainder.strip():
+            chunks += split_into_chunks(remainder, AI_CHUNK_MAX_CHARS)
+        for chunk in chunks:
+            self._start(chunk)
+
+        try:
+            results = await asyncio.gather(*self._tasks)
+        finally:
+            self.cancel()
+        for result in results:
+            if result.get("error"):
+                return result
+        return merge_results(results)
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
 
 async def extract_contract_data(text: str, provider: str) -> dict:
-    if provider == 'gemini':
-        return await _call_gemini(text, PROMPT_TEMPLATE)
-    elif provider == 'groq':
-        return await _call_groq(text, PROMPT_TEMPLATE)
-    else:
-        raise ValueError(f"Provedor de IA desconhecido: {provider}")
\ No newline at end of file
+    analysis = ChunkedExtraction(provider)
+    analysis.feed(text)
+    return await analysis.finish()
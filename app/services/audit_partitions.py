@@ -0,0 +1,114 @@
+# app/services/audit_partitions.py
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from core.config import AUDIT_PARTITION_MONTHS_AHEAD
+
+logger = logging.getLogger(__name__)
+
+PARENT = "audit_logs"
+DEFAULT_PARTITION = f"{PARENT}_default"
+_PARTITION_NAME = re.compile(rf"^{PARENT}_p(\d{{4}})(\d{{2}})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def month_start(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month.year:04d}{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return conn.execute(
+        text("SELECT c.relkind = 'p' FROM pg_class c WHERE c.oid = to_regclass(:name)"), {"name": PARENT}
+    ).scalar() is True
+
+def ensure_partitions(conn: Connection, start: Optional[date] = None, months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD) -> int:
+    """Cria a partição padrão e as partições mensais de `start` (padrão: mês atual) até `months_ahead` meses à frente."""
+    if not is_partitioned(conn):
+        logger.warning("%s não é particionada; execute `python audit_partitions.py migrate-legacy`", PARENT)
+        return 0
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+    current = month_start(datetime.now(timezone.utc))
+    month = min(start or current, current)
+    created = 0
+    while month <= add_months(current, months_ahead):
+        name = partition_name(month)
+        if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            _create_partition(conn, name, month)
+            created += 1
+        month = add_months(month, 1)
+    return created
+
+def _create_partition(conn: Connection, name: str, month: date):
+    # Bordas em UTC, para que cada linha caia no mês de calendário UTC do seu timestamp.
+    bounds = {"start": f"{month.isoformat()} 00:00:00+00", "end": f"{add_months(month, 1).isoformat()} 00:00:00+00"}
+    values = f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    stranded = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end)"
+    ), bounds).scalar()
+    if not stranded:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} {values}"))
+        return
+    # Linhas do mês já caíram na partição padrão (ex.: API parada por mais de AUDIT_PARTITION_MONTHS_AHEAD meses):
+    # o Postgres recusaria criar a partição sobre elas. A tabela é criada solta, recebe as linhas e só então é anexada.
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds).rowcount
+    conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {values}"))
+    logger.warning("%s linha(s) de auditoria movidas de %s para %s", moved, DEFAULT_PARTITION, name)
+
+
+def monthly_tables(conn: Connection) -> List[Tuple[str, date, bool]]:
+    """Tabelas mensais de auditoria (anexadas ou já desanexadas), com o mês e se ainda são partições."""
+    rows = conn.execute(text(
+        "SELECT c.relname, c.relispartition FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = current_schema() AND c.relkind = 'r' AND c.relname LIKE :pattern"
+    ), {"pattern": f"{PARENT}\\_p%"}).all()
+    tables = [(name, partition_month(name), attached) for name, attached in rows if partition_month(name)]
+    return sorted(tables, key=lambda table: table[1])
+
+def detach(conn: Connection, name: str):
+    conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+
+def archive(engine: Engine, name: str, archive_dir: str) -> str:
+    """Copia uma tabela mensal já desanexada para `<archive_dir>/<nome>.csv.gz` e a remove do banco.
+
+    O arquivo é gravado sob um nome temporário e só é renomeado após o fsync; a tabela só é removida depois
+    disso, então uma execução interrompida pode ser repetida sem perda.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    partial = f"{path}.partial"
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor, gzip.open(partial, "wb") as output:
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", output)
+        with open(partial, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(partial, path)
+        with raw.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {name}")
+        raw.commit()
+    finally:
+        raw.close()
+    return path
@@ -1,17 +1,214 @@
-from sqlalchemy.orm import Session
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.models import AuditLog, AuditLogAction, User
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from core.config import AUDIT_BUFFER_SIZE, AUDIT_FLUSH_INTERVAL, AUDIT_MAX_PENDING, AUDIT_SPOOL_DIR
+from core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Falhas que se repetiriam a cada nova tentativa: autor removido (FK), mês sem partição, valor inválido.
+# A linha é isolada em quarentena; qualquer outro erro (ex.: conexão) mantém o lote inteiro para o próximo ciclo.
+PERMANENT_ERRORS = (IntegrityError, DataError, ValueError, KeyError)
 
 def log_action(
-    db: Session,
+    db: AsyncSession,
     action: AuditLogAction,
     actor: Optional[User] = None,
     details: Optional[Dict[str, Any]] = None
 ):
+    """Registra a ação na transação do chamador; a entrada é gravada no mesmo commit da alteração auditada."""
     log_entry = AuditLog(
         user_id=actor.id if actor else None,
         action=action,
         details=details if details else {}
     )
     db.add(log_entry)
-    db.commit()
\ No newline at end of file
+
+
+async def _insert(entries: List[Dict[str, Any]]):
+    rows = [
+        {
+            "user_id": entry["user_id"],
+            "action": AuditLogAction(entry["action"]),
+            "details": entry["details"],
+            "timestamp": datetime.fromisoformat(entry["timestamp"]),
+        }
+        for entry in entries
+    ]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(AuditLog), rows)
+        await db.commit()
+
+
+class AuditBuffer:
+    """Sink de auditoria para eventos de alto volume que não precisam ser atômicos com uma transação.
+
+    As entradas são anexadas a um arquivo de spool local antes de entrarem no buffer em memória, e
+    gravadas em lote (INSERT único) quando o buffer atinge AUDIT_BUFFER_SIZE ou a cada
+    AUDIT_FLUSH_INTERVAL segundos. Spools deixados por processos que morreram antes do flush são
+    reprocessados na inicialização, garantindo entrega pelo menos uma vez.
+    """
+
+    def __init__(self):
+        self._entries: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._task: Optional[asyncio.Task] = None
+        self._spool = None
+        self._spool_path = os.path.join(AUDIT_SPOOL_DIR, f"audit-{socket.gethostname()}-{os.getpid()}.jsonl")
+        # Fora do padrão audit-*.jsonl: a quarentena não é reprocessada na inicialização.
+        self._rejected_path = os.path.join(AUDIT_SPOOL_DIR, f"rejected-{socket.gethostname()}.jsonl")
+
+    def _open_spool(self):
+        self._spool = open(self._spool_path, "a", encoding="utf-8")
+        fcntl.flock(self._spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _recover_orphaned_spools(self) -> List[Dict[str, Any]]:
+        recovered = []
+        for path in glob.glob(os.path.join(AUDIT_SPOOL_DIR, "audit-*.jsonl*")):
+            if path.startswith(self._spool_path):
+                continue
+            try:
+                f = open(path, "r+", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with f:
+                try:
+                    # Um spool ainda travado pertence a um processo vivo (o rotacionado fica travado até o commit).
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    # O dono pode ter removido o arquivo entre o open e o lock: as entradas já foram gravadas.
+                    if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                        continue
+                except (BlockingIOError, FileNotFoundError):
+                    continue
+                recovered.extend(json.loads(line) for line in f if line.strip())
+                os.remove(path)
+        return recovered
+
+    async def start(self):
+        os.makedirs(AUDIT_SPOOL_DIR, exist_ok=True)
+        self._open_spool()
+        recovered = self._recover_orphaned_spools()
+        if recovered:
+            logger.info("Reprocessando %s entrada(s) de auditoria de spools órfãos", len(recovered))
+            for entry in recovered:
+                self._append(entry)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Falha no flush final de auditoria")
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+            # Se o último flush falhou, o spool fica no disco e é reprocessado pelo próximo processo.
+            if self._entries:
+                logger.warning("%s entrada(s) de auditoria mantidas no spool %s", len(self._entries), self._spool_path)
+            else:
+                os.remove(self._spool_path)
+
+    def _append(self, entry: Dict[str, Any]):
+        self._spool.write(json.dumps(entry) + "\n")
+        self._spool.flush()
+        self._entries.append(entry)
+        if len(self._entries) >= AUDIT_BUFFER_SIZE:
+            self._flush_requested.set()
+        if len(self._entries) >= AUDIT_MAX_PENDING:
+            self._space_available.clear()
+
+    async def log(self, action: AuditLogAction, actor_id: Optional[int] = None, details: Optional[Dict[str, Any]] = None):
+        # Backpressure: se o banco não acompanha o volume, quem registra espera o próximo flush.
+        await self._space_available.wait()
+        self._append({
+            "user_id": actor_id,
+            "action": action.value,
+            "details": details or {},
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        })
+
+    async def flush(self):
+        async with self._lock:
+            if not self._entries:
+                return
+            entries, self._entries = self._entries, []
+            # Rotaciona o spool antes do INSERT: entradas novas vão para um arquivo novo, e o antigo só é
+            # removido depois do commit. O handle antigo continua aberto para manter o flock durante o flush.
+            flushing_path = f"{self._spool_path}.{datetime.now(timezone.utc).timestamp()}"
+            rotated = self._spool
+            try:
+                os.replace(self._spool_path, flushing_path)
+                self._open_spool()
+            except OSError:
+                self._entries = entries + self._entries
+                raise
+            try:
+                pending = await self._write(entries)
+            except Exception:
+                logger.exception("Falha ao gravar %s entrada(s) de auditoria; nova tentativa no próximo ciclo", len(entries))
+                pending = entries
+            if pending:
+                self._entries = pending + self._entries
+                for entry in pending:
+                    self._spool.write(json.dumps(entry) + "\n")
+                self._spool.flush()
+            os.remove(flushing_path)
+            rotated.close()
+            if len(self._entries) < AUDIT_MAX_PENDING:
+                self._space_available.set()
+
+    async def _write(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Grava as entradas num INSERT único; se alguma é inválida, grava uma a uma e põe as rejeitadas em
+        quarentena. Retorna as que ficaram pendentes por uma falha transitória no meio do caminho."""
+        try:
+            await _insert(entries)
+            return []
+        except PERMANENT_ERRORS:
+            logger.warning("Lote de %s entrada(s) de auditoria rejeitado; gravando uma a uma", len(entries))
+        for index, entry in enumerate(entries):
+            try:
+                await _insert([entry])
+            except PERMANENT_ERRORS as e:
+                self._reject(entry, e)
+            except Exception:
+                logger.exception("Falha ao gravar entradas de auditoria; nova tentativa no próximo ciclo")
+                return entries[index:]
+        return []
+
+    def _reject(self, entry: Dict[str, Any], error: Exception):
+        logger.error("Entrada de auditoria em quarentena em %s: %s (%s)", self._rejected_path, entry, error)
+        with open(self._rejected_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"entry": entry, "error": str(error)}) + "\n")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=AUDIT_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Ex.: OSError no spool; sem isso a task morreria em silêncio e nada mais seria gravado.
+                logger.exception("Falha no flush periódico de auditoria")
+
+
+audit_buffer = AuditBuffer()
@@ -0,0 +1,115 @@
+# app/services/chunking.py
+import re
+from typing import List, Dict, Any
+
+NOT_SPECIFIED = "Não especificado no documento"
+RESULT_BLOCKS = ("dados_obrigatorios", "informacoes_cruciais")
+LIST_FIELDS = ("partes_envolvidas", "valores_monetarios")
+
+# Início de cláusulas, artigos, seções e itens numerados ("CLÁUSULA PRIMEIRA", "Art. 5º", "3.1 -", "IV -").
+_SECTION_BOUNDARY = re.compile(
+    r"^(?=\s*(?:CL[ÁA]USULA|Cl[áa]usula|ART(?:IGO)?\.?\s|Art(?:igo)?\.?\s|SE[ÇC][ÃA]O|Se[çc][ãa]o|CAP[ÍI]TULO|Cap[íi]tulo"
+    r"|\d+(?:\.\d+)*\s*[.)\-–]\s|[IVXLC]+\s*[.)\-–]\s))",
+    re.MULTILINE,
+)
+DOCUMENT_NUMBER = re.compile(r"\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}|\d{3}\.?\d{3}\.?\d{3}-?\d{2}")
+MONEY = re.compile(r"R\$\s*([\d.]+(?:,\d{2})?)")
+
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    parts, current = [], ""
+    for paragraph in re.split(r"(\n\s*\n|\n)", section):
+        if len(current) + len(paragraph) <= max_chars:
+            current += paragraph
+            continue
+        if current:
+            parts.append(current)
+        while len(paragraph) > max_chars:
+            parts.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current = paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """Divide o texto em blocos de até max_chars, preferindo quebrar nos limites de cláusulas e seções."""
+    if len(text) <= max_chars:
+        return [text]
+
+    boundaries = [m.start() for m in _SECTION_BOUNDARY.finditer(text)]
+    if not boundaries or boundaries[0] != 0:
+        boundaries.insert(0, 0)
+    sections = [text[start:end] for start, end in zip(boundaries, boundaries[1:] + [len(text)])]
+
+    chunks, current = [], ""
+    for section in sections:
+        if len(section) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            pieces = _split_oversized(section, max_chars)
+            chunks.extend(pieces[:-1])
+            current = pieces[-1]
+        elif len(current) + len(section) > max_chars:
+            chunks.append(current)
+            current = section
+        else:
+            current += section
+    if current.strip():
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _dedup_key(field: str, value: Any) -> str:
+    text = str(value)
+    if field == "partes_envolvidas":
+        document = DOCUMENT_NUMBER.search(text)
+        if document:
+            return re.sub(r"\D", "", document.group())
+    if field == "valores_monetarios":
+        money = MONEY.search(text)
+        if money:
+            return money.group(1).replace(".", "")
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+def _merge_field(field: str, values: List[Any]) -> Any:
+    present = [v for v in values if v not in (None, "", [], {}, NOT_SPECIFIED)]
+    if not present:
+        return NOT_SPECIFIED
+
+    if all(isinstance(v, dict) for v in present):
+        keys = list(dict.fromkeys(k for v in present for k in v))
+        return {k: _merge_field(k, [v.get(k) for v in present]) for k in keys}
+
+    flattened = []
+    for value in present:
+        flattened.extend(value if isinstance(value, list) else [value])
+
+    unique, seen = [], set()
+    for value in flattened:
+        key = _dedup_key(field, value)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(value)
+
+    if field in LIST_FIELDS or any(isinstance(v, list) for v in present):
+        return unique
+    if len(unique) == 1:
+        return unique[0]
+    return "\n".join(str(v) for v in unique)
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combina as extrações de cada trecho em um único resultado, removendo partes e valores duplicados."""
+    merged = {}
+    keys = list(dict.fromkeys(k for result in results for k in result))
+    for key in keys:
+        values = [result.get(key) for result in results]
+        if key in RESULT_BLOCKS:
+            blocks = [v for v in values if isinstance(v, dict)]
+            fields = list(dict.fromkeys(f for block in blocks for f in block))
+            merged[key] = {f: _merge_field(f, [block.get(f) for block in blocks]) for f in fields}
+        else:
+            merged[key] = _merge_field(key, values)
+    return merged
@@ -0,0 +1,153 @@
+# app/services/contract_cache.py
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from core.cache import cache
+from core.config import CONTRACT_CACHE_TTL, CONTRACT_CACHE_LOCAL_SIZE, CONTRACT_CACHE_LOCAL_TTL
+from core.database import AsyncSessionLocal
+from models import models
+from schemas import schemas
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "contract-cache:invalidate"
+FILL_LOCK_TTL_MS = 5000
+FILL_WAIT_SECONDS = 2.0
+FILL_POLL_INTERVAL = 0.05
+
+# contract_id -> (expira_em, geração, payload). Payload None marca uma geração invalidada que ainda não foi
+# recarregada, impedindo que um preenchimento iniciado antes da invalidação grave um valor antigo.
+_local: "OrderedDict[int, Tuple[float, int, Optional[str]]]" = OrderedDict()
+_inflight: Dict[int, asyncio.Task] = {}
+
+
+def _generation_key(contract_id: int) -> str:
+    return f"contract:{contract_id}:gen"
+
+def _payload_key(contract_id: int, generation: int) -> str:
+    return f"contract:{contract_id}:v{generation}"
+
+def _lock_key(contract_id: int) -> str:
+    return f"contract:{contract_id}:fill"
+
+
+def _remember(contract_id: int, generation: int, payload: Optional[str]):
+    current = _local.get(contract_id)
+    if current and current[1] > generation:
+        return
+    _local[contract_id] = (time.monotonic() + CONTRACT_CACHE_LOCAL_TTL, generation, payload)
+    _local.move_to_end(contract_id)
+    if len(_local) > CONTRACT_CACHE_LOCAL_SIZE:
+        _local.popitem(last=False)
+
+def _local_payload(contract_id: int) -> Optional[str]:
+    entry = _local.get(contract_id)
+    if not entry or entry[2] is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _local[contract_id]
+        return None
+    _local.move_to_end(contract_id)
+    return entry[2]
+
+
+async def _read_from_db(contract_id: int) -> Optional[str]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(models.Contract).where(
+            models.Contract.id == contract_id,
+            models.Contract.is_deleted == False
+        ))
+        contract = result.scalars().first()
+        if not contract:
+            return None
+        return schemas.ContractDetails.model_validate(contract).model_dump_json()
+
+async def _wait_for_fill(contract_id: int, generation: int) -> Optional[str]:
+    deadline = time.monotonic() + FILL_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(FILL_POLL_INTERVAL)
+        payload = await cache.get(_payload_key(contract_id, generation))
+        if payload is not None:
+            return payload
+        if not await cache.exists(_lock_key(contract_id)):
+            break
+    return await _read_from_db(contract_id)
+
+async def _fill(contract_id: int) -> Optional[str]:
+    generation = int(await cache.get(_generation_key(contract_id)) or 0)
+    payload = await cache.get(_payload_key(contract_id, generation))
+    if payload is None:
+        # Single-flight entre processos: só quem obtém o lock consulta o banco; os demais aguardam o resultado.
+        if await cache.set(_lock_key(contract_id), "1", nx=True, px=FILL_LOCK_TTL_MS):
+            try:
+                payload = await _read_from_db(contract_id)
+                if payload is not None:
+                    # Gravado sob a geração lida antes da consulta: se houve invalidação no meio, a chave já é órfã.
+                    await cache.set(_payload_key(contract_id, generation), payload, ex=CONTRACT_CACHE_TTL)
+            finally:
+                await cache.delete(_lock_key(contract_id))
+        else:
+            payload = await _wait_for_fill(contract_id, generation)
+    if payload is not None:
+        _remember(contract_id, generation, payload)
+    return payload
+
+
+async def get(contract_id: int) -> Optional[schemas.ContractDetails]:
+    """Retorna os detalhes de um contrato ativo, compartilhados entre todos os usuários.
+
+    O payload não depende de quem consulta: a verificação de permissão fica a cargo do chamador.
+    """
+    payload = _local_payload(contract_id)
+    if payload is None:
+        task = _inflight.get(contract_id)
+        if task is None:
+            # Single-flight no processo: requisições concorrentes para o mesmo contrato compartilham o preenchimento.
+            task = asyncio.ensure_future(_fill(contract_id))
+            _inflight[contract_id] = task
+            task.add_done_callback(lambda _: _inflight.pop(contract_id, None))
+        payload = await asyncio.shield(task)
+    if payload is None:
+        return None
+    return schemas.ContractDetails.model_validate_json(payload)
+
+async def invalidate(*contract_ids: int):
+    """Avança a geração dos contratos e avisa os demais processos para descartarem a cópia local."""
+    if not contract_ids:
+        return
+    async with cache.pipeline(transaction=False) as pipe:
+        for contract_id in contract_ids:
+            pipe.incr(_generation_key(contract_id))
+            pipe.expire(_generation_key(contract_id), CONTRACT_CACHE_TTL * 2)
+        results = await pipe.execute()
+    generations = results[::2]
+    async with cache.pipeline(transaction=False) as pipe:
+        for contract_id, generation in zip(contract_ids, generations):
+            _remember(contract_id, generation, None)
+            pipe.publish(INVALIDATION_CHANNEL, f"{contract_id}:{generation}")
+        await pipe.execute()
+
+async def listen_for_invalidations():
+    while True:
+        pubsub = cache.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Invalidações perdidas enquanto a conexão esteve fora não chegam mais: descarta a cópia local.
+            _local.clear()
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                contract_id, generation = map(int, message["data"].split(":"))
+                _remember(contract_id, generation, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Conexão de invalidação do cache de contratos perdida; reconectando")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
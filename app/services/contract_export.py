@@ -0,0 +1,178 @@
+# app/services/contract_export.py
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, text
+
+from models import models
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # pragma: no cover - dependência opcional, apenas para exportação em Parquet
+    pyarrow = None
+    parquet = None
+
+FORMATS = ("ndjson", "csv", "parquet")
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+COLUMNS = (
+    "id", "filename", "status", "created_at", "user_id", "ai_provider",
+    "analysis_summary", "max_monetary_value", "extracted_data",
+)
+
+# Exportações longas atravessam o statement_timeout padrão do pool; executar no início da transação do cursor.
+DISABLE_STATEMENT_TIMEOUT = text("SET LOCAL statement_timeout = 0")
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+def build_query(
+    status: Optional[models.ContractStatus] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    query = (
+        select(*(getattr(models.Contract, column) for column in COLUMNS))
+        .where(models.Contract.is_deleted == False)
+        .order_by(models.Contract.id)
+    )
+    if status:
+        query = query.where(models.Contract.status == status)
+    if user_id is not None:
+        query = query.where(models.Contract.user_id == user_id)
+    if created_from:
+        query = query.where(models.Contract.created_at >= created_from)
+    if created_to:
+        query = query.where(models.Contract.created_at < created_to)
+    return query
+
+
+def filename_for(export_format: str, gzip: bool) -> str:
+    name = f"contracts-{datetime.utcnow():%Y%m%dT%H%M%S}.{export_format}"
+    # No Parquet a compressão é aplicada por coluna, dentro do próprio arquivo.
+    return f"{name}.gz" if gzip and export_format != "parquet" else name
+
+
+class _TextEncoder:
+    def __init__(self, gzip: bool):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def _output(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        return self._compressor.compress(data) if self._compressor else data
+
+    def header(self) -> bytes:
+        return b""
+
+    def close(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+class _NdjsonEncoder(_TextEncoder):
+    def encode(self, rows: Sequence[Any]) -> bytes:
+        return self._output("".join(
+            json.dumps(dict(zip(COLUMNS, row)), default=str, ensure_ascii=False) + "\n" for row in rows
+        ))
+
+class _CsvEncoder(_TextEncoder):
+    def __init__(self, gzip: bool):
+        super().__init__(gzip)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _flush_buffer(self) -> bytes:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return self._output(text)
+
+    def header(self) -> bytes:
+        self._writer.writerow(COLUMNS)
+        return self._flush_buffer()
+
+    def encode(self, rows: Sequence[Any]) -> bytes:
+        for row in rows:
+            values = dict(zip(COLUMNS, row))
+            values["status"] = values["status"].value if values["status"] else None
+            values["extracted_data"] = json.dumps(values["extracted_data"], ensure_ascii=False) if values["extracted_data"] is not None else None
+            self._writer.writerow([values[column] for column in COLUMNS])
+        return self._flush_buffer()
+
+class _StreamSink(io.RawIOBase):
+    """Destino somente-escrita do ParquetWriter. Guarda os bytes até o próximo drain(), mas tell() segue a
+    posição total no arquivo: o writer usa essa posição para os offsets dos row groups gravados no rodapé."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+class _ParquetEncoder:
+    """Grava um row group por lote; os bytes de cada lote são liberados assim que escritos."""
+
+    def __init__(self, gzip: bool):
+        if pyarrow is None:
+            raise ExportUnavailable("Exportação em Parquet indisponível: instale o pacote pyarrow.")
+        self._schema = pyarrow.schema([
+            ("id", pyarrow.int64()),
+            ("filename", pyarrow.string()),
+            ("status", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+            ("user_id", pyarrow.int64()),
+            ("ai_provider", pyarrow.string()),
+            ("analysis_summary", pyarrow.string()),
+            ("max_monetary_value", pyarrow.decimal128(18, 2)),
+            ("extracted_data", pyarrow.string()),
+        ])
+        self._sink = _StreamSink()
+        self._writer = parquet.ParquetWriter(self._sink, self._schema, compression="gzip" if gzip else "snappy")
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: Sequence[Any]) -> bytes:
+        columns: Dict[str, List[Any]] = {column: [] for column in COLUMNS}
+        for row in rows:
+            for column, value in zip(COLUMNS, row):
+                if column == "status" and value is not None:
+                    value = value.value
+                elif column == "extracted_data" and value is not None:
+                    value = json.dumps(value, ensure_ascii=False)
+                columns[column].append(value)
+        self._writer.write_table(pyarrow.Table.from_pydict(columns, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def encoder_for(export_format: str, gzip: bool):
+    encoders = {"ndjson": _NdjsonEncoder, "csv": _CsvEncoder, "parquet": _ParquetEncoder}
+    return encoders[export_format](gzip)
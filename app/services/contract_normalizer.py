@@ -0,0 +1,304 @@
+# app/services/contract_normalizer.py
+import calendar
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import models
+from services.chunking import DOCUMENT_NUMBER, NOT_SPECIFIED, RESULT_BLOCKS
+from services.contract_search import parse_amount
+
+_CURRENCIES = {"R$": "BRL", "BRL": "BRL", "US$": "USD", "USD": "USD", "€": "EUR", "EUR": "EUR"}
+_AMOUNT = re.compile(r"(R\$|BRL|US\$|USD|€|EUR)\s*(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:,\d{1,2})?)")
+_DATE_NUMERIC = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b")
+_DATE_WRITTEN = re.compile(r"\b(\d{1,2})[ºo°]?\s+de\s+([a-zç]+)\s+de\s+(\d{4})\b")
+_DURATION = re.compile(r"\b(\d+)\s*(?:\([^)]*\)\s*)?(meses|mes|anos|ano)\b")
+_ADJUSTMENT_INDEX = re.compile(r"\b(IPCA-E|IPCA|IGP-?M|IGP-DI|INPC|INCC|SELIC|CDI)\b", re.IGNORECASE)
+_AUTO_RENEWAL = re.compile(
+    r"(n[aã]o\s+(?:(?:haver[aá]|h[aá]|ser[aá]|possui|tem|prev[eê])\s+)?)?"
+    r"(renova[cç][aã]o\s+autom[aá]tica|prorroga[cç][aã]o\s+autom[aá]tica|(?:renovad|prorrogad)[oa]s?\s+automaticamente)"
+)
+_ROLE_PREFIX = re.compile(r"^\s*([A-Za-zÀ-ú ]{3,30}?)\s*:\s+")
+
+_MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6, "julho": 7,
+    "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+_RECURRENCE_KEYWORDS = (
+    (models.Recurrence.MONTHLY, ("mensa", "por mes", "ao mes", "cada mes")),
+    (models.Recurrence.YEARLY, ("anual", "anuais", "por ano", "ao ano", "cada ano")),
+    (models.Recurrence.QUARTERLY, ("trimestra", "por trimestre")),
+    (models.Recurrence.SEMIANNUAL, ("semestra", "por semestre")),
+    (models.Recurrence.WEEKLY, ("semana",)),
+    (models.Recurrence.DAILY, ("diari", "por dia")),
+    (models.Recurrence.ONE_TIME, ("parcela unica", "pagamento unico", "a vista", "valor global", "valor total")),
+)
+
+_NUMBER_WORDS = {
+    "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5, "seis": 6, "sete": 7,
+    "oito": 8, "nove": 9, "dez": 10, "onze": 11, "doze": 12, "treze": 13, "quatorze": 14, "catorze": 14,
+    "quinze": 15, "dezesseis": 16, "dezessete": 17, "dezoito": 18, "dezenove": 19, "vinte": 20,
+    "trinta": 30, "quarenta": 40, "cinquenta": 50, "sessenta": 60, "setenta": 70, "oitenta": 80,
+    "noventa": 90, "cem": 100, "cento": 100, "duzentos": 200, "duzentas": 200, "trezentos": 300,
+    "trezentas": 300, "quatrocentos": 400, "quatrocentas": 400, "quinhentos": 500, "quinhentas": 500,
+    "seiscentos": 600, "seiscentas": 600, "setecentos": 700, "setecentas": 700, "oitocentos": 800,
+    "oitocentas": 800, "novecentos": 900, "novecentas": 900,
+}
+_SCALE_WORDS = {"mil": 10 ** 3, "milhao": 10 ** 6, "milhoes": 10 ** 6, "bilhao": 10 ** 9, "bilhoes": 10 ** 9}
+
+
+@dataclass
+class NormalizedParty:
+    name: str
+    role: Optional[str] = None
+    document: Optional[str] = None
+    document_type: Optional[str] = None
+
+@dataclass
+class NormalizedValue:
+    amount: Decimal
+    currency: str = "BRL"
+    recurrence: Optional[models.Recurrence] = None
+    description: Optional[str] = None
+
+@dataclass
+class NormalizedTerms:
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    is_indefinite: bool = False
+    auto_renewal: Optional[bool] = None
+    adjustment_index: Optional[str] = None
+    adjustment_recurrence: Optional[models.Recurrence] = None
+
+@dataclass
+class NormalizedContract:
+    parties: List[NormalizedParty] = field(default_factory=list)
+    values: List[NormalizedValue] = field(default_factory=list)
+    terms: NormalizedTerms = field(default_factory=NormalizedTerms)
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sem acentos, para comparar palavras-chave independentemente da grafia."""
+    return "".join(c for c in unicodedata.normalize("NFKD", text.lower()) if not unicodedata.combining(c))
+
+def _present(value: Any) -> bool:
+    return value not in (None, "", [], {}, NOT_SPECIFIED)
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, dict):
+        return " ".join(_as_text(v) for v in value.values() if _present(v))
+    if isinstance(value, list):
+        return " ".join(_as_text(v) for v in value if _present(v))
+    return str(value) if _present(value) else ""
+
+def _items(value: Any) -> List[Any]:
+    if not _present(value):
+        return []
+    return [item for item in (value if isinstance(value, list) else [value]) if _present(item)]
+
+def _pick(data: Dict[str, Any], *fragments: str) -> Optional[str]:
+    for key, value in data.items():
+        if any(fragment in _fold(key) for fragment in fragments) and _present(value):
+            return _as_text(value)
+    return None
+
+
+def _parse_document(text: str):
+    match = DOCUMENT_NUMBER.search(text)
+    if not match:
+        return None, None
+    digits = re.sub(r"\D", "", match.group())
+    return digits, "CNPJ" if len(digits) == 14 else "CPF"
+
+def parse_party(item: Any) -> Optional[NormalizedParty]:
+    if isinstance(item, dict):
+        name = _pick(item, "nome", "razao", "name", "parte")
+        role = _pick(item, "papel", "qualifica", "tipo", "role", "posicao")
+        document, document_type = _parse_document(_as_text(item))
+        if not name:
+            return None
+        return NormalizedParty(name=name.strip(), role=role, document=document, document_type=document_type)
+
+    text = str(item).strip()
+    document, document_type = _parse_document(text)
+    role = None
+    prefix = _ROLE_PREFIX.match(text)
+    if prefix:
+        role = prefix.group(1).strip()
+        text = text[prefix.end():]
+    # Remove o documento e seus rótulos do nome ("ACME LTDA, inscrita no CNPJ sob o nº ...").
+    name = re.split(r",|\(|\b(?:CNPJ|CPF|inscrit[oa]|portador[a]?)\b", text, maxsplit=1, flags=re.IGNORECASE)[0].strip(" -–;")
+    if not name:
+        return None
+    return NormalizedParty(name=name, role=role, document=document, document_type=document_type)
+
+
+def _recurrence(text: str) -> Optional[models.Recurrence]:
+    folded = _fold(text)
+    for recurrence, keywords in _RECURRENCE_KEYWORDS:
+        if any(keyword in folded for keyword in keywords):
+            return recurrence
+    return None
+
+def _spelled_amount(text: str) -> Optional[Decimal]:
+    """Converte valores por extenso ("cinco mil reais") em Decimal."""
+    words = re.findall(r"[a-z]+", _fold(text))
+    best = None
+    total, current, started = 0, 0, False
+    for index, word in enumerate(words):
+        if word in _NUMBER_WORDS:
+            current += _NUMBER_WORDS[word]
+            started = True
+        elif word in _SCALE_WORDS:
+            total += (current or 1) * _SCALE_WORDS[word]
+            current, started = 0, True
+        elif word == "e" and started:
+            continue
+        elif started:
+            if word in ("reais", "real") or (word == "de" and words[index + 1:index + 2] == ["reais"]):
+                best = Decimal(total + current)
+                break
+            total, current, started = 0, 0, False
+    return best
+
+def parse_value(item: Any) -> List[NormalizedValue]:
+    text = _as_text(item)
+    if not text:
+        return []
+    recurrence = _recurrence(text)
+    description = text[:500]
+    values = []
+    for symbol, number in _AMOUNT.findall(text):
+        amount = parse_amount(number)
+        if amount is not None:
+            values.append(NormalizedValue(amount=amount, currency=_CURRENCIES[symbol], recurrence=recurrence, description=description))
+    if not values:
+        amount = _spelled_amount(text)
+        if amount is not None:
+            values.append(NormalizedValue(amount=amount, recurrence=recurrence, description=description))
+    # "R$ 15.000,00 (quinze mil reais)" traz o mesmo valor duas vezes na mesma entrada.
+    unique = {}
+    for value in values:
+        unique.setdefault((value.amount, value.currency), value)
+    return list(unique.values())
+
+
+def _dates(text: str) -> List[date]:
+    found = []
+    folded = _fold(text)
+    for match in _DATE_NUMERIC.finditer(folded):
+        day, month, year = map(int, match.groups())
+        found.append((match.start(), day, month, year))
+    for match in _DATE_WRITTEN.finditer(folded):
+        month = _MONTHS.get(match.group(2))
+        if month:
+            found.append((match.start(), int(match.group(1)), month, int(match.group(3))))
+    dates = []
+    for _, day, month, year in sorted(found):
+        try:
+            dates.append(date(year, month, day))
+        except ValueError:
+            continue
+    return dates
+
+def _add_months(start: date, months: int) -> date:
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+def parse_terms(vigencia: Any, renovacao: Any = None, reajuste: Any = None) -> NormalizedTerms:
+    terms = NormalizedTerms()
+    text = _as_text(vigencia)
+    folded = _fold(text)
+
+    if isinstance(vigencia, dict):
+        start = _dates(_pick(vigencia, "inicio") or "")
+        end = _dates(_pick(vigencia, "fim", "termino", "final", "encerramento") or "")
+        terms.start_date = start[0] if start else None
+        terms.end_date = end[-1] if end else None
+    if terms.start_date is None and terms.end_date is None:
+        dates = _dates(text)
+        if len(dates) >= 2:
+            terms.start_date, terms.end_date = dates[0], dates[-1]
+        elif dates and re.search(r"\b(ate|termino|fim|encerr)", folded):
+            terms.end_date = dates[0]
+        elif dates:
+            terms.start_date = dates[0]
+
+    terms.is_indefinite = "indeterminad" in folded
+    duration = _DURATION.search(folded)
+    if terms.start_date and not terms.end_date and duration and not terms.is_indefinite:
+        months = int(duration.group(1)) * (12 if duration.group(2).startswith("ano") else 1)
+        terms.end_date = _add_months(terms.start_date, months)
+
+    renewal = _AUTO_RENEWAL.search(_fold(f"{text} {_as_text(renovacao)}"))
+    if renewal:
+        terms.auto_renewal = not renewal.group(1)
+
+    adjustment = _as_text(reajuste)
+    index = _ADJUSTMENT_INDEX.search(adjustment)
+    if index:
+        terms.adjustment_index = index.group(1).upper().replace("IGPM", "IGP-M")
+        terms.adjustment_recurrence = _recurrence(adjustment)
+    return terms
+
+
+def normalize(extracted_data: Optional[Dict[str, Any]]) -> NormalizedContract:
+    """Converte o JSON livre retornado pela IA em partes, valores e prazos tipados."""
+    fields: Dict[str, Any] = {}
+    if isinstance(extracted_data, dict):
+        for block in RESULT_BLOCKS:
+            if isinstance(extracted_data.get(block), dict):
+                fields.update(extracted_data[block])
+
+    result = NormalizedContract()
+    seen_parties = set()
+    for item in _items(fields.get("partes_envolvidas")):
+        party = parse_party(item)
+        if party is None:
+            continue
+        key = party.document or _fold(party.name)
+        if key in seen_parties:
+            continue
+        seen_parties.add(key)
+        result.parties.append(party)
+
+    seen_values = set()
+    for item in _items(fields.get("valores_monetarios")):
+        for value in parse_value(item):
+            key = (value.amount, value.currency, value.recurrence)
+            if key not in seen_values:
+                seen_values.add(key)
+                result.values.append(value)
+
+    result.terms = parse_terms(fields.get("vigencia"), fields.get("renovacao_contrato"), fields.get("reajuste_valores"))
+    return result
+
+
+def delete_statements(contract_ids: Iterable[int]):
+    contract_ids = list(contract_ids)
+    return [
+        delete(child).where(child.contract_id.in_(contract_ids))
+        for child in (models.ContractParty, models.ContractValue, models.ContractTerms)
+    ]
+
+def build_rows(contract_id: int, extracted_data: Optional[Dict[str, Any]]) -> List[Any]:
+    normalized = normalize(extracted_data)
+    rows: List[Any] = [
+        models.ContractParty(contract_id=contract_id, **vars(party)) for party in normalized.parties
+    ]
+    rows.extend(models.ContractValue(contract_id=contract_id, **vars(value)) for value in normalized.values)
+    rows.append(models.ContractTerms(contract_id=contract_id, **vars(normalized.terms)))
+    return rows
+
+async def store(db: AsyncSession, contract: models.Contract):
+    """Substitui as linhas normalizadas do contrato; gravadas no próximo commit do chamador."""
+    for statement in delete_statements([contract.id]):
+        await db.execute(statement)
+    db.add_all(build_rows(contract.id, contract.extracted_data))
@@ -0,0 +1,262 @@
+# app/services/contract_pipeline.py
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm.attributes import flag_modified
+
+from core import telemetry
+from core.database import AsyncSessionLocal
+from models import models
+from services import (file_processor, ai_providers, ai_service, job_queue, result_cache, contract_stats, contract_cache,
+                      contract_search, contract_normalizer, text_compaction)
+from services.chunking import merge_results
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_STEPS = 20
+# A análise antecipada só começa quando o texto bruto projetado para o documento inteiro (páginas lidas
+# extrapoladas ao total) ocupa no máximo esta fração do orçamento de tokens do provedor.
+PREFETCH_BUDGET_FRACTION = 0.5
+
+
+class RetryableError(Exception):
+    pass
+
+
+def _remove_upload(path: Optional[str]):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+async def _finish(db, contract: models.Contract, status: models.ContractStatus, summary: str = None, text: str = None):
+    previous_status = contract.status
+    path = contract.file_path
+    with telemetry.span("pipeline.persist", contract_id=contract.id, status=status.value):
+        contract.status = status
+        contract.analysis_summary = summary
+        if status == models.ContractStatus.SUCCESS:
+            # O checkpoint foi gravado por outra sessão; sem flag_modified, None -> None não geraria UPDATE.
+            contract.partial_data = None
+            flag_modified(contract, "partial_data")
+        contract_search.index_contract(contract, text)
+        if status == models.ContractStatus.SUCCESS:
+            await contract_normalizer.store(db, contract)
+        contract.file_path = None
+        await db.commit()
+    # Só depois do commit: se ele falhar, o retry ainda encontra o arquivo.
+    _remove_upload(path)
+    await contract_cache.invalidate(contract.id)
+    await contract_stats.record_transition(contract.user_id, previous_status, status)
+
+
+async def _load_pending(db, contract_id: int) -> Optional[models.Contract]:
+    """Contrato ainda a processar, travado até o commit da sessão. O upload de um contrato excluído é descartado."""
+    contract = await db.get(models.Contract, contract_id, with_for_update=True, populate_existing=True)
+    if not contract:
+        return None
+    if contract.is_deleted:
+        await _discard_deleted(db, contract)
+        return None
+    if contract.status != models.ContractStatus.PENDING:
+        return None
+    return contract
+
+async def _discard_deleted(db, contract: models.Contract):
+    path, contract.file_path = contract.file_path, None
+    # A exclusão já tira o contrato de PENDING e publica o evento terminal; aqui só restam linhas excluídas
+    # antes disso, cujos streams de progresso ainda esperam um.
+    stranded = contract.status == models.ContractStatus.PENDING
+    if stranded:
+        contract.status = models.ContractStatus.ERROR
+        contract.analysis_summary = "Contrato excluído antes do fim do processamento."
+    if path or stranded:
+        await db.commit()
+    _remove_upload(path)
+    if stranded:
+        await job_queue.publish(contract.id, "error", "ERRO: Contrato excluído durante o processamento.", batch_id=contract.batch_id)
+
+async def _complete(contract_id: int, status: models.ContractStatus, summary: str = None, text: str = None,
+                    **values) -> Optional[models.Contract]:
+    """Grava o resultado numa sessão própria, para que nenhuma conexão fique presa durante a extração e a IA."""
+    async with AsyncSessionLocal() as db:
+        contract = await _load_pending(db, contract_id)
+        if contract is None:
+            return None
+        for key, value in values.items():
+            setattr(contract, key, value)
+        await _finish(db, contract, status, summary, text)
+        return contract
+
+async def _publish_success(contract: Optional[models.Contract], contract_id: int, batch_id: Optional[int], message: str):
+    # Sem contrato, a análise já foi encerrada por outro caminho (ex.: exclusão), que publicou o evento terminal;
+    # um segundo evento faria o stream do lote contar o mesmo contrato duas vezes.
+    if contract is not None:
+        await job_queue.publish(contract_id, "success", message, batch_id=batch_id)
+
+async def fail_contract(contract_id: int, reason: str, **values):
+    contract = await _complete(contract_id, models.ContractStatus.ERROR, reason, **values)
+    if contract is not None:
+        await job_queue.publish(contract_id, "error", f"ERRO: {reason}", batch_id=contract.batch_id)
+
+
+class _PartialResults:
+    """Recebe os campos da resposta da IA à medida que chegam: publica cada um como evento "field" e grava o
+    acumulado em contracts.partial_data, para que detalhes e reconexões vejam o progresso da análise."""
+
+    def __init__(self, contract_id: int, batch_id: Optional[int]):
+        self.contract_id = contract_id
+        self.batch_id = batch_id
+        # parte -> (tentativa, campos); uma tentativa nova da mesma parte descarta os campos da anterior.
+        self.parts: Dict[Optional[int], Tuple[int, dict]] = {}
+        self.data: dict = {}
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, block: Optional[str], field: str, value: Any, part: Optional[int], attempt: int):
+        # Nem a publicação nem o checkpoint podem interromper a análise: o resultado final é gravado de qualquer
+        # forma, e uma exceção aqui voltaria ao provedor como falha da chamada (e contaria no circuit breaker).
+        try:
+            await job_queue.publish(
+                self.contract_id, "field", f"Campo extraído: {field}", batch_id=self.batch_id,
+                data={"block": block, "field": field, "value": value, "part": part, "attempt": attempt},
+            )
+        except Exception:
+            logger.warning("Falha ao publicar campo extraído do contrato %s", self.contract_id, exc_info=True)
+        try:
+            async with self._lock:
+                current_attempt, fields = self.parts.get(part, (attempt, {}))
+                if current_attempt != attempt:
+                    fields = {}
+                self.parts[part] = (attempt, merge_results([fields, {block: {field: value}} if block else {field: value}]))
+                self.data = merge_results([fields for _, (_, fields) in sorted(self.parts.items(), key=lambda item: item[0] or 0)])
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(models.Contract)
+                        .where(models.Contract.id == self.contract_id, models.Contract.status == models.ContractStatus.PENDING)
+                        .values(partial_data=self.data)
+                    )
+                    await db.commit()
+            await contract_cache.invalidate(self.contract_id)
+        except Exception:
+            logger.warning("Falha ao gravar resultado parcial do contrato %s", self.contract_id, exc_info=True)
+
+
+def _check_budget(compactor: text_compaction.Compactor, budget: int):
+    if compactor.tokens_after > budget:
+        raise ValueError(f"O documento excede o limite de {budget} tokens do provedor de IA (~{compactor.tokens_after} após compactação).")
+
+async def _extract_and_prefetch(contract_id: int, batch_id: Optional[int], path: str, name: str,
+                                analysis: ai_service.ChunkedExtraction, compactor: text_compaction.Compactor, budget: int) -> str:
+    """Extrai o texto página a página, publicando o progresso e alimentando a análise incremental com o texto compactado.
+
+    Retorna o texto original, usado no hash do cache de resultados e no índice de busca.
+    """
+    pages = []
+    with telemetry.span("pipeline.extract", contract_id=contract_id) as current:
+        async for number, total, text in file_processor.iter_pages(path, name):
+            pages.append(text)
+            analysis.feed(compactor.feed(text))
+            _check_budget(compactor, budget)
+            # O texto bruto limita o compactado; perto do limite, os trechos esperam o fim da extração.
+            if not analysis.prefetch and compactor.tokens_before * total <= number * budget * PREFETCH_BUDGET_FRACTION:
+                analysis.start_prefetch()
+            if total > 1 and (number == total or number % max(1, total // PROGRESS_STEPS) == 0):
+                await job_queue.publish(contract_id, "progress", f"Extraindo texto: página {number}/{total}", batch_id=batch_id)
+        analysis.feed(compactor.finish())
+        _check_budget(compactor, budget)
+        telemetry.DOCUMENT_PAGES.observe(len(pages))
+        telemetry.set_attribute(current, "document.pages", len(pages))
+        telemetry.set_attribute(current, "document.tokens_raw", compactor.tokens_before)
+        telemetry.set_attribute(current, "document.tokens_compacted", compactor.tokens_after)
+    return "".join(pages)
+
+
+async def process_contract(contract_id: int, provider: str, last_attempt: bool):
+    with telemetry.span("pipeline.process", contract_id=contract_id, provider=provider):
+        await _process_contract(contract_id, provider, last_attempt)
+
+async def _process_contract(contract_id: int, provider: str, last_attempt: bool):
+    async with AsyncSessionLocal() as db:
+        contract = await _load_pending(db, contract_id)
+        if contract is None:
+            return
+        name, batch_id, user_id = contract.filename, contract.batch_id, contract.user_id
+        file_path, file_hash = contract.file_path, contract.file_hash
+
+    await job_queue.publish(contract_id, "progress", f"Iniciando processo para o arquivo: {name}", batch_id=batch_id)
+    # Gravados também quando a análise falha.
+    values = {}
+    try:
+        if not file_path or not os.path.exists(file_path):
+            raise ValueError("Arquivo do contrato não está mais disponível para processamento.")
+
+        if file_hash:
+            cached = await result_cache.get_by_file(provider, file_hash)
+            if cached:
+                await result_cache.record_lookup(user_id, hit=True)
+                contract = await _complete(contract_id, models.ContractStatus.SUCCESS, text_hash=cached["text_hash"], extracted_data=cached["data"])
+                await _publish_success(contract, contract_id, batch_id, f"Finalizado! Contrato '{name}' analisado com sucesso (resultado reaproveitado).")
+                return
+
+        await job_queue.publish(contract_id, "progress", "Extraindo texto do arquivo...", batch_id=batch_id)
+        analysis = ai_service.ChunkedExtraction(provider, on_field=_PartialResults(contract_id, batch_id), prefetch=False)
+        compactor = text_compaction.Compactor()
+        try:
+            texto_extraido = await _extract_and_prefetch(
+                contract_id, batch_id, file_path, name, analysis, compactor,
+                ai_providers.router.get(provider).max_document_tokens,
+            )
+            if not texto_extraido:
+                raise ValueError("Não foi possível extrair texto do arquivo.")
+
+            values["text_hash"] = result_cache.text_digest(texto_extraido)
+            dados_analisados = await result_cache.get_by_text(provider, values["text_hash"])
+            if dados_analisados is not None:
+                # Resultado já conhecido: trechos adiantados deixam de consumir o limite do provedor.
+                analysis.cancel()
+            await result_cache.record_lookup(user_id, hit=dados_analisados is not None)
+            if dados_analisados is None:
+                if analysis.started_chunks:
+                    await job_queue.publish(contract_id, "progress", f"Concluindo análise da IA com {provider} ({analysis.started_chunks} trecho(s) já em andamento)...", batch_id=batch_id)
+                else:
+                    await job_queue.publish(contract_id, "progress", f"Enviando para análise da IA com {provider}...", batch_id=batch_id)
+                with telemetry.span("pipeline.ai", contract_id=contract_id, provider=provider, chunks=analysis.started_chunks):
+                    dados_analisados = await analysis.finish()
+                if dados_analisados.get("error"):
+                    raise RetryableError(f"Erro da IA: {dados_analisados.get('details')}")
+        finally:
+            analysis.cancel()
+            # Gravado também quando a extração falha ou o orçamento de tokens é excedido.
+            values["text_tokens_raw"] = compactor.tokens_before
+            values["text_tokens_compacted"] = compactor.tokens_after
+        await result_cache.store(provider, file_hash, values["text_hash"], dados_analisados)
+
+        contract = await _complete(contract_id, models.ContractStatus.SUCCESS, text=texto_extraido, extracted_data=dados_analisados, **values)
+        await _publish_success(contract, contract_id, batch_id, f"Finalizado! Contrato '{name}' analisado com sucesso.")
+    except RetryableError as e:
+        if not last_attempt:
+            await job_queue.publish(contract_id, "progress", f"Falha temporária ({e}). Nova tentativa agendada...", batch_id=batch_id)
+            raise
+        await fail_contract(contract_id, str(e), **values)
+    except Exception as e:
+        await fail_contract(contract_id, str(e), **values)
+
+
+async def recover_orphaned_contracts() -> int:
+    """Reenfileira contratos PENDING que não possuem job associado (ex.: worker reiniciado no meio do upload)."""
+    recovered = 0
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(models.Contract).where(models.Contract.status == models.ContractStatus.PENDING))
+        for contract in result.scalars().all():
+            if await job_queue.job_exists(contract.id):
+                continue
+            if contract.is_deleted:
+                await _load_pending(db, contract.id)
+                continue
+            if not contract.file_path or not os.path.exists(contract.file_path):
+                await _finish(db, contract, models.ContractStatus.ERROR, "Processamento interrompido e arquivo original indisponível.")
+                continue
+            await job_queue.enqueue(contract.id, {"provider": contract.ai_provider or "gemini"})
+            recovered += 1
+    return recovered
@@ -0,0 +1,147 @@
+# app/services/contract_search.py
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Text, cast, func, literal_column, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import SEARCH_TEXT_MAX_CHARS
+from core.pagination import encode_cursor, decode_cursor
+from models import models
+from services.chunking import DOCUMENT_NUMBER, MONEY, NOT_SPECIFIED, RESULT_BLOCKS
+
+_TS_CONFIG = literal_column("'portuguese'::regconfig")
+
+# Peso de cada grupo de campos no ranking. Os filtros por parte e por foro restringem a consulta ao peso do campo.
+PARTY_WEIGHT = "A"
+HEADLINE_WEIGHT = "B"   # nome do arquivo e objeto do contrato
+FORO_WEIGHT = "C"
+OTHER_WEIGHT = "D"      # demais campos extraídos e o texto do documento
+
+_OWN_WEIGHT_FIELDS = ("partes_envolvidas", "objeto_contrato", "foro")
+
+
+def _flatten(value: Any) -> List[str]:
+    if value in (None, "", NOT_SPECIFIED):
+        return []
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _flatten(item)]
+    if isinstance(value, list):
+        return [text for item in value for text in _flatten(item)]
+    return [str(value)]
+
+def _fields(extracted_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not isinstance(extracted_data, dict):
+        return {}
+    fields = {}
+    for block in RESULT_BLOCKS:
+        if isinstance(extracted_data.get(block), dict):
+            fields.update(extracted_data[block])
+    return fields
+
+def parse_amount(text: str) -> Optional[Decimal]:
+    """Converte um valor no formato brasileiro ("15.000,00") em Decimal."""
+    try:
+        return Decimal(text.replace(".", "").replace(",", "."))
+    except InvalidOperation:
+        return None
+
+def _weighted(text: str, weight: str):
+    return func.setweight(func.to_tsvector(_TS_CONFIG, cast(text, Text)), literal_column(f"'{weight}'"))
+
+def _weighted_query(terms: str, weight: str):
+    words = re.findall(r"\w+", terms)
+    if not words:
+        return None
+    return func.to_tsquery(_TS_CONFIG, cast(" & ".join(f"{word}:{weight}" for word in words), Text))
+
+
+def index_contract(contract: models.Contract, text: Optional[str] = None):
+    """Preenche as colunas de busca a partir dos dados extraídos; gravadas no próximo commit do chamador."""
+    fields = _fields(contract.extracted_data)
+    parties = " ".join(_flatten(fields.get("partes_envolvidas")))
+    headline = " ".join([contract.filename or ""] + _flatten(fields.get("objeto_contrato")))
+    foro = " ".join(_flatten(fields.get("foro")))
+    other = " ".join(
+        item for field, value in fields.items() if field not in _OWN_WEIGHT_FIELDS for item in _flatten(value)
+    )
+    if text:
+        other = f"{other} {text[:SEARCH_TEXT_MAX_CHARS]}"
+
+    contract.search_vector = (
+        _weighted(parties, PARTY_WEIGHT)
+        .op("||")(_weighted(headline, HEADLINE_WEIGHT))
+        .op("||")(_weighted(foro, FORO_WEIGHT))
+        .op("||")(_weighted(other, OTHER_WEIGHT))
+    )
+    contract.party_documents = sorted({re.sub(r"\D", "", number) for number in DOCUMENT_NUMBER.findall(parties)}) or None
+
+    amounts = [
+        amount
+        for item in _flatten(fields.get("valores_monetarios"))
+        for amount in map(parse_amount, MONEY.findall(item))
+        if amount is not None
+    ]
+    contract.max_monetary_value = max(amounts) if amounts else None
+
+
+async def search(
+    db: AsyncSession,
+    owner_id: Optional[int],
+    q: Optional[str] = None,
+    party: Optional[str] = None,
+    document: Optional[str] = None,
+    foro: Optional[str] = None,
+    min_value: Optional[Decimal] = None,
+    max_value: Optional[Decimal] = None,
+    status: Optional[models.ContractStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """Busca contratos ativos. Com `q`, ordena por relevância; sem ela, pelos mais recentes."""
+    contract = models.Contract
+    rank = None
+    columns = [contract.id, contract.filename, contract.status, contract.created_at, contract.user_id, contract.max_monetary_value]
+    if q:
+        tsquery = func.websearch_to_tsquery(_TS_CONFIG, cast(q, Text))
+        rank = func.ts_rank_cd(contract.search_vector, tsquery)
+        columns.append(rank.label("rank"))
+
+    query = select(*columns).where(contract.is_deleted == False)
+    if owner_id is not None:
+        query = query.where(contract.user_id == owner_id)
+    if status:
+        query = query.where(contract.status == status)
+    if q:
+        query = query.where(contract.search_vector.op("@@")(tsquery))
+    for terms, weight in ((party, PARTY_WEIGHT), (foro, FORO_WEIGHT)):
+        weighted_query = _weighted_query(terms, weight) if terms else None
+        if weighted_query is not None:
+            query = query.where(contract.search_vector.op("@@")(weighted_query))
+    if document:
+        query = query.where(contract.party_documents.contains([re.sub(r"\D", "", document)]))
+    if min_value is not None:
+        query = query.where(contract.max_monetary_value >= min_value)
+    if max_value is not None:
+        query = query.where(contract.max_monetary_value <= max_value)
+
+    if rank is not None:
+        if cursor:
+            last_rank, last_id = decode_cursor(cursor, float, int)
+            query = query.where(tuple_(rank, contract.id) < tuple_(last_rank, last_id))
+        query = query.order_by(rank.desc(), contract.id.desc())
+    else:
+        if cursor:
+            created_at, last_id = decode_cursor(cursor, datetime, int)
+            query = query.where(tuple_(contract.created_at, contract.id) < tuple_(created_at, last_id))
+        query = query.order_by(contract.created_at.desc(), contract.id.desc())
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.rank, last.id) if rank is not None else encode_cursor(last.created_at, last.id)
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,105 @@
+# app/services/contract_stats.py
+from typing import Dict, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import cache
+from models import models
+
+GLOBAL_KEY = "stats:contracts:global"
+USER_KEY_PATTERN = "stats:contracts:user:*"
+
+# Só incrementa contadores já inicializados: uma chave ausente é recalculada do banco na próxima leitura,
+# em vez de nascer com um valor parcial.
+_INCREMENT_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        for i = 1, #ARGV, 2 do
+            redis.call('HINCRBY', key, ARGV[i], ARGV[i + 1])
+        end
+    end
+end
+return 1
+"""
+
+
+def _user_key(user_id: int) -> str:
+    return f"stats:contracts:user:{user_id}"
+
+def _keys(user_id: Optional[int]):
+    return [GLOBAL_KEY] if user_id is None else [GLOBAL_KEY, _user_key(user_id)]
+
+def _empty() -> Dict[str, int]:
+    return {contract_status.value: 0 for contract_status in models.ContractStatus}
+
+
+async def _apply(user_id: Optional[int], deltas: Dict[models.ContractStatus, int]):
+    args = []
+    for contract_status, delta in deltas.items():
+        args.extend([contract_status.value, delta])
+    keys = _keys(user_id)
+    await cache.eval(_INCREMENT_SCRIPT, len(keys), *keys, *args)
+
+async def record_created(user_id: Optional[int], count: int = 1):
+    await _apply(user_id, {models.ContractStatus.PENDING: count})
+
+async def record_transition(user_id: Optional[int], old: models.ContractStatus, new: models.ContractStatus):
+    if old != new:
+        await _apply(user_id, {old: -1, new: 1})
+
+async def record_removed(user_id: Optional[int], contract_status: models.ContractStatus):
+    await _apply(user_id, {contract_status: -1})
+
+async def invalidate_user(user_id: int):
+    await cache.delete(_user_key(user_id))
+
+
+async def _count(db: AsyncSession, user_id: Optional[int]) -> Dict[str, int]:
+    query = (
+        select(models.Contract.status, func.count())
+        .where(models.Contract.is_deleted == False)
+        .group_by(models.Contract.status)
+    )
+    if user_id is not None:
+        query = query.where(models.Contract.user_id == user_id)
+    counts = _empty()
+    counts.update({contract_status.value: count for contract_status, count in (await db.execute(query)).all()})
+    return counts
+
+async def get_counts(db: AsyncSession, user_id: Optional[int]) -> Dict[str, int]:
+    """Lê os contadores do Redis; se ainda não existirem, calcula com uma única consulta agrupada e os inicializa."""
+    key = GLOBAL_KEY if user_id is None else _user_key(user_id)
+    cached = await cache.hgetall(key)
+    if cached:
+        counts = _empty()
+        counts.update({field: max(0, int(value)) for field, value in cached.items()})
+        return counts
+
+    counts = await _count(db, user_id)
+    await cache.hset(key, mapping=counts)
+    return counts
+
+async def reconcile(db: AsyncSession) -> int:
+    """Recalcula todos os contadores a partir do banco, corrigindo qualquer divergência acumulada."""
+    result = await db.execute(
+        select(models.Contract.user_id, models.Contract.status, func.count())
+        .where(models.Contract.is_deleted == False)
+        .group_by(models.Contract.user_id, models.Contract.status)
+    )
+    global_counts = _empty()
+    per_user: Dict[int, Dict[str, int]] = {}
+    for user_id, contract_status, count in result.all():
+        global_counts[contract_status.value] += count
+        if user_id is not None:
+            per_user.setdefault(user_id, _empty())[contract_status.value] = count
+
+    stale = [key async for key in cache.scan_iter(match=USER_KEY_PATTERN)]
+    async with cache.pipeline(transaction=True) as pipe:
+        if stale:
+            pipe.delete(*stale)
+        pipe.hset(GLOBAL_KEY, mapping=global_counts)
+        for user_id, counts in per_user.items():
+            pipe.hset(_user_key(user_id), mapping=counts)
+        await pipe.execute()
+    return len(per_user)
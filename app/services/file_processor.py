@@ -1,39 +1,189 @@
 # app/services/file_processor.py
 
-import io
+import asyncio
+import logging
+import math
+import mmap
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import AsyncGenerator, List, Tuple, Optional
 from fastapi import HTTPException, status
 import PyPDF2
 import docx
 
-async def extract_text(content: bytes, filename: str) -> str:
-    file_stream = io.BytesIO(content)
-    
-    if filename.endswith('.pdf'):
+from core.config import (EXTRACTION_WORKERS, EXTRACTION_PAGES_PER_TASK,
+                         EXTRACTION_CPU_SECONDS, EXTRACTION_MAX_MEMORY_MB)
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - indisponível no Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class ExtractionLimitExceeded(Exception):
+    pass
+
+
+def _cpu_exceeded(signum, frame):
+    raise ExtractionLimitExceeded("limite de CPU excedido")
+
+def _init_worker(max_memory_mb: int):
+    if not resource:
+        return
+    if max_memory_mb > 0:
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # O RLIMIT_CPU interrompe a tarefa mesmo no meio de uma página, onde a checagem entre páginas não chega.
+    # O limite flexível é ajustado por tarefa (_cpu_limit); o rígido não é tocado, pois não poderia ser elevado de volta.
+    signal.signal(signal.SIGXCPU, _cpu_exceeded)
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=EXTRACTION_WORKERS,
+            initializer=_init_worker,
+            initargs=(EXTRACTION_MAX_MEMORY_MB,),
+        )
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # Um processo filho que morreu (ex.: limite de memória) quebra o pool inteiro; o próximo get_pool cria outro.
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# As funções abaixo rodam nos processos do pool; o limite de CPU é medido por tarefa.
+
+@contextmanager
+def _cpu_limit(seconds: float):
+    if not resource:
+        yield
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+def _open_mapped(path: str) -> mmap.mmap:
+    # O PdfReader copia o arquivo inteiro para memória quando recebe um caminho; com mmap
+    # as páginas são lidas sob demanda do page cache do sistema operacional.
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _pdf_page_count(path: str) -> int:
+    # Ler a árvore de páginas já percorre o xref inteiro: um PDF hostil pode travar o processo antes das páginas.
+    with _cpu_limit(EXTRACTION_CPU_SECONDS), _open_mapped(path) as mapped:
+        return len(PyPDF2.PdfReader(mapped).pages)
+
+def _extract_pdf_pages(path: str, start: int, end: int, cpu_budget: float) -> List[Tuple[int, str, float]]:
+    cpu_start = time.process_time()
+    pages = []
+    with _cpu_limit(cpu_budget), _open_mapped(path) as mapped:
+        reader = PyPDF2.PdfReader(mapped)
+        for number in range(start, end):
+            page_start = time.perf_counter()
+            text = reader.pages[number].extract_text() or ""
+            pages.append((number + 1, text, time.perf_counter() - page_start))
+            if time.process_time() - cpu_start > cpu_budget:
+                raise ExtractionLimitExceeded(f"limite de CPU excedido na página {number + 1}")
+    return pages
+
+def _extract_docx(path: str, cpu_budget: float) -> str:
+    with _cpu_limit(cpu_budget):
+        document = docx.Document(path)
+        return "\n".join([para.text for para in document.paragraphs])
+
+
+async def _run(func, *args):
+    pool = get_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+async def _iter_pdf_pages(path: str) -> AsyncGenerator[Tuple[int, int, str], None]:
+    page_count = await _run(_pdf_page_count, path)
+    ranges = [(start, min(start + EXTRACTION_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, EXTRACTION_PAGES_PER_TASK)]
+    # Cada intervalo recebe a fatia do orçamento de CPU do arquivo proporcional às suas páginas.
+    def budget(start: int, end: int) -> float:
+        return EXTRACTION_CPU_SECONDS * (end - start) / max(page_count, 1)
+
+    # Todos os intervalos são submetidos de imediato; as páginas são entregues em ordem assim que
+    # cada intervalo termina. Encerrar o gerador cancela os intervalos que ainda não começaram no pool.
+    tasks = [asyncio.ensure_future(_run(_extract_pdf_pages, path, start, end, budget(start, end))) for start, end in ranges]
+    timings = []
+    try:
+        for task in tasks:
+            for number, text, seconds in await task:
+                timings.append((number, seconds))
+                yield number, page_count, text
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    slowest = sorted(timings, key=lambda t: t[1], reverse=True)[:3]
+    logger.info(
+        "PDF %s: %s páginas extraídas (%.2fs somando todas as páginas); mais lentas: %s",
+        path, page_count, sum(t[1] for t in timings),
+        ", ".join(f"p{number}={seconds:.2f}s" for number, seconds in slowest),
+    )
+
+async def iter_pages(path: str, filename: str) -> AsyncGenerator[Tuple[int, int, str], None]:
+    """Gera (página, total de páginas, texto) à medida que o documento é processado."""
+    # O arquivo gravado usa a extensão já normalizada no upload; o nome original pode vir como "CONTRATO.PDF".
+    extension = os.path.splitext(path)[1].lower() or os.path.splitext(filename)[1].lower()
+    if extension == '.pdf':
         try:
-            reader = PyPDF2.PdfReader(file_stream)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-            return text
+            async for page in _iter_pdf_pages(path):
+                yield page
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Error processing PDF file: {e}"
             )
-    
-    elif filename.endswith('.docx'):
+
+    elif extension == '.docx':
         try:
-            document = docx.Document(file_stream)
-            text = "\n".join([para.text for para in document.paragraphs])
-            return text
+            started = time.perf_counter()
+            text = await asyncio.wait_for(_run(_extract_docx, path, EXTRACTION_CPU_SECONDS), timeout=EXTRACTION_CPU_SECONDS)
+            logger.info("DOCX %s extraído em %.2fs", path, time.perf_counter() - started)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Error processing DOCX file: {e}"
             )
-            
+        yield 1, 1, text
+
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Unsupported file type. Please upload a .pdf or .docx file."
-        )
\ No newline at end of file
+        )
+
+async def extract_text(path: str, filename: str) -> str:
+    return "".join([text async for _, _, text in iter_pages(path, filename)])
@@ -0,0 +1,195 @@
+# app/services/job_queue.py
+import json
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+from core.cache import cache
+from core.config import JOB_MAX_ATTEMPTS, JOB_VISIBILITY_TIMEOUT, JOB_BACKOFF_BASE
+
+READY_KEY = "jobs:ready"
+DELAYED_KEY = "jobs:delayed"
+INFLIGHT_KEY = "jobs:inflight"
+DEAD_KEY = "jobs:dead"
+EVENTS_TTL = 3600
+EVENTS_MAX = 200
+
+TERMINAL_EVENTS = ("success", "error")
+
+# Cria o job apenas se ele ainda não existir, tornando o enfileiramento idempotente.
+_ENQUEUE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], 'payload', ARGV[2], 'attempts', 0, 'enqueued_at', ARGV[3])
+redis.call('LPUSH', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Move o próximo job pronto para a lista de execução com prazo de visibilidade.
+_RESERVE_SCRIPT = """
+local job_id = redis.call('RPOP', KEYS[1])
+if not job_id then return nil end
+redis.call('ZADD', KEYS[2], ARGV[1], job_id)
+return job_id
+"""
+
+# Devolve à fila os jobs com visibilidade expirada e os retries cujo backoff terminou.
+_REQUEUE_SCRIPT = """
+local moved = 0
+for _, key in ipairs({KEYS[1], KEYS[2]}) do
+    local due = redis.call('ZRANGEBYSCORE', key, '-inf', ARGV[1])
+    for _, job_id in ipairs(due) do
+        redis.call('ZREM', key, job_id)
+        redis.call('LPUSH', KEYS[3], job_id)
+        moved = moved + 1
+    end
+end
+return moved
+"""
+
+
+def _data_key(job_id: str) -> str:
+    return f"jobs:data:{job_id}"
+
+def progress_channel(contract_id: int) -> str:
+    return f"contract:{contract_id}:progress"
+
+def _events_key(contract_id: int) -> str:
+    return f"contract:{contract_id}:events"
+
+def _seq_key(contract_id: int) -> str:
+    return f"contract:{contract_id}:seq"
+
+def batch_channel(batch_id: int) -> str:
+    return f"batch:{batch_id}:progress"
+
+
+async def enqueue(contract_id: int, payload: Dict[str, Any]) -> bool:
+    job_id = str(contract_id)
+    created = await cache.eval(
+        _ENQUEUE_SCRIPT, 2, _data_key(job_id), READY_KEY, job_id, json.dumps(payload), time.time()
+    )
+    return bool(created)
+
+async def enqueue_many(jobs: List[Tuple[int, Dict[str, Any]]]):
+    now = time.time()
+    async with cache.pipeline(transaction=False) as pipe:
+        for contract_id, payload in jobs:
+            job_id = str(contract_id)
+            pipe.eval(_ENQUEUE_SCRIPT, 2, _data_key(job_id), READY_KEY, job_id, json.dumps(payload), now)
+        await pipe.execute()
+
+async def reserve() -> Optional[Dict[str, Any]]:
+    deadline = time.time() + JOB_VISIBILITY_TIMEOUT
+    job_id = await cache.eval(_RESERVE_SCRIPT, 2, READY_KEY, INFLIGHT_KEY, deadline)
+    if job_id is None:
+        return None
+
+    data = await cache.hgetall(_data_key(job_id))
+    if not data:
+        await cache.zrem(INFLIGHT_KEY, job_id)
+        return None
+
+    attempts = await cache.hincrby(_data_key(job_id), "attempts", 1)
+    enqueued_at = float(data["enqueued_at"]) if data.get("enqueued_at") else None
+    return {"id": job_id, "attempts": attempts, "payload": json.loads(data["payload"]), "enqueued_at": enqueued_at}
+
+async def extend_visibility(job_id: str):
+    await cache.zadd(INFLIGHT_KEY, {job_id: time.time() + JOB_VISIBILITY_TIMEOUT}, xx=True)
+
+async def ack(job_id: str):
+    async with cache.pipeline(transaction=True) as pipe:
+        pipe.zrem(INFLIGHT_KEY, job_id)
+        pipe.delete(_data_key(job_id))
+        await pipe.execute()
+
+async def fail(job_id: str, attempts: int) -> bool:
+    """Agenda um novo retry com backoff exponencial; retorna False se o job foi para a dead-letter."""
+    if attempts >= JOB_MAX_ATTEMPTS:
+        async with cache.pipeline(transaction=True) as pipe:
+            pipe.zrem(INFLIGHT_KEY, job_id)
+            pipe.lpush(DEAD_KEY, job_id)
+            pipe.delete(_data_key(job_id))
+            await pipe.execute()
+        return False
+
+    retry_at = time.time() + JOB_BACKOFF_BASE * (2 ** (attempts - 1))
+    async with cache.pipeline(transaction=True) as pipe:
+        pipe.zrem(INFLIGHT_KEY, job_id)
+        pipe.zadd(DELAYED_KEY, {job_id: retry_at})
+        await pipe.execute()
+    return True
+
+async def requeue_due() -> int:
+    return await cache.eval(_REQUEUE_SCRIPT, 3, INFLIGHT_KEY, DELAYED_KEY, READY_KEY, time.time())
+
+async def job_exists(contract_id: int) -> bool:
+    return bool(await cache.exists(_data_key(str(contract_id))))
+
+
+async def publish(contract_id: int, event_type: str, message: str, batch_id: Optional[int] = None, data: Optional[Dict[str, Any]] = None):
+    seq = await cache.incr(_seq_key(contract_id))
+    event = {"seq": seq, "type": event_type, "message": message}
+    if data is not None:
+        event["data"] = data
+    async with cache.pipeline(transaction=True) as pipe:
+        pipe.expire(_seq_key(contract_id), EVENTS_TTL)
+        pipe.rpush(_events_key(contract_id), json.dumps(event))
+        pipe.ltrim(_events_key(contract_id), -EVENTS_MAX, -1)
+        pipe.expire(_events_key(contract_id), EVENTS_TTL)
+        pipe.publish(progress_channel(contract_id), json.dumps(event))
+        if batch_id is not None:
+            pipe.publish(batch_channel(batch_id), json.dumps({**event, "contract_id": contract_id}))
+        await pipe.execute()
+
+async def subscribe(contract_id: int) -> AsyncGenerator[Dict[str, Any], None]:
+    """Repete os eventos já publicados e acompanha os novos até um evento terminal."""
+    pubsub = cache.pubsub()
+    await pubsub.subscribe(progress_channel(contract_id))
+    try:
+        last_seq = 0
+        for raw in await cache.lrange(_events_key(contract_id), 0, -1):
+            event = json.loads(raw)
+            last_seq = event["seq"]
+            yield event
+            if event["type"] in TERMINAL_EVENTS:
+                return
+
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            event = json.loads(message["data"])
+            # Eventos publicados entre o subscribe e o LRANGE chegam também pelo canal.
+            if event["seq"] <= last_seq:
+                continue
+            last_seq = event["seq"]
+            yield event
+            if event["type"] in TERMINAL_EVENTS:
+                return
+    finally:
+        await pubsub.unsubscribe(progress_channel(contract_id))
+        await pubsub.aclose()
+
+
+async def subscribe_batch(batch_id: int, count_pending: Callable[[], Awaitable[int]]) -> AsyncGenerator[Dict[str, Any], None]:
+    """Acompanha os eventos de todos os contratos de um lote até que os pendentes terminem.
+
+    `count_pending` é chamado depois da inscrição no canal, para que nenhum término se perca entre
+    a contagem e o início da escuta.
+    """
+    pubsub = cache.pubsub()
+    await pubsub.subscribe(batch_channel(batch_id))
+    try:
+        pending = await count_pending()
+        if pending <= 0:
+            return
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            event = json.loads(message["data"])
+            yield event
+            if event["type"] in TERMINAL_EVENTS:
+                pending -= 1
+                if pending <= 0:
+                    return
+    finally:
+        await pubsub.unsubscribe(batch_channel(batch_id))
+        await pubsub.aclose()
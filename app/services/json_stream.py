@@ -0,0 +1,145 @@
+# app/services/json_stream.py
+import json
+from typing import Any, List, Optional, Tuple
+
+from services.chunking import RESULT_BLOCKS
+
+# (bloco, campo, valor); bloco é None para campos no primeiro nível do objeto.
+Field = Tuple[Optional[str], str, Any]
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "state", "value_start")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.key: Optional[str] = None
+        self.state = "key"  # objetos: key -> colon -> value -> after
+        self.value_start: Optional[int] = None
+
+
+class FieldParser:
+    """Parser JSON incremental e tolerante para a resposta da IA.
+
+    Ignora tudo antes do primeiro "{" (cercas ```json, texto introdutório) e depois do fechamento do
+    objeto raiz. A cada trecho recebido devolve os campos cujo valor acabou de se completar: os campos
+    de primeiro nível e os campos dentro dos blocos de RESULT_BLOCKS, sem esperar o restante da resposta.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+    @property
+    def done(self) -> bool:
+        return self._root_end is not None
+
+    def feed(self, piece: str) -> List[Field]:
+        self._text += piece
+        fields: List[Field] = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            i, ch = self._pos, text[self._pos]
+            self._pos += 1
+            if self._root_start is None:
+                if ch == "{":
+                    self._root_start = i
+                    self._stack.append(_Frame("{"))
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._string_closed(i, fields)
+                continue
+
+            frame = self._stack[-1]
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._begin_value(frame, i)
+            elif ch in "{[":
+                self._begin_value(frame, i)
+                self._stack.append(_Frame(ch))
+            elif ch in "}]":
+                self._end_scalar(frame, i, fields)
+                self._stack.pop()
+                if not self._stack:
+                    self._root_end = i + 1
+                else:
+                    self._value_done(self._stack[-1], i + 1, fields)
+            elif ch == ":":
+                if frame.kind == "{" and frame.state == "colon":
+                    frame.state = "value"
+            elif ch == ",":
+                self._end_scalar(frame, i, fields)
+                if frame.kind == "{":
+                    frame.state, frame.key, frame.value_start = "key", None, None
+            elif not ch.isspace():
+                self._begin_value(frame, i)  # número, true, false ou null
+        return fields
+
+    def _begin_value(self, frame: _Frame, i: int):
+        if frame.kind == "{" and frame.state == "value" and frame.value_start is None:
+            frame.value_start = i
+
+    def _string_closed(self, i: int, fields: List[Field]):
+        frame = self._stack[-1]
+        if frame.kind != "{":
+            return
+        if frame.state == "key":
+            try:
+                frame.key = json.loads(self._text[self._string_start:i + 1])
+            except ValueError:
+                frame.key = self._text[self._string_start + 1:i]
+            frame.state = "colon"
+        elif frame.state == "value" and frame.value_start == self._string_start:
+            self._value_done(frame, i + 1, fields)
+
+    def _end_scalar(self, frame: _Frame, i: int, fields: List[Field]):
+        if frame.kind == "{" and frame.state == "value" and frame.value_start is not None:
+            self._value_done(frame, i, fields)
+
+    def _value_done(self, frame: _Frame, end: int, fields: List[Field]):
+        if frame.kind != "{" or frame.state != "value" or frame.value_start is None:
+            return
+        frame.state = "after"
+        depth = len(self._stack)
+        if depth == 1:
+            block = None
+        elif depth == 2 and self._stack[0].key in RESULT_BLOCKS:
+            block = self._stack[0].key
+        else:
+            return
+        try:
+            value = json.loads(self._text[frame.value_start:end])
+        except ValueError:
+            return
+        # Os campos de um bloco já foram emitidos um a um; o bloco inteiro não é repetido.
+        if block is None and frame.key in RESULT_BLOCKS and isinstance(value, dict):
+            return
+        fields.append((block, frame.key, value))
+
+    def result(self) -> dict:
+        """Objeto raiz completo; o texto fora dele é descartado."""
+        if self._root_start is None:
+            raise ValueError("a resposta não contém um objeto JSON")
+        if not self.done:
+            raise ValueError("a resposta terminou antes do fechamento do objeto JSON")
+        return json.loads(self._text[self._root_start:self._root_end])
+
+
+def parse(text: str) -> dict:
+    parser = FieldParser()
+    parser.feed(text)
+    return parser.result()
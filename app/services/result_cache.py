@@ -0,0 +1,69 @@
+# app/services/result_cache.py
+import hashlib
+import json
+import re
+from typing import Optional, Dict, Any
+
+from core.cache import cache
+from core.config import AI_RESULT_CACHE_TTL
+from services.ai_service import PROMPT_VERSION, model_for
+
+HITS_KEY = "ai_cache:hits"
+MISSES_KEY = "ai_cache:misses"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def text_digest(text: str) -> str:
+    normalized = _WHITESPACE.sub(" ", text).strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _prefix(provider: str) -> str:
+    return f"ai_result:{provider}:{model_for(provider)}:{PROMPT_VERSION}"
+
+def _text_key(provider: str, text_hash: str) -> str:
+    return f"{_prefix(provider)}:text:{text_hash}"
+
+def _file_key(provider: str, file_hash: str) -> str:
+    return f"{_prefix(provider)}:file:{file_hash}"
+
+
+async def get_by_file(provider: str, file_hash: str) -> Optional[Dict[str, Any]]:
+    """Retorna (text_hash, resultado) para um arquivo já analisado, sem precisar extrair o texto."""
+    text_hash = await cache.get(_file_key(provider, file_hash))
+    if not text_hash:
+        return None
+    data = await get_by_text(provider, text_hash)
+    if data is None:
+        return None
+    return {"text_hash": text_hash, "data": data}
+
+async def get_by_text(provider: str, text_hash: str) -> Optional[Dict[str, Any]]:
+    cached = await cache.get(_text_key(provider, text_hash))
+    if not cached:
+        return None
+    try:
+        return json.loads(cached)
+    except json.JSONDecodeError:
+        return None
+
+async def store(provider: str, file_hash: str, text_hash: str, data: Dict[str, Any]):
+    async with cache.pipeline(transaction=False) as pipe:
+        pipe.set(_text_key(provider, text_hash), json.dumps(data), ex=AI_RESULT_CACHE_TTL)
+        if file_hash:
+            pipe.set(_file_key(provider, file_hash), text_hash, ex=AI_RESULT_CACHE_TTL)
+        await pipe.execute()
+
+
+async def record_lookup(user_id: int, hit: bool):
+    await cache.hincrby(HITS_KEY if hit else MISSES_KEY, str(user_id), 1)
+
+async def hit_rates() -> Dict[str, Dict[str, Any]]:
+    hits = await cache.hgetall(HITS_KEY)
+    misses = await cache.hgetall(MISSES_KEY)
+    stats = {}
+    for user_id in set(hits) | set(misses):
+        h, m = int(hits.get(user_id, 0)), int(misses.get(user_id, 0))
+        stats[user_id] = {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 4) if h + m else 0.0}
+    return stats
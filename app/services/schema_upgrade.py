@@ -0,0 +1,50 @@
+# app/services/schema_upgrade.py
+import logging
+
+from sqlalchemy import Enum, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+from core.database import Base
+from services.audit_partitions import PARENT as AUDIT_TABLE
+
+logger = logging.getLogger(__name__)
+
+# Índices que deixaram de existir no modelo (substituídos pelos índices de prefixo/trigrama da busca de usuários).
+DROPPED_INDEXES = ("ix_users_first_name", "ix_users_last_name")
+
+
+def upgrade(conn: Connection) -> int:
+    """Atualiza tabelas criadas por versões anteriores; roda depois do create_all, que não altera tabelas existentes.
+
+    Idempotente: adiciona colunas, índices e valores de enum ausentes e remove índices aposentados. A auditoria
+    fica de fora (exceto o enum de ações), pois é convertida por `python audit_partitions.py migrate-legacy`.
+    Retorna o número de colunas adicionadas.
+    """
+    preparer = conn.dialect.identifier_preparer
+    existing = set(inspect(conn).get_table_names())
+    added = 0
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        for column in table.columns:
+            if isinstance(column.type, Enum) and column.type.name:
+                for value in column.type.enums:
+                    conn.execute(text(f"ALTER TYPE {preparer.quote(column.type.name)} ADD VALUE IF NOT EXISTS '{value}'"))
+        if table.name == AUDIT_TABLE:
+            continue
+        present = {column["name"] for column in inspect(conn).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN IF NOT EXISTS {CreateColumn(column).compile(dialect=conn.dialect)}"
+            for foreign_key in column.foreign_keys:
+                ddl += f" REFERENCES {preparer.format_table(foreign_key.column.table)} ({preparer.quote(foreign_key.column.name)})"
+            conn.execute(text(ddl))
+            logger.info("Coluna %s.%s adicionada", table.name, column.name)
+            added += 1
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    for name in DROPPED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {preparer.quote(name)}"))
+    return added
@@ -0,0 +1,120 @@
+# app/services/text_compaction.py
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Set
+
+from core.config import COMPACTION_SAMPLE_PAGES, COMPACTION_DEDUP_MIN_CHARS
+from services.ai_providers import CHARS_PER_TOKEN
+
+# Linhas do topo e da base de cada página examinadas como possível cabeçalho/rodapé.
+EDGE_LINES = 3
+MIN_PAGES_FOR_REPETITION = 3
+
+_SPACES = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_RUNS = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+# "12", "- 12 -", "Página 3 de 10", "pág. 3/10"
+_PAGE_NUMBER = re.compile(
+    r"^(?:p[áa]g(?:ina)?\.?\s*)?\d{1,4}(?:\s*(?:/|de)\s*\d{1,4})?$|^[-–]\s*\d{1,4}\s*[-–]$", re.IGNORECASE
+)
+# Linhas de assinatura e separadores ("______", "..........", "------").
+_RULE_LINE = re.compile(r"^[_.\-–=*\s]*[_.\-–=*]{3}[_.\-–=*\s]*$")
+
+
+def _normalize_line(line: str) -> str:
+    return _SPACES.sub(" ", line).strip()
+
+def _line_key(line: str) -> str:
+    # Dígitos variam entre páginas no mesmo cabeçalho ("Página 3", "Contrato nº 12 - fl. 4").
+    return _DIGITS.sub("#", line.lower())
+
+def _edge_indexes(lines: List[str]) -> List[int]:
+    """Índices das linhas de topo e base da página. Em páginas curtas, cada borda cobre no máximo um terço
+    das linhas com conteúdo; do contrário o corpo inteiro seria tratado como cabeçalho/rodapé."""
+    content = [i for i, line in enumerate(lines) if line]
+    edge = min(EDGE_LINES, max(1, len(content) // 3))
+    return sorted(set(content[:edge] + content[-edge:]))
+
+
+class Compactor:
+    """Reduz o texto extraído antes do envio à IA, página a página.
+
+    Remove cabeçalhos e rodapés repetidos (aprendidos nas primeiras COMPACTION_SAMPLE_PAGES páginas, que
+    ficam retidas até a detecção), números de página, linhas de assinatura, espaços redundantes e
+    parágrafos idênticos já vistos no documento. O texto original não é alterado: a compactação só
+    afeta o que é enviado ao provedor.
+    """
+
+    def __init__(self, sample_pages: int = COMPACTION_SAMPLE_PAGES, dedup_min_chars: int = COMPACTION_DEDUP_MIN_CHARS):
+        self.sample_pages = sample_pages
+        self.dedup_min_chars = dedup_min_chars
+        self._pending: List[List[str]] = []
+        self._repeated: Optional[Set[str]] = None
+        self._seen_paragraphs: Set[bytes] = set()
+        self._chars_before = 0
+        self._chars_after = 0
+
+    @property
+    def tokens_before(self) -> int:
+        return self._chars_before // CHARS_PER_TOKEN
+
+    @property
+    def tokens_after(self) -> int:
+        return self._chars_after // CHARS_PER_TOKEN
+
+    def _learn(self, pages: List[List[str]]):
+        self._repeated = set()
+        if len(pages) < MIN_PAGES_FOR_REPETITION:
+            return
+        counts = Counter()
+        for lines in pages:
+            counts.update({_line_key(lines[i]) for i in _edge_indexes(lines)})
+        threshold = max(MIN_PAGES_FOR_REPETITION, math.ceil(len(pages) / 2))
+        self._repeated = {key for key, count in counts.items() if count >= threshold}
+
+    def _is_edge_noise(self, line: str) -> bool:
+        return bool(_PAGE_NUMBER.match(line)) or _line_key(line) in self._repeated
+
+    def _compact(self, lines: List[str]) -> str:
+        edges = set(_edge_indexes(lines))
+        kept = [
+            line for i, line in enumerate(lines)
+            if not (i in edges and self._is_edge_noise(line)) and not _RULE_LINE.match(line)
+        ]
+
+        paragraphs = []
+        for paragraph in _BLANK_RUNS.sub("\n\n", "\n".join(kept)).split("\n\n"):
+            paragraph = paragraph.strip("\n")
+            if not paragraph:
+                continue
+            if len(paragraph) >= self.dedup_min_chars:
+                digest = hashlib.blake2b(paragraph.lower().encode(), digest_size=16).digest()
+                if digest in self._seen_paragraphs:
+                    continue
+                self._seen_paragraphs.add(digest)
+            paragraphs.append(paragraph)
+
+        text = "\n\n".join(paragraphs) + "\n" if paragraphs else ""
+        self._chars_after += len(text)
+        return text
+
+    def feed(self, page: str) -> str:
+        """Recebe o texto de uma página e devolve o trecho compactado já pronto para envio (possivelmente vazio)."""
+        self._chars_before += len(page)
+        lines = [_normalize_line(line) for line in page.splitlines()]
+        if self._repeated is not None:
+            return self._compact(lines)
+        self._pending.append(lines)
+        if len(self._pending) < self.sample_pages:
+            return ""
+        return self._flush_pending()
+
+    def finish(self) -> str:
+        return self._flush_pending() if self._repeated is None else ""
+
+    def _flush_pending(self) -> str:
+        self._learn(self._pending)
+        pages, self._pending = self._pending, []
+        return "".join(self._compact(lines) for lines in pages)
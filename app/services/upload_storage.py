@@ -0,0 +1,159 @@
+# app/services/upload_storage.py
+import hashlib
+import os
+import uuid
+import zipfile
+from typing import BinaryIO, List, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from core.config import UPLOAD_DIR, MAX_UPLOAD_SIZE_MB, UPLOAD_CHUNK_SIZE, MAX_BATCH_FILES, MAX_BATCH_EXTRACTED_SIZE_MB
+
+MAGIC_BYTES = {
+    ".pdf": b"%PDF-",
+    ".docx": b"PK\x03\x04",
+}
+
+
+def _extension(filename: str) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in MAGIC_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file type. Please upload a .pdf or .docx file."
+        )
+    return extension
+
+
+class _UploadWriter:
+    """Grava um arquivo em disco bloco a bloco, validando tipo e tamanho a cada bloco."""
+
+    def __init__(self, extension: str):
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        self.extension = extension
+        self.final_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}{extension}")
+        self.partial_path = self.final_path + ".part"
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._file = open(self.partial_path, "wb")
+
+    def write(self, chunk: bytes):
+        if self.size == 0 and not chunk.startswith(MAGIC_BYTES[self.extension]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"O conteúdo do arquivo não corresponde a um {self.extension} válido."
+            )
+        self.size += len(chunk)
+        if self.size > MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Arquivo excede o tamanho máximo de {MAX_UPLOAD_SIZE_MB} MB."
+            )
+        self.digest.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self) -> Tuple[str, str, int]:
+        self._file.close()
+        if self.size == 0:
+            self.abort()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo vazio.")
+        os.replace(self.partial_path, self.final_path)
+        return self.final_path, self.digest.hexdigest(), self.size
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+
+async def save_upload(file: UploadFile) -> Tuple[str, str, int]:
+    """Grava o upload em disco em blocos, retornando (caminho, sha256, tamanho).
+
+    Nunca mantém mais de um bloco do arquivo em memória e rejeita o arquivo assim que
+    o tipo ou o tamanho máximo são violados.
+    """
+    writer = _UploadWriter(_extension(file.filename))
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await run_in_threadpool(writer.write, chunk)
+        return writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def _batch_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"O conteúdo do lote excede o limite de {MAX_BATCH_EXTRACTED_SIZE_MB} MB após a descompactação."
+    )
+
+def _save_archive(fileobj: BinaryIO, budget: int) -> List[Tuple[str, str, str, int]]:
+    """Extrai os .pdf/.docx do zip; `budget` é o total de bytes que ainda pode ser gravado no lote."""
+    saved = []
+    written = 0
+    try:
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+                if os.path.splitext(name)[1].lower() not in MAGIC_BYTES:
+                    continue
+                if len(saved) >= MAX_BATCH_FILES:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"O lote excede o limite de {MAX_BATCH_FILES} arquivos."
+                    )
+
+                writer = _UploadWriter(_extension(name))
+                try:
+                    with archive.open(info) as src:
+                        while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                            writer.write(chunk)
+                            # O limite por entrada não basta contra zip bombs com milhares de entradas.
+                            if written + writer.size > budget:
+                                raise _batch_too_large()
+                    saved.append((name, *writer.commit()))
+                    written += writer.size
+                except BaseException:
+                    writer.abort()
+                    raise
+    except zipfile.BadZipFile:
+        discard([path for _, path, _, _ in saved])
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo ZIP inválido.")
+    except BaseException:
+        discard([path for _, path, _, _ in saved])
+        raise
+    return saved
+
+async def save_batch(files: List[UploadFile]) -> List[Tuple[str, str, str, int]]:
+    """Grava todos os arquivos de um lote (incluindo o conteúdo de arquivos .zip), retornando (nome, caminho, sha256, tamanho)."""
+    saved = []
+    budget = MAX_BATCH_EXTRACTED_SIZE_MB * 1024 * 1024
+    try:
+        for file in files:
+            remaining = budget - sum(size for _, _, _, size in saved)
+            if (file.filename or "").lower().endswith(".zip"):
+                saved.extend(await run_in_threadpool(_save_archive, file.file, remaining))
+            else:
+                saved.append((file.filename, *await save_upload(file)))
+            if sum(size for _, _, _, size in saved) > budget:
+                raise _batch_too_large()
+            if len(saved) > MAX_BATCH_FILES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"O lote excede o limite de {MAX_BATCH_FILES} arquivos."
+                )
+    except BaseException:
+        discard([path for _, path, _, _ in saved])
+        raise
+    if not saved:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum arquivo .pdf ou .docx encontrado no lote.")
+    return saved
+
+def discard(paths: List[str]):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
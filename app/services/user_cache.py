@@ -0,0 +1,59 @@
+# app/services/user_cache.py
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from jose import JWTError, jwt
+
+from core import security
+from core.cache import cache
+from core.config import AUTH_CACHE_TTL
+from schemas import schemas
+
+TOKEN_CACHE_SIZE = 10000
+
+_decoded_tokens: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+
+def _user_key(email: str) -> str:
+    return f"auth:user:{email}"
+
+
+def decode_token_subject(token: str) -> Optional[str]:
+    """Retorna o `sub` de um JWT válido, memorizando a decodificação até a expiração do token."""
+    now = time.time()
+    cached = _decoded_tokens.get(token)
+    if cached:
+        email, expires_at = cached
+        if expires_at > now:
+            _decoded_tokens.move_to_end(token)
+            return email
+        del _decoded_tokens[token]
+
+    try:
+        payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+    except JWTError:
+        return None
+    email = payload.get("sub")
+    if email is None:
+        return None
+
+    _decoded_tokens[token] = (email, payload.get("exp") or now + AUTH_CACHE_TTL)
+    if len(_decoded_tokens) > TOKEN_CACHE_SIZE:
+        _decoded_tokens.popitem(last=False)
+    return email
+
+
+async def get(email: str) -> Optional[schemas.CurrentUser]:
+    cached = await cache.get(_user_key(email))
+    if not cached:
+        return None
+    return schemas.CurrentUser.model_validate_json(cached)
+
+async def store(user) -> schemas.CurrentUser:
+    snapshot = schemas.CurrentUser.model_validate(user)
+    await cache.set(_user_key(snapshot.email), snapshot.model_dump_json(), ex=AUTH_CACHE_TTL)
+    return snapshot
+
+async def invalidate(email: str):
+    await cache.delete(_user_key(email))
@@ -0,0 +1,106 @@
+# app/services/user_offboarding.py
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from sqlalchemy import cast, delete, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import OFFBOARD_BATCH_SIZE
+from models import models
+from services import contract_cache, contract_stats, user_cache
+from services.audit_service import log_action, AuditLogAction
+
+
+@dataclass
+class OffboardResult:
+    users_deleted: int = 0
+    contracts_moved: int = 0
+
+
+def selection_query(actor_id: int, user_uuids: Optional[Sequence] = None, email_domain: Optional[str] = None,
+                    role: Optional[models.UserRole] = None, exclude_id: Optional[int] = None):
+    """Usuários a desligar; nunca inclui o próprio administrador nem o dono que recebe os contratos."""
+    query = select(models.User.id, models.User.email).where(models.User.id != actor_id)
+    if exclude_id is not None:
+        query = query.where(models.User.id != exclude_id)
+    if user_uuids:
+        query = query.where(models.User.uuid.in_(list(user_uuids)))
+    if email_domain:
+        query = query.where(func.lower(models.User.email).endswith("@" + email_domain.strip().lstrip("@").lower(), autoescape=True))
+    if role:
+        query = query.where(models.User.role == role)
+    return query
+
+
+async def offboard_batch(db: AsyncSession, actor, users: Sequence, target=None) -> OffboardResult:
+    """Desliga um lote de usuários numa única transação, com uma instrução por tabela referenciada.
+
+    Os contratos passam para `target` (ou ficam sem dono), as referências restantes a esses usuários
+    são anuladas (na auditoria, com autor preservado em details) e uma única entrada de auditoria descreve o lote. Reexecutar o mesmo lote é inócuo:
+    usuários já removidos simplesmente não são mais encontrados.
+    """
+    if not users:
+        return OffboardResult()
+    ids = [user.id for user in users]
+    emails = [user.email for user in users]
+    target_id = target.id if target else None
+
+    moved = (await db.execute(
+        update(models.Contract)
+        .where(models.Contract.user_id.in_(ids))
+        .values(user_id=target_id)
+        .returning(models.Contract.id)
+    )).scalars().all()
+    await db.execute(update(models.Contract).where(models.Contract.deleted_by_id.in_(ids)).values(deleted_by_id=None))
+    await db.execute(update(models.ContractBatch).where(models.ContractBatch.user_id.in_(ids)).values(user_id=target_id))
+    # A FK impede manter o id de um usuário removido: autor e e-mail passam para details antes de anular user_id,
+    # para que a trilha de auditoria continue dizendo quem fez o quê.
+    await db.execute(
+        update(models.AuditLog)
+        .where(models.AuditLog.user_id == models.User.id, models.User.id.in_(ids))
+        .values(
+            details=func.coalesce(models.AuditLog.details, cast({}, JSONB)).op("||")(
+                func.jsonb_build_object("actor_id", models.AuditLog.user_id, "actor_email", models.User.email)
+            ),
+            user_id=None,
+        )
+    )
+    await db.execute(delete(models.User).where(models.User.id.in_(ids)))
+    log_action(db, action=AuditLogAction.USER_DELETED, actor=actor, details={
+        "deleted_user_emails": emails,
+        "reassigned_to": target.email if target else None,
+        "contracts": len(moved),
+    })
+    await db.commit()
+
+    for email in emails:
+        await user_cache.invalidate(email)
+    for user_id in ids:
+        await contract_stats.invalidate_user(user_id)
+    if target_id is not None and moved:
+        await contract_stats.invalidate_user(target_id)
+    await contract_cache.invalidate(*moved)
+    return OffboardResult(users_deleted=len(ids), contracts_moved=len(moved))
+
+
+async def offboard(db: AsyncSession, actor, selection, target=None, max_batches: Optional[int] = None,
+                   batch_size: int = OFFBOARD_BATCH_SIZE):
+    """Processa a seleção em lotes de `batch_size` usuários por id. Retorna o total e se a seleção se esgotou.
+
+    Cada lote é confirmado de forma independente; uma execução interrompida (ou limitada por `max_batches`)
+    é retomada chamando de novo com a mesma seleção.
+    """
+    total = OffboardResult()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        users = (await db.execute(
+            selection.order_by(models.User.id).limit(batch_size).with_for_update()
+        )).all()
+        if not users:
+            return total, True
+        result = await offboard_batch(db, actor, users, target)
+        total.users_deleted += result.users_deleted
+        total.contracts_moved += result.contracts_moved
+        batches += 1
+    return total, False
@@ -0,0 +1,137 @@
+# app/worker.py
+import asyncio
+import logging
+import signal
+import time
+
+from prometheus_client import start_http_server
+
+from core import telemetry
+from core.config import WORKER_METRICS_PORT, WORKER_CONCURRENCY, JOB_VISIBILITY_TIMEOUT, JOB_MAX_ATTEMPTS, STATS_RECONCILE_INTERVAL
+from core.database import AsyncSessionLocal, async_engine
+from services import job_queue, file_processor, ai_providers, contract_stats, audit_partitions
+from services.contract_pipeline import process_contract, recover_orphaned_contracts, fail_contract, RetryableError
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("worker")
+
+POLL_INTERVAL = 1.0
+REAPER_INTERVAL = 5.0
+# Espera após uma falha de comunicação com o Redis antes de tentar de novo.
+ERROR_BACKOFF = 5.0
+AUDIT_PARTITION_INTERVAL = 24 * 3600
+
+
+async def _heartbeat(job_id: str):
+    while True:
+        await asyncio.sleep(JOB_VISIBILITY_TIMEOUT / 3)
+        await job_queue.extend_visibility(job_id)
+
+
+async def _run_job(job: dict):
+    if job["attempts"] == 1 and job["enqueued_at"]:
+        telemetry.QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - job["enqueued_at"]))
+    heartbeat = asyncio.create_task(_heartbeat(job["id"]))
+    try:
+        await process_contract(
+            int(job["id"]),
+            job["payload"]["provider"],
+            last_attempt=job["attempts"] >= JOB_MAX_ATTEMPTS,
+        )
+        await job_queue.ack(job["id"])
+    except RetryableError as e:
+        logger.warning("Job %s falhou (tentativa %s): %s", job["id"], job["attempts"], e)
+        await job_queue.fail(job["id"], job["attempts"])
+    except Exception:
+        logger.exception("Job %s falhou inesperadamente", job["id"])
+        if not await job_queue.fail(job["id"], job["attempts"]):
+            # Sem isso o contrato continuaria PENDING e seria reenfileirado a cada reinício do worker.
+            await fail_contract(int(job["id"]), "Falha inesperada no processamento; tentativas esgotadas.")
+    finally:
+        heartbeat.cancel()
+
+
+async def _wait(stop: asyncio.Event, timeout: float):
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def _consumer(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            job = await job_queue.reserve()
+            if job is not None:
+                await _run_job(job)
+                continue
+        except Exception:
+            # Uma falha do Redis não pode derrubar o worker inteiro pelo gather.
+            logger.exception("Falha ao consumir a fila de jobs")
+            await _wait(stop, ERROR_BACKOFF)
+            continue
+        await _wait(stop, POLL_INTERVAL)
+
+
+async def _reaper(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            moved = await job_queue.requeue_due()
+            if moved:
+                logger.info("%s job(s) devolvidos à fila", moved)
+            await ai_providers.publish_stats()
+        except Exception:
+            logger.exception("Falha ao devolver jobs à fila")
+            await _wait(stop, ERROR_BACKOFF)
+            continue
+        await _wait(stop, REAPER_INTERVAL)
+
+
+async def _stats_reconciler(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                users = await contract_stats.reconcile(db)
+            logger.info("Contadores de contratos reconciliados (%s usuário(s))", users)
+        except Exception:
+            logger.exception("Falha ao reconciliar contadores de contratos")
+        await _wait(stop, STATS_RECONCILE_INTERVAL)
+
+
+async def _audit_partition_maintainer(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            async with async_engine.begin() as conn:
+                created = await conn.run_sync(audit_partitions.ensure_partitions)
+            if created:
+                logger.info("%s partição(ões) de auditoria criada(s)", created)
+        except Exception:
+            logger.exception("Falha ao criar partições de auditoria")
+        await _wait(stop, AUDIT_PARTITION_INTERVAL)
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # O worker roda em outro processo: expõe as próprias métricas em vez de depender do /metrics da API.
+    start_http_server(WORKER_METRICS_PORT)
+
+    recovered = await recover_orphaned_contracts()
+    logger.info("Recuperação inicial: %s contrato(s) PENDING reenfileirados", recovered)
+
+    tasks = [asyncio.create_task(_consumer(stop)) for _ in range(WORKER_CONCURRENCY)]
+    tasks.append(asyncio.create_task(_reaper(stop)))
+    tasks.append(asyncio.create_task(_stats_reconciler(stop)))
+    tasks.append(asyncio.create_task(_audit_partition_maintainer(stop)))
+    logger.info("Worker iniciado com concorrência %s", WORKER_CONCURRENCY)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        file_processor.shutdown_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
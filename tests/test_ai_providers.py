@@ -0,0 +1,80 @@
+# tests/test_ai_providers.py
+import asyncio
+
+import pytest
+
+from services import ai_providers
+
+
+class _Provider(ai_providers.Provider):
+    name = "teste"
+    model = "teste"
+
+    def __init__(self, fail: bool = False):
+        super().__init__(rpm=600, tpm=600_000, max_document_tokens=1000)
+        self.fail = fail
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def generate(self, prompt, on_text=None):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail:
+            raise ai_providers.ProviderError("falhou")
+        return "{}"
+
+def _half_open(provider):
+    provider.breaker.opened_at = 0.0  # muito além do reset_timeout
+
+
+def test_provider_without_generate_cannot_be_instantiated():
+    class Incomplete(ai_providers.Provider):
+        name = model = "incompleto"
+
+    with pytest.raises(TypeError):
+        Incomplete(rpm=1, tpm=1, max_document_tokens=1)
+
+def test_half_open_breaker_lets_a_single_trial_through():
+    async def scenario():
+        provider = _Provider()
+        _half_open(provider)
+        trial = asyncio.create_task(provider.call("x"))
+        await asyncio.sleep(0)
+        assert provider.breaker.trial_in_flight
+        assert not provider.breaker.allow()
+        with pytest.raises(ai_providers.ProviderUnavailable):
+            await provider.call("x")
+
+        provider.release.set()
+        assert await trial == "{}"
+        assert provider.calls == 1
+        assert provider.breaker.state == "closed"
+        assert provider.breaker.allow()
+
+    asyncio.run(scenario())
+
+def test_failed_trial_reopens_breaker():
+    async def scenario():
+        provider = _Provider(fail=True)
+        _half_open(provider)
+        provider.release.set()
+        with pytest.raises(ai_providers.ProviderError):
+            await provider.call("x")
+        assert provider.breaker.state == "open"
+        assert not provider.breaker.trial_in_flight
+
+    asyncio.run(scenario())
+
+def test_cancelled_trial_frees_the_slot():
+    async def scenario():
+        provider = _Provider()
+        _half_open(provider)
+        trial = asyncio.create_task(provider.call("x"))
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert provider.breaker.state == "half_open"
+        assert provider.breaker.allow()
+
+    asyncio.run(scenario())
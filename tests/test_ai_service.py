@@ -0,0 +1,106 @@
+# tests/test_ai_service.py
+import asyncio
+import json
+
+from services import ai_providers, ai_service
+
+
+class _ScriptedProvider(ai_providers.Provider):
+    """Entrega `response` em trechos, com `delay` segundos entre eles; falha no meio se `fail_after` for dado."""
+
+    def __init__(self, name, response, delay=0.0, fail_after=None):
+        self.name = self.model = name
+        super().__init__(rpm=600, tpm=600_000, max_document_tokens=100_000)
+        self.response, self.delay, self.fail_after = response, delay, fail_after
+
+    async def generate(self, prompt, on_text=None):
+        pieces = [self.response[i:i + 8] for i in range(0, len(self.response), 8)]
+        for index, piece in enumerate(pieces):
+            if self.fail_after is not None and index == self.fail_after:
+                raise ai_providers.ProviderError(f"{self.name}: conexão perdida")
+            await asyncio.sleep(self.delay)
+            if on_text:
+                await on_text(piece)
+        return self.response
+
+def _response(foro):
+    return json.dumps({"informacoes_cruciais": {"foro": foro, "garantias": "caução"}}, ensure_ascii=False)
+
+def _run(router, monkeypatch, hedge_delay=0.0):
+    monkeypatch.setattr(ai_providers, "router", router)
+    monkeypatch.setattr(ai_providers, "AI_HEDGE_DELAY", hedge_delay)
+    events = []
+
+    async def on_field(block, field, value, part, attempt):
+        events.append((field, value, attempt))
+
+    result = asyncio.run(ai_service._call_provider("texto", "{text}", "lento", on_field))
+    return result, events
+
+
+def test_hedged_call_publishes_only_the_winning_attempt(monkeypatch):
+    slow = _ScriptedProvider("lento", _response("Comarca A"), delay=0.05)
+    fast = _ScriptedProvider("rapido", _response("Comarca B"), delay=0.0)
+    router = ai_providers.ProviderRouter([slow, fast], ["rapido"])
+
+    result, events = _run(router, monkeypatch, hedge_delay=0.01)
+
+    assert result["informacoes_cruciais"]["foro"] == "Comarca B"
+    # O hedge termina antes de o primário completar um campo: nada do perdedor chega a ser publicado.
+    assert events == [("foro", "Comarca B", 2), ("garantias", "caução", 2)]
+
+
+def test_leader_fields_are_replaced_when_the_hedge_wins():
+    published = []
+
+    async def on_field(block, field, value, part, attempt):
+        published.append((field, value, attempt))
+
+    stream = ai_service._FieldStream(on_field, None)
+
+    async def scenario():
+        primary, hedge = stream(), stream()
+        await primary.feed('{"foro": "Comarca A", ')
+        await hedge.feed('{"foro": "Comarca B", "garantias": "caução"}')
+        primary.fail()
+        await hedge.won()
+
+    asyncio.run(scenario())
+    assert published == [("foro", "Comarca A", 1), ("foro", "Comarca B", 2), ("garantias", "caução", 2)]
+
+def test_fallback_after_a_failed_stream_republishes_under_a_new_attempt(monkeypatch):
+    broken = _ScriptedProvider("lento", _response("Comarca A"), fail_after=6)
+    backup = _ScriptedProvider("rapido", _response("Comarca B"))
+    router = ai_providers.ProviderRouter([broken, backup], ["rapido"])
+
+    result, events = _run(router, monkeypatch)
+
+    assert result["informacoes_cruciais"]["foro"] == "Comarca B"
+    assert events[0] == ("foro", "Comarca A", 1)
+    assert events[-2:] == [("foro", "Comarca B", 2), ("garantias", "caução", 2)]
+
+
+def test_held_chunks_wait_for_start_or_finish(monkeypatch):
+    monkeypatch.setattr(ai_service, "AI_CHUNK_MAX_CHARS", 200)
+    calls = []
+
+    async def fake_call(text, prompt, provider, on_field=None, part=None):
+        calls.append(part)
+        return {"dados_obrigatorios": {f"parte_{part}": len(text)}}
+
+    monkeypatch.setattr(ai_service, "_call_provider", fake_call)
+    clauses = "".join(f"CLÁUSULA {n}ª - " + "texto da cláusula. " * 6 + "\n\n" for n in range(1, 13))
+
+    async def scenario():
+        analysis = ai_service.ChunkedExtraction("lento", prefetch=False)
+        analysis.feed(clauses)
+        await asyncio.sleep(0)
+        held = (analysis.started_chunks, list(calls))
+        result = await analysis.finish()
+        return held, result
+
+    (started, called), result = asyncio.run(scenario())
+
+    assert (started, called) == (0, [])
+    assert calls == list(range(1, len(calls) + 1)) and len(calls) > 2
+    assert set(result["dados_obrigatorios"]) == {f"parte_{part}" for part in calls}
@@ -0,0 +1,81 @@
+# tests/test_audit_service.py
+import asyncio
+import json
+import os
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models.models import AuditLogAction
+from services import audit_service
+
+DELETED_ACTOR = 666
+
+
+class _FakeSession:
+    """Simula o banco: rejeita o lote que contém o autor removido e registra os commits."""
+
+    def __init__(self, committed, down):
+        self.committed = committed
+        self.down = down
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows):
+        if self.down:
+            raise OperationalError("INSERT", {}, ConnectionError("conexão recusada"))
+        if any(row["user_id"] == DELETED_ACTOR for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))
+        self.rows = rows
+
+    async def commit(self):
+        self.committed.extend(row["user_id"] for row in self.rows)
+
+
+def _buffer(monkeypatch, tmp_path, down=False):
+    committed = []
+    monkeypatch.setattr(audit_service, "AUDIT_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(audit_service, "AsyncSessionLocal", lambda: _FakeSession(committed, down))
+    buffer = audit_service.AuditBuffer()
+    buffer._open_spool()
+    return buffer, committed
+
+
+def test_invalid_rows_are_quarantined_and_the_rest_written(monkeypatch, tmp_path):
+    buffer, committed = _buffer(monkeypatch, tmp_path)
+
+    async def scenario():
+        for actor in (1, DELETED_ACTOR, 2):
+            await buffer.log(AuditLogAction.CONTRACT_UPLOADED, actor, {"contract_id": actor})
+        await buffer.flush()
+
+    asyncio.run(scenario())
+
+    assert committed == [1, 2]
+    assert buffer._entries == []
+    with open(buffer._rejected_path, encoding="utf-8") as f:
+        rejected = [json.loads(line) for line in f]
+    assert [item["entry"]["user_id"] for item in rejected] == [DELETED_ACTOR]
+    # A quarentena não entra no reprocessamento de spools órfãos.
+    assert audit_service.AuditBuffer()._recover_orphaned_spools() == []
+
+
+def test_connection_errors_keep_the_whole_batch(monkeypatch, tmp_path):
+    buffer, committed = _buffer(monkeypatch, tmp_path, down=True)
+
+    async def scenario():
+        for actor in (1, 2):
+            await buffer.log(AuditLogAction.CONTRACT_UPLOADED, actor)
+        await buffer.flush()
+
+    asyncio.run(scenario())
+
+    assert committed == []
+    assert [entry["user_id"] for entry in buffer._entries] == [1, 2]
+    assert not os.path.exists(buffer._rejected_path)
+    with open(buffer._spool_path, encoding="utf-8") as f:
+        assert [json.loads(line)["user_id"] for line in f] == [1, 2]
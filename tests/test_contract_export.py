@@ -0,0 +1,63 @@
+# tests/test_contract_export.py
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from models.models import ContractStatus
+from services import contract_export
+
+
+def _rows(start, count):
+    return [
+        (
+            i, f"contrato-{i}.pdf", ContractStatus.SUCCESS, datetime(2024, 1, 1, tzinfo=timezone.utc),
+            7, "gemini", None, Decimal("1500.00") + i, {"dados_obrigatorios": {"foro": f"Comarca {i}"}},
+        )
+        for i in range(start, start + count)
+    ]
+
+def _export(export_format, gzip_enabled, batches):
+    encoder = contract_export.encoder_for(export_format, gzip_enabled)
+    output = encoder.header()
+    for rows in batches:
+        output += encoder.encode(rows)
+    return output + encoder.close()
+
+
+def test_parquet_export_with_several_batches_reads_back():
+    parquet = pytest.importorskip("pyarrow.parquet")
+    batches = [_rows(0, 3), _rows(3, 2), _rows(5, 4)]
+
+    data = _export("parquet", False, batches)
+
+    table = parquet.read_table(io.BytesIO(data))
+    assert parquet.ParquetFile(io.BytesIO(data)).num_row_groups == 3
+    assert table.column("id").to_pylist() == list(range(9))
+    assert table.column("status").to_pylist() == ["SUCCESS"] * 9
+    assert table.column("max_monetary_value").to_pylist()[8] == Decimal("1508.00")
+    assert json.loads(table.column("extracted_data").to_pylist()[4]) == {"dados_obrigatorios": {"foro": "Comarca 4"}}
+
+def test_parquet_export_without_rows_is_a_valid_file():
+    parquet = pytest.importorskip("pyarrow.parquet")
+
+    assert parquet.read_table(io.BytesIO(_export("parquet", True, []))).num_rows == 0
+
+def test_ndjson_export_gzip_stream_decompresses_to_one_object_per_row():
+    data = _export("ndjson", True, [_rows(0, 2), _rows(2, 1)])
+
+    lines = gzip.decompress(data).decode("utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [0, 1, 2]
+    assert json.loads(lines[0])["extracted_data"]["dados_obrigatorios"]["foro"] == "Comarca 0"
+
+def test_csv_export_writes_header_once():
+    data = _export("csv", False, [_rows(0, 1), _rows(1, 1)])
+
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8"))))
+    assert rows[0] == list(contract_export.COLUMNS)
+    assert [row[0] for row in rows[1:]] == ["0", "1"]
+    assert rows[1][2] == "SUCCESS"
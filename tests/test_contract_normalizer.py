@@ -0,0 +1,110 @@
+# tests/test_contract_normalizer.py
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from models.models import Recurrence
+from services import contract_normalizer
+from services.chunking import NOT_SPECIFIED
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("cinco mil reais", Decimal(5000)),
+    ("Valor de cento e vinte e cinco mil reais por mês", Decimal(125000)),
+    ("dois milhões e quinhentos mil reais", Decimal(2500000)),
+    ("um milhão de reais", Decimal(1000000)),
+    ("trezentos e quarenta reais", Decimal(340)),
+])
+def test_spelled_out_amounts(text, amount):
+    values = contract_normalizer.parse_value(text)
+    assert [value.amount for value in values] == [amount]
+    assert values[0].currency == "BRL"
+
+def test_spelled_amount_without_currency_word_is_ignored():
+    assert contract_normalizer.parse_value("prazo de doze meses") == []
+
+def test_numeric_and_spelled_forms_of_the_same_amount_are_one_value():
+    values = contract_normalizer.parse_value("R$ 15.000,00 (quinze mil reais) mensais")
+    assert len(values) == 1
+    assert values[0].amount == Decimal("15000.00")
+    assert values[0].recurrence == Recurrence.MONTHLY
+
+def test_foreign_currencies_and_several_amounts():
+    values = contract_normalizer.parse_value("US$ 1.200,50 na assinatura e EUR 300 por ano")
+    assert [(value.amount, value.currency) for value in values] == [(Decimal("1200.50"), "USD"), (Decimal("300"), "EUR")]
+
+def test_not_specified_value_yields_nothing():
+    assert contract_normalizer.parse_value(NOT_SPECIFIED) == []
+
+
+def test_date_range_in_free_text():
+    terms = contract_normalizer.parse_terms("De 01/02/2024 até 31/01/2025, com renovação automática.")
+    assert terms.start_date == date(2024, 2, 1)
+    assert terms.end_date == date(2025, 1, 31)
+    assert terms.auto_renewal is True
+
+def test_written_dates_and_structured_vigencia():
+    terms = contract_normalizer.parse_terms({"início": "1º de março de 2024", "término": "28 de fevereiro de 2026"})
+    assert (terms.start_date, terms.end_date) == (date(2024, 3, 1), date(2026, 2, 28))
+
+def test_end_date_derived_from_duration():
+    terms = contract_normalizer.parse_terms("12 (doze) meses a partir de 31/01/2024")
+    assert terms.start_date == date(2024, 1, 31)
+    assert terms.end_date == date(2025, 1, 31)
+
+def test_single_date_after_ate_is_the_end():
+    terms = contract_normalizer.parse_terms("Vigente até 30.06.2025")
+    assert (terms.start_date, terms.end_date) == (None, date(2025, 6, 30))
+
+def test_invalid_dates_are_skipped():
+    terms = contract_normalizer.parse_terms("Início em 31/02/2024, término em 10/03/2024")
+    # A data inválida é descartada; a restante é o término, indicado no texto.
+    assert (terms.start_date, terms.end_date) == (None, date(2024, 3, 10))
+
+def test_indefinite_term_has_no_derived_end():
+    terms = contract_normalizer.parse_terms("Prazo indeterminado a partir de 01/01/2024, 12 meses de carência")
+    assert terms.is_indefinite
+    assert terms.end_date is None
+
+@pytest.mark.parametrize("renovacao, expected", [
+    ("Não haverá renovação automática; exige aditivo.", False),
+    ("Nao ha prorrogacao automatica", False),
+    ("O contrato será renovado automaticamente por iguais períodos.", True),
+    ("Renovação mediante renegociação entre as partes.", None),
+])
+def test_auto_renewal_and_its_negation(renovacao, expected):
+    assert contract_normalizer.parse_terms("12 meses", renovacao).auto_renewal is expected
+
+def test_adjustment_index_and_recurrence():
+    terms = contract_normalizer.parse_terms(None, None, "Reajuste anual pelo IGPM/FGV")
+    assert terms.adjustment_index == "IGP-M"
+    assert terms.adjustment_recurrence == Recurrence.YEARLY
+
+
+def test_party_from_text_with_role_and_cnpj():
+    party = contract_normalizer.parse_party("Contratante: ACME LTDA, inscrita no CNPJ sob o nº 12.345.678/0001-99")
+    assert (party.name, party.role, party.document, party.document_type) == ("ACME LTDA", "Contratante", "12345678000199", "CNPJ")
+
+def test_party_from_dict_with_cpf():
+    party = contract_normalizer.parse_party({"nome": "Maria Souza", "papel": "Contratada", "cpf": "123.456.789-09"})
+    assert (party.name, party.role, party.document_type) == ("Maria Souza", "Contratada", "CPF")
+
+def test_normalize_merges_blocks_and_deduplicates():
+    result = contract_normalizer.normalize({
+        "dados_obrigatorios": {
+            "partes_envolvidas": ["ACME LTDA (CNPJ 12.345.678/0001-99)", "Acme Ltda, CNPJ 12345678000199"],
+            "valores_monetarios": ["R$ 1.000,00 mensais", "R$ 1.000,00 por mês"],
+            "vigencia": "01/01/2024 a 31/12/2024",
+        },
+        "informacoes_cruciais": {"reajuste_valores": "IPCA anual", "renovacao_contrato": NOT_SPECIFIED},
+    })
+    assert [party.name for party in result.parties] == ["ACME LTDA"]
+    assert len(result.values) == 1
+    assert result.terms.end_date == date(2024, 12, 31)
+    assert result.terms.adjustment_index == "IPCA"
+    assert result.terms.auto_renewal is None
+
+def test_normalize_tolerates_missing_or_malformed_data():
+    assert contract_normalizer.normalize(None).parties == []
+    assert contract_normalizer.normalize({"dados_obrigatorios": "texto livre"}).values == []
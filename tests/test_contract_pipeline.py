@@ -0,0 +1,39 @@
+# tests/test_contract_pipeline.py
+import asyncio
+
+from services import contract_pipeline
+
+
+def _unavailable(*args, **kwargs):
+    raise ConnectionError("serviço fora do ar")
+
+
+def test_partial_results_survive_publish_and_checkpoint_failures(monkeypatch):
+    monkeypatch.setattr(contract_pipeline.job_queue, "publish", _unavailable)
+    monkeypatch.setattr(contract_pipeline, "AsyncSessionLocal", _unavailable)
+    partial = contract_pipeline._PartialResults(1, None)
+
+    asyncio.run(partial("informacoes_cruciais", "foro", "Comarca A", None, 1))
+
+    assert partial.data == {"informacoes_cruciais": {"foro": "Comarca A"}}
+
+
+def test_partial_results_drop_fields_of_a_previous_attempt(monkeypatch):
+    published = []
+
+    async def publish(contract_id, event, message, batch_id=None, data=None):
+        published.append(data)
+
+    monkeypatch.setattr(contract_pipeline.job_queue, "publish", publish)
+    monkeypatch.setattr(contract_pipeline, "AsyncSessionLocal", _unavailable)
+    partial = contract_pipeline._PartialResults(1, None)
+
+    async def scenario():
+        await partial("dados_obrigatorios", "vigencia", "12 meses", 1, 1)
+        await partial("dados_obrigatorios", "partes_envolvidas", ["ACME"], 2, 1)
+        await partial("dados_obrigatorios", "vigencia", "24 meses", 1, 2)
+
+    asyncio.run(scenario())
+
+    assert published[-1] == {"block": "dados_obrigatorios", "field": "vigencia", "value": "24 meses", "part": 1, "attempt": 2}
+    assert partial.data == {"dados_obrigatorios": {"vigencia": "24 meses", "partes_envolvidas": ["ACME"]}}
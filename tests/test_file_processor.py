@@ -0,0 +1,29 @@
+# tests/test_file_processor.py
+import asyncio
+
+import pytest
+
+from services import file_processor
+
+
+@pytest.mark.parametrize("page_count", [1, 7, 45])
+def test_pdf_ranges_share_the_file_cpu_budget(monkeypatch, page_count):
+    monkeypatch.setattr(file_processor, "EXTRACTION_PAGES_PER_TASK", 20)
+    monkeypatch.setattr(file_processor, "EXTRACTION_CPU_SECONDS", 120)
+    budgets = []
+
+    async def fake_run(func, path, *args):
+        if func is file_processor._pdf_page_count:
+            return page_count
+        start, end, budget = args
+        budgets.append(budget)
+        return [(number + 1, "", 0.0) for number in range(start, end)]
+
+    monkeypatch.setattr(file_processor, "_run", fake_run)
+
+    async def consume():
+        return [number async for number, _, _ in file_processor._iter_pdf_pages("contrato.pdf")]
+
+    assert asyncio.run(consume()) == list(range(1, page_count + 1))
+    assert max(budgets) <= 120
+    assert sum(budgets) == pytest.approx(120)
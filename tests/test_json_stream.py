@@ -0,0 +1,91 @@
+# tests/test_json_stream.py
+import json
+import random
+
+import pytest
+
+from services import json_stream
+
+RESPONSE = json.dumps({
+    "dados_obrigatorios": {
+        "partes_envolvidas": ["ACME LTDA (CNPJ 12.345.678/0001-99)", "Fornecedor \"Y\" S.A."],
+        "valores_monetarios": ["R$ 5.000,00 {mensais}"],
+        "vigencia": {"inicio": "01/01/2025", "fim": None},
+        "clausula_rescisao": "Aviso prévio de 30 dias, multa de 20%.\nSem exceções \\ ressalvas.",
+    },
+    "informacoes_cruciais": {"foro": "São Paulo/SP", "confidencialidade": True, "garantias": 12.5},
+    "observacao": "fora dos blocos",
+}, ensure_ascii=False, indent=2)
+
+EXPECTED_FIELDS = [
+    ("dados_obrigatorios", "partes_envolvidas", ["ACME LTDA (CNPJ 12.345.678/0001-99)", "Fornecedor \"Y\" S.A."]),
+    ("dados_obrigatorios", "valores_monetarios", ["R$ 5.000,00 {mensais}"]),
+    ("dados_obrigatorios", "vigencia", {"inicio": "01/01/2025", "fim": None}),
+    ("dados_obrigatorios", "clausula_rescisao", "Aviso prévio de 30 dias, multa de 20%.\nSem exceções \\ ressalvas."),
+    ("informacoes_cruciais", "foro", "São Paulo/SP"),
+    ("informacoes_cruciais", "confidencialidade", True),
+    ("informacoes_cruciais", "garantias", 12.5),
+    (None, "observacao", "fora dos blocos"),
+]
+
+def _feed_in_pieces(text, sizes):
+    parser = json_stream.FieldParser()
+    fields, position = [], 0
+    for size in sizes:
+        fields.extend(parser.feed(text[position:position + size]))
+        position += size
+    fields.extend(parser.feed(text[position:]))
+    return parser, fields
+
+
+def test_whole_response_emits_every_field_once():
+    parser, fields = _feed_in_pieces(RESPONSE, [])
+    assert fields == EXPECTED_FIELDS
+    assert parser.done
+    assert parser.result() == json.loads(RESPONSE)
+
+def test_character_by_character_cuts_every_token():
+    parser, fields = _feed_in_pieces(RESPONSE, [1] * len(RESPONSE))
+    assert fields == EXPECTED_FIELDS
+    assert parser.result() == json.loads(RESPONSE)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_splits(seed):
+    rng = random.Random(seed)
+    _, fields = _feed_in_pieces(RESPONSE, [rng.randint(1, 15) for _ in range(len(RESPONSE))])
+    assert fields == EXPECTED_FIELDS
+
+def test_field_is_emitted_only_after_its_value_closes():
+    parser = json_stream.FieldParser()
+    assert parser.feed('{"informacoes_cruciais": {"foro": "São Pa') == []
+    assert parser.feed('ulo", "garantias": 1') == [("informacoes_cruciais", "foro", "São Paulo")]
+    # Um número só termina no separador seguinte: "1" ainda pode ser "12".
+    assert parser.feed('2') == []
+    assert parser.feed('}') == [("informacoes_cruciais", "garantias", 12)]
+    assert not parser.done
+    assert parser.feed('}') == []
+    assert parser.done
+
+def test_escaped_quote_cut_between_backslash_and_quote():
+    parser = json_stream.FieldParser()
+    assert parser.feed('{"objeto_contrato": "Venda de \\') == []
+    assert parser.feed('"produto\\" X"}') == [(None, "objeto_contrato", 'Venda de "produto" X')]
+
+def test_code_fences_and_surrounding_text_are_ignored():
+    text = "Claro! Segue o JSON:\n```json\n" + RESPONSE + "\n```\nEspero ter ajudado {sem JSON aqui}."
+    assert json_stream.parse(text) == json.loads(RESPONSE)
+
+def test_truncated_response_raises():
+    parser = json_stream.FieldParser()
+    fields = parser.feed(RESPONSE[:len(RESPONSE) // 2])
+    assert fields == EXPECTED_FIELDS[:len(fields)]
+    with pytest.raises(ValueError):
+        parser.result()
+
+def test_text_without_object_raises():
+    with pytest.raises(ValueError):
+        json_stream.parse("Não consegui analisar o contrato.")
+
+def test_whole_blocks_are_not_repeated_as_top_level_fields():
+    fields = json_stream.FieldParser().feed('{"dados_obrigatorios": {"vigencia": "12 meses"}, "extra": [1, {"a": 2}]}')
+    assert fields == [("dados_obrigatorios", "vigencia", "12 meses"), (None, "extra", [1, {"a": 2}])]
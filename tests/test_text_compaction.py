@@ -0,0 +1,91 @@
+# tests/test_text_compaction.py
+from services.ai_providers import CHARS_PER_TOKEN
+from services.text_compaction import Compactor
+
+
+def _page(number, body):
+    return f"CONTRATO DE PRESTAÇÃO DE SERVIÇOS Nº 123/2024\n\n{body}\n\nPágina {number} de 5\n"
+
+def _compact(pages, **options):
+    compactor = Compactor(**options)
+    text = "".join(compactor.feed(page) for page in pages) + compactor.finish()
+    return compactor, text
+
+
+def test_repeated_headers_and_page_numbers_are_removed():
+    pages = [_page(n, f"CLÁUSULA {n} - O contratante pagará a parcela {n}.") for n in range(1, 6)]
+
+    compactor, text = _compact(pages, sample_pages=3)
+
+    assert "CONTRATO DE PRESTAÇÃO" not in text
+    assert "Página" not in text
+    for n in range(1, 6):
+        assert f"CLÁUSULA {n} - O contratante pagará a parcela {n}." in text
+    assert compactor.tokens_after < compactor.tokens_before
+
+def test_header_is_kept_when_document_is_too_short_to_learn_repetition():
+    _, text = _compact([_page(1, "Única cláusula."), _page(2, "Assinaturas.")], sample_pages=3)
+
+    assert text.count("CONTRATO DE PRESTAÇÃO") == 2
+    assert "Página" not in text  # números de página são removidos mesmo sem aprendizado
+
+def test_pages_are_held_until_sample_is_complete():
+    compactor = Compactor(sample_pages=3)
+
+    assert compactor.feed(_page(1, "Primeira.")) == ""
+    assert compactor.feed(_page(2, "Segunda.")) == ""
+    released = compactor.feed(_page(3, "Terceira."))
+    assert "Primeira." in released and "Terceira." in released
+    assert "Quarta." in compactor.feed(_page(4, "Quarta."))
+    assert compactor.finish() == ""
+
+def test_repeated_body_lines_are_not_mistaken_for_headers():
+    # A linha só é cabeçalho se estiver nas bordas da página.
+    pages = [
+        f"Cabeçalho\nseção {n}\nabertura\nTexto comum\nmeio {n}\nfechamento\nrodapé {n}\nfl. {n}"
+        for n in range(4)
+    ]
+
+    _, text = _compact(pages, sample_pages=4)
+
+    assert "Cabeçalho" not in text
+    assert "fl." not in text
+    assert text.count("Texto comum") == 4
+
+def test_short_pages_keep_their_body():
+    pages = [f"Contrato nº 77\nItem {n}: entrega de lote\n{n}" for n in range(1, 5)]
+
+    _, text = _compact(pages, sample_pages=4)
+
+    assert "Contrato" not in text
+    assert all(f"Item {n}: entrega de lote" in text for n in range(1, 5))
+
+def test_signature_rules_and_whitespace_are_collapsed():
+    page = "Cláusula   primeira:\tobjeto.\n\n\n\n__________________\n.............\nAssinatura"
+
+    _, text = _compact([page], sample_pages=1)
+
+    assert text == "Cláusula primeira: objeto.\n\nAssinatura\n"
+
+def test_identical_long_paragraphs_are_deduplicated_but_numbers_matter():
+    clause = "As partes elegem o foro da comarca de São Paulo para dirimir quaisquer dúvidas oriundas deste contrato."
+    pages = [
+        f"{clause}\n\nMulta de 10% sobre o valor mensal em caso de atraso no pagamento das parcelas.",
+        f"{clause.upper()}\n\nMulta de 20% sobre o valor mensal em caso de atraso no pagamento das parcelas.",
+    ]
+
+    _, text = _compact(pages, sample_pages=1, dedup_min_chars=40)
+
+    assert text.lower().count("as partes elegem") == 1
+    assert "Multa de 10%" in text and "Multa de 20%" in text
+
+def test_short_paragraphs_are_never_deduplicated():
+    _, text = _compact(["Sim.\n\nSim."], sample_pages=1, dedup_min_chars=40)
+
+    assert text.count("Sim.") == 2
+
+def test_token_estimates_follow_characters():
+    compactor, text = _compact(["x" * 400], sample_pages=1)
+
+    assert compactor.tokens_before == 400 // CHARS_PER_TOKEN
+    assert compactor.tokens_after == len(text) // CHARS_PER_TOKEN